@@ -22,6 +22,14 @@
 # -----------------------------------------------------
 from imports import *
 import config as CFG
+import supervisor
+import autotune
+import timeline
+import backend
+import workqueue
+import sessions
+import characterization as L2
+from progress import Progress
 
 # IMPORTANT NOTE:
 #   DVAFS_0 OR DVAFS = False -> FU Designs
@@ -34,8 +42,20 @@ logger = logging.getLogger("auto_L4")
 # start time of script execution
 start_time = time.time()
 
+# Finished and running jobs per phase, with throughput and ETA (see CFG.STATUS_FILE)
+progress = Progress(
+    CFG.STATUS_FILE, CFG.STATUS_INTERVAL, CFG.PROGRESS_LOG_INTERVAL, CFG.DEADLINE
+)
+
 # Clock periods to be synthesized in 'ns'
 CLK_LIST = [1.00, 5.00]
+# Per-precision clock mappings (CLK_8B, CLK_4B, CLK_2B) to be synthesized in 'ns'. The
+# low precision modes have shorter critical paths and can run at shorter periods: every
+# precision is simulated, and its energy/op and throughput reported, at its own period
+# (see CFG.PREC_CLOCK). E.g. a sweep of the 4b and 2b periods:
+#   CLK_MAPPINGS = CFG.clock_sweep([1.00], [1.00, 0.75, 0.50], [1.00, 0.50, 0.25])
+CLK_MAPPINGS = []
+CLK_LIST = CLK_LIST + [clk for clk in CLK_MAPPINGS if clk not in CLK_LIST]
 
 # Precisions to be tested
 # Supported precisions are:
@@ -54,39 +74,447 @@ else:
 # Create a new list of tuples with the product of (prec, clk)
 PREC_LIST = list(product(PREC, CLK_LIST))
 
+# Multi-fidelity power simulation: screen all designs with CFG.SCREEN_REP cycles,
+# then only run the full CFG.REP cycles for designs close to the Pareto front
+MULTI_FIDELITY = False
+# Adaptive simulation length: stop each power simulation once its windowed toggle
+# activity converged (see CFG.ADAPTIVE_*), instead of always simulating CFG.REP cycles
+ADAPTIVE = False
+# Sharded power simulation: split each power simulation into SHARDS shorter runs with
+# different seeds, which run concurrently and are merged into a mean with a 95% CI
+SHARDS = 1
+# Mixed precision power simulation: simulate all precisions in PREC in a single run,
+# and extract the power of each precision (and of each precision switch) per window
+MIXED = False
+# Zero-delay power simulation: only the CFG.CALIBRATION_DESIGNS are simulated with SDF
+# back-annotation, all designs are simulated in the (faster) zero-delay tier, and their
+# power is corrected with glitch factors learned on the calibration designs
+ZERO_DELAY = False
+# Resume interrupted runs: jobs are recorded in the journal (CFG.JOURNAL_FILE), and
+# verified-complete jobs (same inputs, all outputs exist) are skipped on the next run.
+# The TMP directory is kept on interrupts so finished VCD files can be reused
+RESUME = True
+# Autotune the concurrency per stage and the genus threads per synthesis to the cores,
+# memory and licenses of this machine (see CFG.CORE_BUDGET), instead of the fixed
+# CFG.STAGE_SLOTS and CFG.SYN_CPUS (used until the run history has syntheses)
+AUTOTUNE = True
+# Distributed run: the synthesis and power simulation jobs are published to
+# CFG.QUEUE_DIR, and run by workers on any host with access to it
+# (python auto_framework.py worker). This process only schedules and collects them
+DISTRIBUTED = False
+# Persistent genus sessions: syntheses and power extractions (CFG.SESSION_STAGES) are
+# run in long-lived genus processes, one per slot, instead of a new genus per job
+SESSIONS = False
+# Staged synthesis: elaborate and syn_generic once per design, then only map the generic
+# database per clock period in CLK_LIST (see CFG.SYN_GENERIC_L4 and CFG.SYN_MAP_L4)
+STAGED_SYNTHESIS = False
+# Fmax search: after the syntheses of CLK_LIST, search the minimum clock period which
+# meets timing per design (see CFG.FMAX_*), simulate the power of every precision at
+# that period, and export the energy/op and throughput at fmax (fmax.csv)
+FMAX = False
+# Hierarchical synthesis: synthesize the L2_mult block of every L2 variant once per clock
+# period (see CFG.SYN_BLOCK_L2), and only the L3/L4 levels of every design around its
+# cached block netlist. CFG.HIER_QOR_DESIGNS are also synthesized flat, and the QoR of
+# both flows is compared in qor.csv. Replaces STAGED_SYNTHESIS
+HIERARCHICAL = False
+# Cell statistics: count the cells of every synthesized netlist per module and instance
+# path (flops, clock gating and combinational cells, with their liberty areas), see
+# CFG.generate_cell_df
+CELL_STATS = False
+# Power trees: parse every power report into the power of all its instances, and roll
+# it up per instance path and per CFG.POWER_TREE_GROUPS, see CFG.generate_power_tree_df
+POWER_TREE = False
+
+# Work queue of a distributed run (see main)
+queue = None
+# Genus threads of the syntheses which explore the speedup of genus (see configure)
+explore_cpus = None
+
+
+def generic_jobs(designs):
+    # (DES,) generic synthesis jobs, longest predicted first
+    return CFG.longest_first(
+        ((des,) for des in designs), ["generic"], lambda des: (des, None, None)
+    )
+
+
+def syn_jobs(jobs):
+    # (CLK, DES) synthesis (or mapping, see STAGED_SYNTHESIS) jobs, longest predicted
+    # synthesis first
+    stage = "map" if STAGED_SYNTHESIS else "syn"
+    return CFG.longest_first(jobs, [stage], lambda clk, des: (des, clk, None))
+
+
+def with_threads(jobs, syn_cpus):
+    # (CLK, DES, cpus) synthesis jobs: every CFG.SYN_EXPLORE_EVERY-th one runs with
+    # explore_cpus genus threads while AUTOTUNE learns the speedup, the others with
+    # (syn_cpus)
+    every = CFG.SYN_EXPLORE_EVERY
+    return [
+        (*job, explore_cpus if explore_cpus and i % every == every - 1 else syn_cpus)
+        for i, job in enumerate(jobs)
+    ]
+
+
+def power_jobs(jobs, prec=None):
+    # ((PREC, CLK), DES) power simulation jobs (or (CLK, DES) mixed precision jobs with
+    # prec="mixed"), longest predicted vsim + power extraction first
+    if prec:
+        key = lambda clk, des: (des, clk, prec)
+    else:
+        key = lambda prec_clk, des: (des, prec_clk[1], prec_clk[0])
+    return CFG.longest_first(jobs, ["vsim", "power"], key)
+
+
+def dispatch(func):
+    # Job function which runs (func) here, or on the workers of a distributed run
+    if queue:
+        return partial(queue.run_job, func)
+    return func
+
+
+async def starmap(func, iterable, phase, remote=True):
+    # Run all jobs concurrently in the event loop. The number of tools running at once
+    # is limited per stage by CFG.STAGE_SLOTS, and the slots are handed out in the
+    # order of (iterable). Jobs are counted in (phase) of the progress report. Jobs
+    # which only schedule other jobs (e.g. the fmax search) always run here (remote)
+    jobs = list(iterable)
+    progress.add(phase, len(jobs))
+    run = dispatch(func) if remote else func
+    return await asyncio.gather(*(progress.track(phase, run(*args)) for args in jobs))
+
+
+def report_timeline():
+    # Export the timeline of this run to CFG.TRACE_FILE, and log where the time went
+    entries = timeline.load(CFG.TIMELINE_FILE)
+    timeline.chrome_trace(entries, CFG.TRACE_FILE)
+    timeline.summary(entries)
+    logger.info(f"Timeline saved to {CFG.TIMELINE_FILE} (Chrome trace: {CFG.TRACE_FILE})")
+
+
+def configure():
+    # Concurrency limit per stage of the tools launched from this process (by default
+    # 4 syntheses, each spawns an 8-thread genus process). Returns the slots per stage
+    # and the genus threads per synthesis
+    global explore_cpus
+
+    backend.set_backend(CFG.TOOL_BACKEND)
+    if AUTOTUNE:
+        tuning = autotune.tune(
+            CFG.HISTORY_FILE,
+            n_syn_jobs=len(CLK_LIST) * len(CFG.DESIGN_NAMES),
+            core_budget=CFG.CORE_BUDGET,
+            mem_budget=CFG.MEM_BUDGET,
+            licenses=CFG.LICENSE_BUDGET,
+            cpu_options=CFG.SYN_CPU_OPTIONS,
+            serial_default=CFG.SYN_SERIAL_FRACTION,
+            mem_default=CFG.STAGE_MEM,
+            sed_slots=CFG.STAGE_SLOTS["sed"],
+            design_cfg=CFG.DESIGN_CFG,
+            default_slots=CFG.STAGE_SLOTS,
+            default_cpus=CFG.SYN_CPUS,
+        )
+        slots, syn_cpus = tuning["slots"], tuning["syn_cpus"]
+        explore_cpus = tuning["explore_cpus"]
+    else:
+        slots, syn_cpus = CFG.STAGE_SLOTS, CFG.SYN_CPUS
+    supervisor.set_slots(slots)
+    supervisor.set_disk_budget(CFG.TMP_DIR, CFG.DISK_BUDGET, CFG.DISK_MARGIN)
+    supervisor.cancel_on_sigterm()
+    if SESSIONS:
+        for stage in CFG.SESSION_STAGES:
+            sessions.add_pool(
+                stage,
+                backend.command("genus", "-legacy_ui", "-no_gui"),
+                CFG.SESSION_SETUP[stage],
+                CFG.SESSION_MAX_JOBS,
+            )
+    return slots, syn_cpus
+
+
+async def worker():
+    # Run the jobs of distributed runs (DISTRIBUTED) on this host, with the slots and
+    # genus threads of this host, until interrupted (or CFG.WORKER_IDLE_TIMEOUT)
+    logger.info("Starting Worker!")
+    timeline.start(CFG.TIMELINE_FILE)
+    slots, syn_cpus = configure()
+
+    async def generic_synthesis(*args, cpus=None):
+        return await CFG.generic_synthesis(*args, cpus=syn_cpus)
+
+    async def synthesis(CLK, DES, cpus=None, **kwargs):
+        # Threads explored by the coordinator are kept, they don't exceed syn_cpus
+        cpus = min(cpus or syn_cpus, syn_cpus)
+        return await CFG.synthesis(CLK, DES, cpus=cpus, **kwargs)
+
+    async def block_synthesis(*args, cpus=None):
+        return await CFG.block_synthesis(*args, cpus=syn_cpus)
+
+    async def l2_synthesis(*args, cpus=None):
+        return await L2.l2_synthesis(*args, cpus=syn_cpus)
+
+    try:
+        await workqueue.Worker(
+            CFG.QUEUE_DIR,
+            funcs={
+                "generic_synthesis": generic_synthesis,
+                "synthesis": synthesis,
+                "power_simulation": CFG.power_simulation,
+                "mixed_power_simulation": CFG.mixed_power_simulation,
+                "block_synthesis": block_synthesis,
+                "l2_synthesis": l2_synthesis,
+                "l2_power_simulation": L2.l2_power_simulation,
+            },
+            kinds={
+                "generic_synthesis": "syn",
+                "synthesis": "syn",
+                "power_simulation": "vsim",
+                "mixed_power_simulation": "vsim",
+                "block_synthesis": "syn",
+                "l2_synthesis": "syn",
+                "l2_power_simulation": "vsim",
+            },
+            capacity=slots,
+            idle_timeout=CFG.WORKER_IDLE_TIMEOUT,
+            # Timeline events of the job go to the run of its coordinator
+            on_claim=lambda spec: timeline.set_job_run(spec["run"]),
+        ).work()
+    finally:
+        await sessions.close_all()
+
 
-def main():
+async def main():
+    global queue
+
+    # The power simulation modes exclude each other
+    modes = {"MIXED": MIXED, "ZERO_DELAY": ZERO_DELAY, "MULTI_FIDELITY": MULTI_FIDELITY}
+    modes = [k for k, v in modes.items() if v]
+    if len(modes) > 1:
+        raise ValueError(f"Only one of {', '.join(modes)} can be set")
 
     logger.info("Starting Script!")
+    run = timeline.start(CFG.TIMELINE_FILE)
 
     # Populate temporary directory at CFG.TMP_DIR
-    CFG.populate_tmp_dir(CLK_LIST)
+    CFG.populate_tmp_dir(CLK_LIST, resume=RESUME)
 
-    # Create MultiProcessing pool with 4 threads for synthesis
-    # Each MP thread spawns an 8-thread process (controlled by syn_L4_mac)
-    pool = mp.Pool(4)
+    slots, syn_cpus = configure()
+    if DISTRIBUTED:
+        queue = workqueue.Coordinator(CFG.QUEUE_DIR, run)
+        queue.start()
+    reporter = asyncio.create_task(progress.report())
 
     # Synthesize designs in CFG.DESIGN_NAMES list
-    pool.starmap(CFG.synthesis, product(CLK_LIST, CFG.DESIGN_NAMES))
+    if HIERARCHICAL:
+        await starmap(
+            partial(CFG.block_synthesis, cpus=syn_cpus),
+            product(CLK_LIST, CFG.l2_variants(CFG.DESIGN_NAMES)),
+            "block synthesis",
+        )
+    elif STAGED_SYNTHESIS:
+        await starmap(
+            partial(CFG.generic_synthesis, cpus=syn_cpus),
+            generic_jobs(CFG.DESIGN_NAMES),
+            "generic synthesis",
+        )
+    synthesis = partial(
+        CFG.synthesis,
+        staged=STAGED_SYNTHESIS and not HIERARCHICAL,
+        hier=HIERARCHICAL,
+    )
+    await starmap(
+        synthesis,
+        with_threads(syn_jobs(product(CLK_LIST, CFG.DESIGN_NAMES)), syn_cpus),
+        "synthesis",
+    )
+    if HIERARCHICAL:
+        qor_designs = [des for des in CFG.HIER_QOR_DESIGNS if des in CFG.DESIGN_NAMES]
+        await starmap(
+            partial(CFG.synthesis, cpus=syn_cpus, reference=True),
+            syn_jobs(product(CLK_LIST, qor_designs)),
+            "flat synthesis",
+        )
+    if FMAX:
+        # The syntheses of CLK_LIST are the first bounds of the search
+        fmax = await starmap(
+            partial(
+                CFG.fmax_search, synthesize=dispatch(partial(synthesis, cpus=syn_cpus))
+            ),
+            ((des,) for des in CFG.DESIGN_NAMES),
+            "fmax search",
+            remote=False,
+        )
+        fmax = dict(zip(CFG.DESIGN_NAMES, fmax))
     logger.info(f"Synthesized all designs! Starting power simulations")
 
-    pool.close()
-    pool.join()
-
-    # Create new Multi-Processing pool with 24 threads for power simulations
-    pool = mp.Pool(24)
+    # Full-length power simulation, either fixed or adaptive length
+    if ADAPTIVE:
+        full_simulation = partial(
+            CFG.power_simulation,
+            rep=CFG.ADAPTIVE_MAX_REP,
+            adaptive=True,
+            shards=SHARDS,
+        )
+    else:
+        full_simulation = partial(CFG.power_simulation, shards=SHARDS)
 
-    pool.starmap(CFG.power_simulation, product(PREC_LIST, CFG.DESIGN_NAMES))
+    if MIXED:
+        # The mixed precision powerbench runs at one clock period: precisions of
+        # non-uniform clock mappings are simulated separately
+        uniform = [clk for clk in CLK_LIST if CFG.is_uniform(clk)]
+        await starmap(
+            partial(CFG.mixed_power_simulation, prec_list=PREC),
+            power_jobs(product(uniform, CFG.DESIGN_NAMES), prec="mixed"),
+            "mixed power",
+        )
+        await starmap(
+            full_simulation,
+            power_jobs(
+                ((prec, clk), des)
+                for (prec, clk), des in product(PREC_LIST, CFG.DESIGN_NAMES)
+                if clk not in uniform
+            ),
+            "power",
+        )
+    elif ZERO_DELAY:
+        await starmap(
+            full_simulation,
+            power_jobs(product(PREC_LIST, CFG.CALIBRATION_DESIGNS)),
+            "calibration",
+        )
+        await starmap(
+            partial(full_simulation, fidelity="zd", skip_higher=False),
+            power_jobs(product(PREC_LIST, CFG.DESIGN_NAMES)),
+            "zero-delay",
+        )
+        for CLK in CLK_LIST:
+            CFG.glitch_calibration(CLK, PREC)
+    elif MULTI_FIDELITY:
+        # Screening pass for all designs
+        await starmap(
+            partial(CFG.power_simulation, rep=CFG.SCREEN_REP, fidelity="screen"),
+            power_jobs(product(PREC_LIST, CFG.DESIGN_NAMES)),
+            "screening",
+        )
+        logger.info("Finished Screening Power Simulations!")
+        # Full-length pass only for contenders
+        contenders = []
+        for CLK in CLK_LIST:
+            contenders += CFG.pareto_contenders(CLK, PREC)
+        await starmap(full_simulation, power_jobs(contenders), "power")
+    else:
+        await starmap(
+            full_simulation, power_jobs(product(PREC_LIST, CFG.DESIGN_NAMES)), "power"
+        )
+    if FMAX:
+        # Power of every precision at the minimum clock period of each design
+        await starmap(
+            full_simulation,
+            power_jobs(
+                ((prec, clk), des) for des, clk in fmax.items() if clk for prec in PREC
+            ),
+            "fmax power",
+        )
     logger.info("Finished Power Simulations!")
+    reporter.cancel()
+    await asyncio.gather(reporter, return_exceptions=True)
+    if queue:
+        queue.stop()
+    await sessions.close_all()
 
     ############ Power and Area Breakdown ############
-    pool.starmap(CFG.generate_breakdown_df, product(CLK_LIST, [PREC], [DVAFS]))
+    for CLK in CLK_LIST:
+        CFG.generate_breakdown_df(CLK, PREC, DVAFS)
+    if FMAX:
+        CFG.generate_fmax_df(fmax, PREC, DVAFS)
+    if HIERARCHICAL:
+        for CLK in CLK_LIST:
+            CFG.generate_qor_df(CLK, qor_designs)
+    if CELL_STATS:
+        for CLK in CLK_LIST:
+            CFG.generate_cell_df(CLK, CFG.DESIGN_NAMES, DVAFS)
+    if POWER_TREE:
+        for CLK in CLK_LIST:
+            CFG.generate_power_tree_df(CLK, PREC, DVAFS)
+
+    CFG.cleanup(CFG.TMP_DIR)
+
+    report_timeline()
+    logger.info(f"Log messages saved to ./{log_file}")
+    end_time = round(time.time() - start_time)
+    end_time = timedelta(seconds=end_time)
+    logger.info(f"THE SCRIPT TOOK ({end_time}) TO FINISH")
+
+
+async def area_screen():
+    # Area screening: elaborate and syn_generic every design in CFG.DESIGN_NAMES, and
+    # rank them by the provisional area of their generic netlists. No mapping, SDF
+    # files or power simulations. The generic databases are reused by STAGED_SYNTHESIS
+    global queue
 
-    pool.close()
-    pool.join()
+    logger.info("Starting Area Screening!")
+    run = timeline.start(CFG.TIMELINE_FILE)
+    slots, syn_cpus = configure()
+    if DISTRIBUTED:
+        queue = workqueue.Coordinator(CFG.QUEUE_DIR, run)
+        queue.start()
+    reporter = asyncio.create_task(progress.report())
+
+    await starmap(
+        partial(CFG.generic_synthesis, cpus=syn_cpus),
+        generic_jobs(CFG.DESIGN_NAMES),
+        "generic synthesis",
+    )
+    reporter.cancel()
+    await asyncio.gather(reporter, return_exceptions=True)
+    if queue:
+        queue.stop()
+    await sessions.close_all()
+
+    CFG.generate_area_screen_df(CFG.DESIGN_NAMES, DVAFS)
 
     CFG.cleanup(CFG.TMP_DIR)
 
+    report_timeline()
+    logger.info(f"Log messages saved to ./{log_file}")
+    end_time = round(time.time() - start_time)
+    end_time = timedelta(seconds=end_time)
+    logger.info(f"THE SCRIPT TOOK ({end_time}) TO FINISH")
+
+
+async def characterize():
+    # L2 characterization: synthesize and power-simulate the L2 variants of
+    # CFG.DESIGN_NAMES, and predict the L4 arrays from them (see L2.generate_compositional_df)
+    global queue
+
+    logger.info("Starting L2 Characterization!")
+    run = timeline.start(CFG.TIMELINE_FILE)
+    slots, syn_cpus = configure()
+    if DISTRIBUTED:
+        queue = workqueue.Coordinator(CFG.QUEUE_DIR, run)
+        queue.start()
+    reporter = asyncio.create_task(progress.report())
+
+    variants = CFG.l2_variants(CFG.DESIGN_NAMES)
+    await starmap(
+        partial(L2.l2_synthesis, cpus=syn_cpus),
+        product(CLK_LIST, variants),
+        "L2 synthesis",
+    )
+    await starmap(L2.l2_power_simulation, product(PREC_LIST, variants), "L2 power")
+    logger.info(f"Characterized {len(variants)} L2 variants!")
+    reporter.cancel()
+    await asyncio.gather(reporter, return_exceptions=True)
+    if queue:
+        queue.stop()
+    await sessions.close_all()
+
+    for CLK in CLK_LIST:
+        L2.generate_compositional_df(CLK, PREC, DVAFS)
+
+    CFG.cleanup(f"{CFG.TMP_DIR}/L2")
+
+    report_timeline()
     logger.info(f"Log messages saved to ./{log_file}")
     end_time = round(time.time() - start_time)
     end_time = timedelta(seconds=end_time)
@@ -96,16 +524,26 @@ def main():
 # To handle exceptions in a clean way
 if __name__ == "__main__":
     try:
-        main()
-    except KeyboardInterrupt:
-        # Handle KeyboardInterrupt
-        # Kill all running processes and delete TMP directory
+        # python auto_framework.py worker: run the jobs of a distributed run
+        # python auto_framework.py l2: L2 characterization and compositional model
+        # python auto_framework.py area: area screening from generic synthesis only
+        command = {"worker": worker, "l2": characterize, "area": area_screen}.get(
+            " ".join(sys.argv[1:]), main
+        )
+        asyncio.run(command())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        # Handle KeyboardInterrupt and SIGTERM
+        # Kill the process groups started by this run (cancelled jobs kill their own
+        # tools, this catches the rest) and delete TMP directory
         logger.warning("Interrupted - Cleaning up and exiting")
         try:
-            os.system("killall genus")
-            os.system("killall vsim")
-            os.system("killall sed")
-            CFG.cleanup(CFG.TMP_DIR)
+            supervisor.cancel_all("interrupted")
+            # Workers don't run the jobs left in the queue
+            if queue:
+                queue.stop()
+            report_timeline()
+            if not RESUME:
+                CFG.cleanup(CFG.TMP_DIR)
             sys.exit(0)
         except Exception as E:
             logger.warning(f"Couldn't exit normally - faced Exception: {E}")
@@ -113,10 +551,11 @@ if __name__ == "__main__":
     except OSError as OSE:
         logger.warning(f"OSError: Exception: {OSE}")
         try:
-            os.system("killall genus")
-            os.system("killall vsim")
-            os.system("killall sed")
-            CFG.cleanup(CFG.TMP_DIR)
+            supervisor.cancel_all("terminated")
+            if queue:
+                queue.stop()
+            if not RESUME:
+                CFG.cleanup(CFG.TMP_DIR)
             sys.exit(0)
         except Exception as E:
             logger.warning(f"Couldn't exit normally - faced Exception: {E}")
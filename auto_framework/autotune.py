@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Core-budget autotuner for Auto Framework
+#           Chooses the concurrency per stage and the genus
+#           threads per synthesis from the available cores,
+#           memory and licenses, and the speedup and memory
+#           learned from the run history
+# -----------------------------------------------------
+
+from imports import *
+from collections import Counter
+import history
+
+logger = logging.getLogger("auto_L4")
+
+
+def machine_resources():
+    # Cores available to this process, and available memory (GB)
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    mem = None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    mem = int(line.split()[1]) / 1024 ** 2
+                    break
+    except OSError:
+        pass
+    if mem is None:
+        mem = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3
+    return cores, mem
+
+
+def amdahl(s, cpus):
+    # Relative run time on (cpus) threads with a serial fraction (s)
+    return s + (1 - s) / cpus
+
+
+def serial_fraction(entries, default, design_cfg=None):
+    # Fit the serial fraction of Amdahl's law to runs with different thread counts.
+    # Every run is normalised by its own baseline: the run time of the same job on the
+    # most common thread count, predicted from the most similar jobs run with it (see
+    # history.predict), so runs of different designs and clocks can be compared
+    entries = [e for e in entries if e["duration"] > 0]
+    counts = Counter(e["cpus"] for e in entries)
+    if len(counts) < 2:
+        return default
+    base = counts.most_common(1)[0][0]
+    groups = history.group([e for e in entries if e["cpus"] == base])
+    cpus, log_ratio = [], []
+    for e in entries:
+        if e["cpus"] != base:
+            baseline = history.predict(groups, e["design"], e["clk"], None, design_cfg)
+            cpus.append(e["cpus"])
+            log_ratio.append(np.log(e["duration"] / baseline))
+    cpus, log_ratio = np.array(cpus), np.array(log_ratio)
+    candidates = np.linspace(0, 1, 101)
+    errors = [
+        np.sum((log_ratio - np.log(amdahl(s, cpus) / amdahl(s, base))) ** 2)
+        for s in candidates
+    ]
+    return float(candidates[int(np.argmin(errors))])
+
+
+def explore_cpus(entries, cpus, cpu_options):
+    # Thread count for some syntheses to run with instead of (cpus), while the history
+    # (entries) has runs of a single thread count: serial_fraction() needs two. None
+    # once the speedup can be learned
+    smaller = [c for c in cpu_options if c < cpus]
+    if len({e["cpus"] for e in entries}) > 1 or not smaller:
+        return None
+    return smaller[-1]
+
+
+def stage_memory(entries, default):
+    # Memory to reserve per job: 90th percentile of the observed peaks (GB)
+    peaks = [e["peak_mem"] for e in entries if e.get("peak_mem")]
+    return float(np.percentile(peaks, 90)) if peaks else default
+
+
+def stage_duration(entries, default=1.0):
+    durations = [e["duration"] for e in entries]
+    return float(np.median(durations)) if durations else default
+
+
+def tune_synthesis(n_jobs, cores, mem, licenses, s, mem_per_job, cpu_options):
+    # Choose (concurrent syntheses, threads per synthesis) with the shortest makespan
+    # of (n_jobs) syntheses: ceil(n_jobs / slots) rounds of amdahl(s, cpus) each
+    best = None
+    for cpus in sorted(cpu_options):
+        if cpus > cores:
+            break
+        slots = min(cores // cpus, int(mem // mem_per_job), licenses, max(n_jobs, 1))
+        if slots < 1:
+            continue
+        makespan = math.ceil(max(n_jobs, 1) / slots) * amdahl(s, cpus)
+        # Ties go to fewer threads, which leaves cores for other users
+        if best is None or makespan < best[0] - 1e-9:
+            best = (makespan, slots, cpus)
+    if best is None:
+        return 1, min(cpu_options)
+    return best[1], best[2]
+
+
+def tune(
+    history_file,
+    n_syn_jobs,
+    core_budget=None,
+    mem_budget=None,
+    licenses=None,
+    cpu_options=(1, 2, 4, 8),
+    serial_default=0.5,
+    mem_default=None,
+    sed_slots=8,
+    design_cfg=None,
+    default_slots=None,
+    default_cpus=None,
+):
+    # Returns the concurrency per stage (see supervisor.set_slots) and the genus
+    # threads per synthesis, within the core, memory (GB) and license budgets. Without
+    # synthesis history yet, (default_slots) and (default_cpus) are returned (if given).
+    # Also returns the thread count of the syntheses exploring the speedup of genus
+    # (see explore_cpus)
+    syn = history.load(history_file, "syn")
+    if not syn and default_slots and default_cpus:
+        logger.info(
+            f"Autotune: no run history yet - {default_slots['syn']} syntheses x {default_cpus} threads"
+        )
+        return {
+            "slots": default_slots,
+            "syn_cpus": default_cpus,
+            "serial_fraction": serial_default,
+            "explore_cpus": explore_cpus(syn, default_cpus, cpu_options),
+        }
+    cores, mem = machine_resources()
+    cores = min(core_budget or cores, cores)
+    mem = min(mem_budget or mem, mem)
+    licenses = licenses or {}
+    mem_default = mem_default or {}
+
+    vsim = history.load(history_file, "vsim")
+    power = history.load(history_file, "power")
+
+    # Synthesis phase: genus scales with its thread count
+    s = serial_fraction(syn, serial_default, design_cfg)
+    syn_slots, syn_cpus = tune_synthesis(
+        n_syn_jobs,
+        cores,
+        mem,
+        licenses.get("genus", cores),
+        s,
+        stage_memory(syn, mem_default.get("syn", 8)),
+        cpu_options,
+    )
+
+    # Power phase: single-threaded vsim and genus runs share the cores, in the ratio
+    # of their run times (so neither stage starves the other)
+    vsim_mem = stage_memory(vsim, mem_default.get("vsim", 2))
+    power_mem = stage_memory(power, mem_default.get("power", 4))
+    t_vsim, t_power = stage_duration(vsim), stage_duration(power)
+    share = t_power / (t_vsim + t_power)
+    total = min(cores, int(mem // (share * power_mem + (1 - share) * vsim_mem)))
+    power_slots = min(max(1, round(total * share)), licenses.get("genus", total))
+    vsim_slots = min(max(1, total - power_slots), licenses.get("vsim", total))
+
+    logger.info(
+        f"Autotune: {cores} cores, {mem:.0f} GB - {syn_slots} syntheses x {syn_cpus} threads (serial fraction {s:.2f}), {vsim_slots} vsim, {power_slots} genus power"
+    )
+    return {
+        "slots": {
+            "syn": syn_slots,
+            "vsim": vsim_slots,
+            "power": power_slots,
+            "sed": sed_slots,
+        },
+        "syn_cpus": syn_cpus,
+        "serial_fraction": s,
+        "explore_cpus": explore_cpus(syn, syn_cpus, cpu_options),
+    }
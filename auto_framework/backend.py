@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Tool backends for Auto Framework
+#           Maps the tools (genus, vsim) to the commands which
+#           run them: the licensed tools, or the stand-ins of
+#           fake_tools.py
+# -----------------------------------------------------
+
+from imports import *
+
+logger = logging.getLogger("auto_L4")
+
+FAKE_TOOLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_tools.py")
+
+# Command prefix per tool and backend. Tools without an entry run as is (e.g. sed)
+BACKENDS = {
+    "eda": {"genus": ["genus"], "vsim": ["vsim"]},
+    "fake": {
+        "genus": [sys.executable, FAKE_TOOLS, "genus"],
+        "vsim": [sys.executable, FAKE_TOOLS, "vsim"],
+    },
+}
+
+_backend = BACKENDS["eda"]
+
+
+def register(name, commands):
+    # Add a backend, e.g. register("remote", {"genus": ["ssh", "host", "genus"]})
+    BACKENDS[name] = commands
+
+
+def set_backend(name):
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown tool backend {name} (known: {', '.join(BACKENDS)})")
+    _backend = BACKENDS[name]
+    if name != "eda":
+        logger.info(f"Running tools with the {name} backend")
+
+
+def command(tool, *args):
+    # argv which runs (tool) with (args) on the current backend
+    return _backend.get(tool, [tool]) + list(args)
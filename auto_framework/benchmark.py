@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Orchestration benchmark for Auto Framework
+#           Runs the complete flow of auto_framework.py with the
+#           fake tool backend on SCALES times the benchmarked
+#           designs, and measures the makespan against its lower
+#           bound, the orchestration overhead per job and the
+#           report parse throughput
+#
+#   python benchmark.py [scale ...]
+#   python benchmark.py worker <scale>   (started by the benchmark, see WORKERS)
+# -----------------------------------------------------
+
+from imports import *
+import config as CFG
+import auto_framework as AF
+import timeline
+from progress import Progress
+
+logger = logging.getLogger("auto_L4")
+
+# Number of copies of CFG.DESIGN_NAMES to benchmark
+SCALES = [10, 100]
+# Clock periods and precisions of the benchmarked flow
+CLK_LIST = [1.00, 5.00]
+PREC = ["0000", "0010", "0011", "1010", "1111"]
+# Duration model of the fake tools (see fake_tools.py): the default model scaled by
+# TIME_SCALE (0: tools exit right away, only the orchestration is measured). The
+# breakdown needs the reports of all designs, so the fake tools don't fail by default
+TIME_SCALE = 0.0005
+FAIL_RATE = 0
+# Distributed run (DISTRIBUTED in auto_framework.py): number of local worker processes
+# which run the jobs from a work queue in the benchmark directory, each with the fixed
+# CFG.STAGE_SLOTS (0: the jobs run in the benchmark process)
+WORKERS = 0
+# Results of every scale are kept in BENCH_DIR/scale_<n>, and summarised in
+# BENCH_DIR/benchmark.json. Absolute, the tools run in their work directories
+BENCH_DIR = os.path.abspath(f"{CFG.LOCAL_DIR}/benchmark")
+# Designs of the benchmark run, copied (scale) times
+DESIGN_NAMES = list(CFG.DESIGN_NAMES)
+
+
+def setup(scale, fresh=True):
+    # Point the framework at a (fresh) directory, with (scale) copies of every design
+    work = os.path.abspath(f"{BENCH_DIR}/scale_{scale}")
+    if fresh:
+        if os.path.exists(work):
+            shutil.rmtree(work)
+        os.makedirs(work)
+    CFG.TMP_DIR = f"{work}/tmp"
+    CFG.RESULT_DIR = f"{work}/results"
+    CFG.JOURNAL_FILE = f"{work}/journal.jsonl"
+    CFG.HISTORY_FILE = f"{work}/history.jsonl"
+    CFG.TIMELINE_FILE = f"{work}/timeline.jsonl"
+    CFG.TRACE_FILE = f"{work}/trace.json"
+    CFG.STATUS_FILE = f"{work}/status.txt"
+    CFG.QUEUE_DIR = f"{work}/queue"
+    CFG.TOOL_BACKEND = "fake"
+    names = []
+    for des in DESIGN_NAMES:
+        for i in range(scale):
+            CFG.DESIGN_CFG[f"{des}_R{i}"] = CFG.DESIGN_CFG[des]
+            names.append(f"{des}_R{i}")
+    CFG.DESIGN_NAMES = names
+    # Same flow as auto_framework.py, with the fixed CFG.STAGE_SLOTS (reproducible)
+    AF.CLK_LIST = CLK_LIST
+    AF.PREC = PREC
+    AF.PREC_LIST = list(product(PREC, CLK_LIST))
+    AF.AUTOTUNE = False
+    AF.DISTRIBUTED = WORKERS > 0
+    AF.progress = Progress(CFG.STATUS_FILE, CFG.STATUS_INTERVAL)
+    os.environ["FAKE_TOOLS_SCALE"] = str(TIME_SCALE)
+    os.environ["FAKE_TOOLS_FAIL"] = str(FAIL_RATE)
+    return work
+
+
+# Tool stages of the timeline per phase of the flow, and the slots they run in
+PHASES = [["generic"], ["syn", "map"], ["vsim", "sed", "power"]]
+SLOTS = {"generic": "syn", "map": "syn"}
+TOOLS = [cat for phase in PHASES for cat in phase]
+
+
+def lower_bound(entries):
+    # Makespan with zero orchestration overhead: the phases run one after the other,
+    # and within a phase the busiest stage keeps all its slots busy
+    bound = 0
+    for phase in PHASES:
+        busy = {}
+        for e in entries:
+            if e["cat"] in phase:
+                slot = SLOTS.get(e["cat"], e["cat"])
+                busy[slot] = busy.get(slot, 0) + e["dur"]
+        slots = {s: n * max(WORKERS, 1) for s, n in CFG.STAGE_SLOTS.items()}
+        bound += max((t / slots[s] for s, t in busy.items()), default=0)
+    return bound
+
+
+def report_bytes():
+    total = 0
+    for path in glob.glob(f"{CFG.RESULT_DIR}/*/*/report_*.rpt"):
+        total += os.path.getsize(path)
+    return total
+
+
+def worker(scale):
+    # Local worker of the distributed run of (scale), until the benchmark stops it
+    setup(scale, fresh=False)
+    try:
+        asyncio.run(AF.worker())
+    except asyncio.CancelledError:
+        pass
+
+
+def run(scale):
+    work = setup(scale)
+    jobs = len(CFG.DESIGN_NAMES) * len(CLK_LIST) * (1 + len(PREC))
+    logger.warning(
+        f"Scale {scale}x: {len(CFG.DESIGN_NAMES)} designs, {jobs} jobs, {WORKERS} workers"
+    )
+    workers = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker", str(scale)])
+        for _ in range(WORKERS)
+    ]
+    wall, cpu = time.time(), time.process_time()
+    try:
+        asyncio.run(AF.main())
+    finally:
+        wall, cpu = time.time() - wall, time.process_time() - cpu
+        # SIGTERM cancels the jobs of a worker, there are none left
+        for p in workers:
+            p.terminate()
+        for p in workers:
+            p.wait()
+
+    entries = timeline.load(CFG.TIMELINE_FILE)
+    tools = [e for e in entries if e["cat"] in TOOLS]
+    parse = [e for e in entries if e["cat"] == "parse"]
+    parse_time = sum(e["dur"] for e in parse)
+    flow = wall - parse_time
+    bound = lower_bound(entries)
+    result = {
+        "scale": scale,
+        "workers": WORKERS,
+        "designs": len(CFG.DESIGN_NAMES),
+        "jobs": jobs,
+        "tool_runs": len(tools),
+        "failed_runs": sum(not e["ok"] for e in tools),
+        "makespan": round(flow, 2),
+        "lower_bound": round(bound, 2),
+        "efficiency": round(bound / flow, 3) if flow > 0 else None,
+        # Makespan lost to orchestration per job, and CPU time of this process per
+        # tool run (scheduling, journal, history, script generation)
+        "overhead_per_job_ms": round(1000 * (flow - bound) / jobs, 2),
+        "cpu_per_run_ms": round(1000 * (cpu - parse_time) / max(len(tools), 1), 2),
+        "reports_parsed": len(parse),
+        "parse_reports_per_s": round(len(parse) / parse_time, 1) if parse_time else None,
+        "parse_mb_per_s": round(report_bytes() / 1024 ** 2 / parse_time, 2)
+        if parse_time
+        else None,
+    }
+    with open(f"{work}/result.json", "w") as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    # Only warnings from the framework, the benchmark results are logged as warnings
+    for handler in logger.handlers:
+        handler.setLevel(logging.WARNING)
+    if sys.argv[1:2] == ["worker"]:
+        worker(int(sys.argv[2]))
+        sys.exit(0)
+    scales = [int(a) for a in sys.argv[1:]] or SCALES
+    results = [run(scale) for scale in scales]
+    with open(f"{BENCH_DIR}/benchmark.json", "w") as f:
+        json.dump(results, f, indent=2)
+    df = pd.DataFrame(results).set_index("scale")
+    logger.warning(f"Orchestration benchmark (fake tools, time scale {TIME_SCALE}):\n{df.T}")
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: L2 characterization flow for Auto Framework
+#           Synthesizes and power-simulates the L2 variants of
+#           the benchmarked designs (python auto_framework.py l2),
+#           extracts their area and power, and predicts the L4
+#           arrays from them with the compositional model
+#           (compose.py)
+# -----------------------------------------------------
+
+from imports import *
+import config as CFG
+import journal
+import supervisor
+import backend
+import compose
+
+logger = logging.getLogger("auto_L4")
+
+
+def l2_area_extract(file_in):
+    # Area of top_L2_mac, its L2_mac (mac) and L2_mult (L2)
+    area = {"top": [], "mac": [], "L2": []}
+    for line in file_in:
+        area["top"] += re.findall(rf"^{CFG.DESIGN_L2}\s+(?:\d+\s+){{3}}(\d+)", line)
+        area["mac"] += re.findall(r"^\s+mac\s+L2_mac\w*\s+(?:\d+\s+){3}(\d+)", line)
+        area["L2"] += re.findall(r"^\s+L2\s+L2_mult\w*\s+(?:\d+\s+){3}(\d+)", line)
+    return {k: sum(int(i) for i in v) for k, v in area.items()}
+
+
+def l2_power_extract(file_in):
+    # Power of top_L2_mac, its L2_mac (mac) and L2_mult (L2)
+    power = {"top": [], "mac": [], "L2": []}
+    for line in file_in:
+        power["top"] += re.findall(
+            rf"^{CFG.DESIGN_L2}\s+\d+\s+(?:\d+\.\d+\s+){{4}}(\d+\.\d+)", line
+        )
+        power["mac"] += re.findall(r"^\s+mac\s+\d+\s+(?:\d+\.\d+\s+){4}(\d+\.\d+)", line)
+        power["L2"] += re.findall(r"^\s+L2\s+\d+\s+(?:\d+\.\d+\s+){4}(\d+\.\d+)", line)
+    return {k: round(sum(float(i) for i in v), 4) for k, v in power.items()}
+
+
+def design_name(cfg):
+    # Name of a design configuration, e.g. BG_L2_L4_00_L3_10_L2_11_DVAFS_0
+    return (
+        f"{CFG.BG_NAMES[cfg['BG']]}_L4_{cfg['L4_MODE']}_L3_{cfg['L3_MODE']}"
+        f"_L2_{cfg['L2_MODE'][:2]}_DVAFS_{cfg['DVAFS']}"
+    )
+
+
+async def l2_synthesis(CLK, VAR, cpus=CFG.SYN_CPUS):
+    # Synthesis of the L2 variant (VAR) at (CLK)
+    MAPPING = CFG.clk_mapping(CLK)
+    EXPORT_PATH = f"{CFG.RESULT_DIR}/L2/{VAR}/{MAPPING}"
+    REPORT_FILE = f"{EXPORT_PATH}/report_syn.rpt"
+    WORK = f"{CFG.TMP_DIR}/L2/{VAR}/{MAPPING}"
+    os.makedirs(WORK, exist_ok=True)
+    os.makedirs(EXPORT_PATH, exist_ok=True)
+    OUTPUTS = [f"{EXPORT_PATH}/post.v", f"{EXPORT_PATH}/post.sdf", REPORT_FILE]
+    SYN_HASH = journal.inputs_hash(
+        [CFG.SYN_FILE_L2, f"{CFG.SDC_PATH}/{CFG.DESIGN_L2}_{CFG.SDC_MODE_L2}.sdc"]
+        + CFG.RTL_FILES_L2,
+        cfg=CFG.l2_cfg(VAR),
+        clk=list(CFG.clk_periods(CLK)),
+        headroom=CFG.HEADROOM,
+        lib=CFG.LIB_DB,
+    )
+    if CFG.is_cached("l2_syn", VAR, CLK, None, SYN_HASH, OUTPUTS):
+        logger.info(f"L2 variant ({VAR}/{CLK}) already exists! Skipping synthesis")
+        return journal.DONE
+    CFG.generate_L2_syn_setup_script(EXPORT_PATH, VAR, REPORT_FILE, CLK, cpus, WORK)
+    logger.info(f"STARTING SYNTHESIS OF L2 VARIANT: ({VAR}) AT CLOCK PERIODS: {MAPPING}")
+    journal.record(CFG.JOURNAL_FILE, "l2_syn", VAR, CLK, None, journal.STARTED, SYN_HASH)
+    status = await CFG.run_genus(
+        ["./syn_setup.tcl", CFG.SYN_FILE_L2], f"{VAR}/{CLK} syn", "syn.log", "syn", WORK
+    )
+    CFG.record_run("l2_syn", VAR, CLK, None, status, cpus=cpus)
+    STATE = journal.DONE if status.ok and os.path.exists(OUTPUTS[0]) else journal.FAILED
+    journal.record(CFG.JOURNAL_FILE, "l2_syn", VAR, CLK, None, STATE, SYN_HASH)
+    try:
+        os.makedirs(f"{EXPORT_PATH}/no_backup", exist_ok=True)
+        shutil.move(f"{WORK}/syn.log", f"{EXPORT_PATH}/no_backup/syn.log")
+    except Exception as e:
+        logger.warning(f"  {e}")
+    return STATE
+
+
+async def l2_power_simulation(prec_tuple, VAR):
+    # Power simulation of (PRECISION) of the L2 variant (VAR): questa (VCD) -> genus
+    # (power report). L2 VCD files are small, so there is no disk admission control
+    PRECISION, CLK = prec_tuple
+    PERIOD = CFG.prec_clk(CLK, PRECISION)
+    MAPPING = CFG.clk_mapping(CLK)
+    EXPORT_PATH = f"{CFG.RESULT_DIR}/L2/{VAR}/{MAPPING}"
+    WORK = f"{CFG.TMP_DIR}/L2/{VAR}/{MAPPING}"
+    os.makedirs(WORK, exist_ok=True)
+    REPORT_FILE = f"{EXPORT_PATH}/report_power_{PRECISION}.rpt"
+    VCD_FILE = f"dump_{PRECISION}_clk{PERIOD:3.2f}_{VAR}.vcd"
+    if CFG.synthesis_failed(VAR, CLK, "l2_syn"):
+        logger.warning(f"{VAR}/{CLK} - Synthesis failed, skipping {PRECISION}")
+        return journal.SKIPPED
+    JOB_HASH = journal.inputs_hash(
+        [
+            f"{EXPORT_PATH}/post.v",
+            f"{EXPORT_PATH}/post.sdf",
+            CFG.PB_FILE_L2,
+            CFG.SIM_PB_L2,
+            CFG.HELPER_FILE,
+        ]
+    )
+    JOB = (VAR, CLK, PRECISION)
+    if CFG.is_cached("l2_power", *JOB, JOB_HASH, [REPORT_FILE]):
+        logger.info(f"{VAR}/{CLK} - Report file already exists for {PRECISION}, skipping")
+        return journal.DONE
+    logger.info(f"{VAR}/{CLK} - PRECISION: {PRECISION}, CLOCK PERIOD: {PERIOD}")
+    journal.record(CFG.JOURNAL_FILE, "l2_power", *JOB, journal.STARTED, JOB_HASH)
+    CFG.generate_L2_PB_setup_script(EXPORT_PATH, VAR, PRECISION, PERIOD, WORK)
+    status = await supervisor.run(
+        backend.command(
+            "vsim", "-batch", "-do", f"PB_setup_{PRECISION}_{VAR}.tcl", "-do", CFG.SIM_PB_L2
+        ),
+        stage=f"{VAR}/{CLK} {PRECISION} vsim",
+        log=f"vsim_PB_{PRECISION}.log",
+        **CFG.tool_options("vsim", WORK),
+    )
+    CFG.record_run("l2_vsim", *JOB, status, cycles=CFG.L2_PB_CYCLES)
+    if status.ok:
+        # Same testbench scopes as the L4 powerbench, see generate_vcd()
+        status = await supervisor.run(
+            ["sed", "-e", "10,15d", "-i", VCD_FILE], stage="sed", **CFG.tool_options("sed", WORK)
+        )
+    if status.ok:
+        CFG.generate_power_setup_script(
+            export=EXPORT_PATH,
+            prec=PRECISION,
+            clk=PERIOD,
+            des=VAR,
+            report=REPORT_FILE,
+            work=WORK,
+            design=CFG.DESIGN_L2,
+        )
+        status = await CFG.run_genus(
+            [f"power_{PRECISION}_{VAR}.tcl"],
+            f"{VAR}/{CLK} {PRECISION} power",
+            f"genus_PB_{PRECISION}.log",
+            "power",
+            WORK,
+        )
+        CFG.record_run("l2_power", *JOB, status, cycles=CFG.L2_PB_CYCLES)
+    STATE = journal.DONE if status.ok and os.path.exists(REPORT_FILE) else journal.FAILED
+    journal.record(CFG.JOURNAL_FILE, "l2_power", *JOB, STATE, JOB_HASH)
+    try:
+        os.makedirs(f"{EXPORT_PATH}/no_backup", exist_ok=True)
+        for log in (f"vsim_PB_{PRECISION}.log", f"genus_PB_{PRECISION}.log"):
+            if os.path.exists(f"{WORK}/{log}"):
+                shutil.move(f"{WORK}/{log}", f"{EXPORT_PATH}/no_backup/{log}")
+        if os.path.exists(f"{WORK}/{VCD_FILE}"):
+            os.remove(f"{WORK}/{VCD_FILE}")
+    except Exception as e:
+        logger.warning(f"  {e}")
+    return STATE
+
+
+def get_l2_dataframes(mapping, variants, prec_list):
+    # Area (index: variant) and power (mW, index: (precision, variant)) of the
+    # characterized L2 variants. Variants without reports are left out
+    areas, powers = {}, {}
+    for var in variants:
+        EXPORT_PATH = f"{CFG.RESULT_DIR}/L2/{var}/{mapping}"
+        if not os.path.exists(f"{EXPORT_PATH}/report_syn.rpt"):
+            logger.warning(f"  {var}/{mapping}: No L2 synthesis report")
+            continue
+        with open(f"{EXPORT_PATH}/report_syn.rpt") as report:
+            areas[var] = l2_area_extract(report)
+        for prec in prec_list:
+            if not os.path.exists(f"{EXPORT_PATH}/report_power_{prec}.rpt"):
+                logger.warning(f"  {var}/{mapping} - {prec}: No L2 power report")
+                continue
+            with open(f"{EXPORT_PATH}/report_power_{prec}.rpt") as report:
+                powers[(CFG.PREC_DICT[prec], var)] = l2_power_extract(report)
+    area_df = pd.DataFrame.from_dict(areas, orient="index")
+    power_df = pd.DataFrame.from_dict(powers, orient="index") / 1e6
+    return area_df, power_df
+
+
+def reference_breakdown(clk, dvafs=False):
+    # Full-array area and power breakdowns at (clk): written by generate_breakdown_df,
+    # or shipped with the repository (results/breakdown/1.00). (None, None) if missing
+    names = [str(clk), f"{clk:3.2f}"] if CFG.is_uniform(clk) else [journal.clk_label(clk)]
+    for name in names:
+        BREAKDOWN_DIR = f"{CFG.RESULT_DIR}/breakdown/{name}/{'SWU' if dvafs else 'FU'}"
+        if os.path.exists(f"{BREAKDOWN_DIR}/area.csv") and os.path.exists(
+            f"{BREAKDOWN_DIR}/power.csv"
+        ):
+            return (
+                pd.read_csv(f"{BREAKDOWN_DIR}/area.csv", index_col=0),
+                pd.read_csv(f"{BREAKDOWN_DIR}/power.csv", index_col=[0, 1]),
+            )
+    return None, None
+
+
+def generate_compositional_df(clk, prec_list, dvafs=False):
+    # Compositional L4 model (see compose.py): predicts the area and power breakdown
+    # keys of every L4/L3 mode combination of the characterized L2 variants, with
+    # factors fitted on the full-array breakdowns at (clk), and validates it
+    # leave-one-out against them. Predictions of designs the reference designs don't
+    # determine (see compose.determined) are marked extrapolated
+    MAPPING = CFG.clk_mapping(clk)
+    CLK_DIR = clk if CFG.is_uniform(clk) else journal.clk_label(clk)
+    COMP_DIR = (
+        f"{CFG.RESULT_DIR}/breakdown/compositional/{CLK_DIR}/{'SWU' if dvafs else 'FU'}/"
+    )
+    ref_area, ref_power = reference_breakdown(clk, dvafs)
+    if ref_area is None:
+        logger.warning(f"No full-array breakdown at {MAPPING}, skipping the compositional model")
+        return
+    variants = [
+        v
+        for v in CFG.l2_variants(CFG.DESIGN_NAMES)
+        if CFG.l2_cfg(v)["DVAFS"] == str(int(dvafs))
+    ]
+    l2_area, l2_power = get_l2_dataframes(MAPPING, variants, prec_list)
+    if l2_area.empty:
+        logger.warning(f"No characterized L2 variants at {MAPPING}")
+        return
+    os.makedirs(COMP_DIR, exist_ok=True)
+    l2_area.to_csv(f"{COMP_DIR}/l2_area.csv")
+    l2_power.round(5).to_csv(f"{COMP_DIR}/l2_power.csv")
+
+    # Reference designs: full-array results of a characterized L2 variant
+    ref = [
+        d
+        for d in ref_area.index
+        if d in CFG.DESIGN_CFG and CFG.l2_variant(CFG.DESIGN_CFG[d]) in l2_area.index
+    ]
+    cfgs = [CFG.DESIGN_CFG[d] for d in ref]
+    ref_names = {design_name(cfg) for cfg in cfgs}
+    candidates = [
+        {**CFG.l2_cfg(v), "L4_MODE": l4, "L3_MODE": l3}
+        for v in l2_area.index
+        for l4, l3 in product(["00"] + compose.LEVEL_MODES, repeat=2)
+    ]
+    names = [design_name(cfg) for cfg in candidates]
+    area, power, validation, factors = {}, {}, [], {}
+    # Candidates with an extrapolated prediction of any key
+    extrapolated = np.zeros(len(candidates), dtype=bool)
+
+    def compose_key(key, base, target, candidate_base, prec=None):
+        coef, loo, pred, extra = compose.model(
+            cfgs, base, target, candidates, candidate_base
+        )
+        extrapolated[:] |= extra
+        label = key if prec is None else f"{prec} {key}"
+        if coef is not None:
+            factors[label] = coef
+        for des, ref_value, loo_value in zip(ref, target, loo):
+            validation.append(
+                {
+                    "prec": prec,
+                    "design": des,
+                    "key": key,
+                    "reference": ref_value,
+                    "predicted": loo_value,
+                }
+            )
+        error = compose.mape(target, loo)
+        logger.info(
+            f"  Compositional {label}: "
+            + (
+                f"{100 * error:.1f}% leave-one-out error"
+                if error is not None
+                else "not enough designs"
+            )
+        )
+        return pred
+
+    def l2_values(df, cfgs, prec=None):
+        # L2_mult value of the L2 units of the L4 arrays of (cfgs)
+        rows = [CFG.l2_variant(cfg) for cfg in cfgs]
+        if prec is not None:
+            rows = [(prec, r) for r in rows]
+        return CFG.L2_PER_L4 * df.loc[rows, "L2"].values
+
+    base, candidate_base = l2_values(l2_area, cfgs), l2_values(l2_area, candidates)
+    for key in CFG.COMPOSE_AREA_KEYS:
+        area[key] = compose_key(key, base, ref_area.loc[ref, key].values, candidate_base)
+    for prec in prec_list:
+        label = CFG.PREC_DICT[prec]
+        rows = [(label, d) for d in ref]
+        missing = [r for r in rows if r not in ref_power.index] + [
+            (label, v) for v in l2_area.index if (label, v) not in l2_power.index
+        ]
+        if missing:
+            logger.warning(f"  {label}: No power of {len(missing)} designs, skipping")
+            continue
+        base = l2_values(l2_power, cfgs, label)
+        candidate_base = l2_values(l2_power, candidates, label)
+        for key in CFG.COMPOSE_POWER_KEYS:
+            pred = compose_key(key, base, ref_power.loc[rows, key].values, candidate_base, label)
+            for name, value in zip(names, pred):
+                power.setdefault((label, name), {})[key] = value
+
+    extrapolated = dict(zip(names, extrapolated))
+    if any(extrapolated.values()):
+        logger.warning(
+            f"  Compositional model: {sum(extrapolated.values())} of {len(names)} designs are "
+            "extrapolated (modes without a determined factor in the reference designs)"
+        )
+    area_df = pd.DataFrame(area, index=names)
+    area_df["reference"] = area_df.index.isin(ref_names)
+    area_df["extrapolated"] = [extrapolated[d] for d in area_df.index]
+    area_df.round(0).to_csv(f"{COMP_DIR}/area.csv")
+    power_df = pd.DataFrame.from_dict(power, orient="index")
+    if not power_df.empty:
+        power_df["reference"] = [d in ref_names for _, d in power_df.index]
+        power_df["extrapolated"] = [extrapolated[d] for _, d in power_df.index]
+    power_df.round(5).to_csv(f"{COMP_DIR}/power.csv")
+    validation_df = pd.DataFrame(validation)
+    if not validation_df.empty:
+        validation_df["error"] = (
+            validation_df["predicted"] - validation_df["reference"]
+        ) / validation_df["reference"]
+        # Area keys are fitted once, power keys per precision
+        is_area = validation_df["prec"].isna()
+        validation_df[is_area].drop(columns="prec").round(5).to_csv(
+            f"{COMP_DIR}/validation_area.csv", index=False
+        )
+        validation_df[~is_area].round(5).to_csv(f"{COMP_DIR}/validation_power.csv", index=False)
+    # Factors the reference designs don't determine are empty
+    pd.DataFrame(factors).T.round(4).to_csv(f"{COMP_DIR}/factors.csv")
+    logger.info(
+        f"Compositional model of {len(names)} designs ({len(ref)} references) saved to {COMP_DIR}"
+    )
+    return area_df, power_df
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Compositional L4 model for Auto Framework
+#           Predicts an area or power value of an L4 array from
+#           the same value of its L2 unit (times the number of
+#           L2 units), scaled by multiplicative factors of the
+#           bit-group unrolling and of the L3 and L4 sharing
+#           modes. The factors are fitted on full-array results
+# -----------------------------------------------------
+
+from imports import *
+
+logger = logging.getLogger("auto_L4")
+
+# Sharing modes of the L3 and L4 levels with their own factor. Input sharing (00) is
+# the baseline of both levels
+LEVEL_MODES = ["10", "11"]
+
+
+def features(cfg):
+    # Indicator variables of a design configuration (see DESIGN_CFG)
+    row = {f"BG_{cfg['BG']}": 1.0}
+    for level in ("L3", "L4"):
+        for mode in LEVEL_MODES:
+            row[f"{level}_{mode}"] = float(cfg[f"{level}_MODE"] == mode)
+    return row
+
+
+def design_matrix(cfgs, columns=None):
+    # Indicators missing from (columns) (e.g. an unseen BG) are left out, see determined()
+    X = pd.DataFrame([features(cfg) for cfg in cfgs]).fillna(0)
+    if columns is not None:
+        X = X.reindex(columns=columns, fill_value=0)
+    return X
+
+
+def fit(cfgs, base, target):
+    # Least-squares fit of log(target / base) over the designs (cfgs). Returns the
+    # log factors per indicator variable
+    X = design_matrix(cfgs)
+    coef, *_ = np.linalg.lstsq(X.values, np.log(target / base), rcond=None)
+    return pd.Series(coef, index=X.columns)
+
+
+def predict(coef, cfgs, base):
+    X = design_matrix(cfgs, coef.index)
+    return np.exp(X.values @ coef.values) * base
+
+
+def in_row_space(X, C, tol=1e-6):
+    # Rows of (C) which are linear combinations of the rows of (X)
+    residual = C - C @ np.linalg.pinv(X) @ X
+    return np.abs(residual).max(axis=1) < tol
+
+
+def determined(fitted, cfgs):
+    # Designs (cfgs) whose prediction the fit on the designs (fitted) determines: their
+    # indicators are a linear combination of those of the fitted designs. Indicators
+    # no fitted design has, or which only appear together with others (collinear, e.g.
+    # every BG_11 design has L4_10), are left to the minimum-norm solution of the fit,
+    # and their predictions are extrapolated
+    X, C = design_matrix(fitted), design_matrix(cfgs)
+    columns = X.columns.union(C.columns)
+    X = X.reindex(columns=columns, fill_value=0).values
+    C = C.reindex(columns=columns, fill_value=0).values
+    return in_row_space(X, C)
+
+
+def model(cfgs, base, target, candidates, candidate_base):
+    # Fit the factors on the reference designs (cfgs), with their composed L2 values
+    # (base) and full-array values (target). Returns the factors (NaN if the fit does
+    # not determine them), the leave-one-out prediction of every reference design
+    # (validation, NaN if the other designs don't determine it), the predictions of
+    # the (candidates) and which of them are extrapolated (see determined()). Designs
+    # without a positive base or target are not fitted
+    base, target = np.asarray(base, float), np.asarray(target, float)
+    ok = (base > 0) & (target > 0)
+    index = np.flatnonzero(ok)
+    if len(index) < 2:
+        return (
+            None,
+            np.full(len(cfgs), np.nan),
+            np.full(len(candidates), np.nan),
+            np.ones(len(candidates), dtype=bool),
+        )
+    fitted = [cfgs[i] for i in index]
+    coef = fit(fitted, base[index], target[index])
+    loo = np.full(len(cfgs), np.nan)
+    for i in index:
+        rest = index[index != i]
+        if not determined([cfgs[j] for j in rest], [cfgs[i]])[0]:
+            continue
+        c = fit([cfgs[j] for j in rest], base[rest], target[rest])
+        loo[i] = predict(c, [cfgs[i]], base[i : i + 1])[0]
+    # A factor is determined if the prediction of its indicator alone is
+    X = design_matrix(fitted).values
+    factors = np.exp(coef).where(in_row_space(X, np.eye(len(coef))))
+    pred = predict(coef, candidates, np.asarray(candidate_base, float))
+    return factors, loo, pred, ~determined(fitted, candidates)
+
+
+def mape(reference, predicted):
+    # Mean absolute relative error of the finite predictions
+    reference, predicted = np.asarray(reference, float), np.asarray(predicted, float)
+    ok = np.isfinite(predicted) & (reference != 0)
+    if not ok.any():
+        return None
+    return float(np.mean(np.abs(predicted[ok] - reference[ok]) / np.abs(reference[ok])))
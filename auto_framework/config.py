@@ -24,6 +24,15 @@
 
 from imports import *
 from design_cfg import DESIGN_CFG
+from convergence import run_until_converged, weighted_mean_ci
+import journal
+import supervisor
+import history
+import timeline
+import backend
+import sessions
+import netlist
+import powertree
 
 logger = logging.getLogger("auto_L4")
 
@@ -47,6 +56,84 @@ HEADROOM = 4
 RST = 1
 # REP is the number of clock cycles used in the power simulation per iteration
 REP = 4096
+# Multi-fidelity mode: a short screening pass with SCREEN_REP cycles is run for all
+# designs, and the full REP pass is only run for designs within SCREEN_MARGIN of the
+# (area, power) Pareto front of each precision. SCREEN_REP has to be a power of 2
+SCREEN_REP = 512
+SCREEN_MARGIN = 0.10
+# Adaptive simulation length: REP becomes an upper bound of ADAPTIVE_MAX_REP cycles, and
+# the powerbench is stopped once the mean toggle activity per ADAPTIVE_WINDOW cycles has
+# converged, i.e. its 95% confidence interval is below ADAPTIVE_TOL (relative) after
+# at least ADAPTIVE_MIN_WINDOWS windows
+ADAPTIVE_WINDOW = 64
+ADAPTIVE_TOL = 0.02
+ADAPTIVE_MIN_WINDOWS = 8
+ADAPTIVE_MAX_REP = 16384
+# SEED is the random seed of the powerbench. Sharded power simulations split the REP
+# cycles over several shorter runs with seeds (SEED, SEED+1, ...), which run concurrently
+# and are merged into a cycle-weighted mean with a 95% confidence interval
+SEED = 10
+# Mixed precision mode simulates all precisions (and the switches between them) in one
+# powerbench run, and windows the power extraction per phase. The powerbench prints the
+# phase boundaries in ns, read_vcd expects them in VCD time units (vsim -t ps)
+READ_VCD_TIME_SCALE = 1000
+# Per-stage limits of the supervised tools: wall-time (timeout, in s) and virtual memory
+# (mem, in GB). A job exceeding its limits is killed and frees its pool slot
+STAGE_LIMITS = {
+    "syn": {"timeout": 8 * 3600, "mem": 64},
+    "vsim": {"timeout": 6 * 3600, "mem": 16},
+    "power": {"timeout": 2 * 3600, "mem": 32},
+    "sed": {"timeout": 30 * 60, "mem": None},
+}
+# Per-stage log patterns (regex), matched while the tool writes its log. A "fatal"
+# match kills the job immediately, an "error" match fails it once it exits. Failed
+# jobs are not passed on to the next stage (e.g. no power simulation after a failed
+# synthesis, no power extraction after a failed vsim run)
+LICENSE_ERRORS = r"[Ll]icense checkout failed|Unable to checkout .*license|No .*license available"
+LOG_PATTERNS = {
+    "syn": {"fatal": [LICENSE_ERRORS], "error": [r"^Error\s*:"]},
+    "vsim": {
+        "fatal": [
+            LICENSE_ERRORS,
+            r"\*\* Fatal",
+            # Elaboration errors (e.g. missing design units or ports)
+            r"\*\* Error.*\(vsim-3\d{3}\)",
+            # Missing or unreadable SDF file
+            r"\*\* Error.*\(vsim-SDF-\d+\)",
+            r"\*\* Error: Assertion error",
+        ],
+        "error": [r"Errors: [1-9][0-9]*"],
+    },
+    "power": {"fatal": [LICENSE_ERRORS], "error": [r"^Error\s*:"]},
+    "sed": {"fatal": [], "error": []},
+}
+# Maximum number of concurrent tool runs per stage. All tools are launched from one
+# asyncio event loop, each synthesis runs with max_cpus_per_server 8 (syn_L4_mac.tcl)
+STAGE_SLOTS = {"syn": 4, "vsim": 16, "power": 8, "sed": 8}
+# Disk admission control: a power simulation only starts once its estimated VCD size
+# fits in the free space of TMP_DIR minus DISK_MARGIN, and (if set) in DISK_BUDGET bytes
+# used under TMP_DIR. VCD sizes are learned from the run history, and estimated with
+# VCD_BYTES_PER_NETLIST_BYTE (per cycle, per byte of post.v) until then
+DISK_BUDGET = None
+DISK_MARGIN = 10 * 1024 ** 3
+VCD_BYTES_PER_NETLIST_BYTE = 0.05
+# Number of genus threads per synthesis (max_cpus_per_server in syn_L4_mac.tcl)
+SYN_CPUS = 8
+# Autotuner (AUTOTUNE in auto_framework.py): STAGE_SLOTS and SYN_CPUS are chosen from the
+# detected cores and memory, within CORE_BUDGET cores and MEM_BUDGET GB (None: all that
+# is available) and LICENSE_BUDGET licenses per tool. The speedup of genus over
+# SYN_CPU_OPTIONS threads and the memory of each stage are learned from the run history
+# (HISTORY_FILE). SYN_SERIAL_FRACTION and STAGE_MEM (GB) are used until then, and
+# STAGE_SLOTS and SYN_CPUS until the history has any synthesis. To learn the speedup,
+# every SYN_EXPLORE_EVERY-th synthesis runs with fewer threads while the history only
+# has runs of one thread count
+CORE_BUDGET = None
+MEM_BUDGET = None
+LICENSE_BUDGET = {"genus": 8, "vsim": 24}
+SYN_CPU_OPTIONS = [1, 2, 4, 8, 16]
+SYN_SERIAL_FRACTION = 0.5
+SYN_EXPLORE_EVERY = 8
+STAGE_MEM = {"syn": 8, "vsim": 2, "power": 4}
 
 if not DVAFS:
     # FU Designs
@@ -91,6 +178,11 @@ else:
                     "BG_L2_L4_11_L3_10_L2_00_DVAFS_1", "BG_L2_L4_11_L3_10_L2_11_DVAFS_1",
                     "BG_L2_L4_11_L3_11_L2_00_DVAFS_1", "BG_L2_L4_11_L3_11_L2_11_DVAFS_1"]
 
+# Zero-delay tier: power simulations without SDF back-annotation (fidelity "zd") are much
+# faster, but miss glitch power. Per-component correction factors are learned on the
+# CALIBRATION_DESIGNS, which are simulated in both tiers
+CALIBRATION_DESIGNS = DESIGN_NAMES[::9]
+
 # Directories
 # MAIN_DIR is the parent directory of this repository. Assuming we're running this
 # script from `auto_framework` directory, then MAIN_DIR is up one directory
@@ -113,8 +205,140 @@ RESULT_DIR = f"{MAIN_DIR}/results"
 # Some pointers to useful files
 HELPER_FILE = f"{RTL_DIR}/helper.sv"
 SYN_FILE_L4 = f"{RTL_DIR}/syn_L4_mac.tcl"
+# Staged synthesis (STAGED_SYNTHESIS in auto_framework.py): syn_generic once per design,
+# then mapping per clock period from its database
+SYN_GENERIC_L4 = f"{RTL_DIR}/syn_L4_generic.tcl"
+SYN_MAP_L4 = f"{RTL_DIR}/syn_L4_map.tcl"
 PB_FILE_L4 = f"{RTL_DIR}/pb_L4_mac.sv"
 SIM_PB_L4 = f"{RTL_DIR}/sim_pb_L4_mac.tcl"
+# RTL files read by SYN_FILE_L4 (inputs of the synthesis jobs)
+RTL_FILES_L4 = [
+    f"{RTL_DIR}/{f}.sv"
+    for f in [
+        "helper",
+        "macro_utils",
+        "counter",
+        "mult_2b",
+        "L1_mult",
+        "L2_mult",
+        "L3_mult",
+        "L4_mult",
+        "L4_mac",
+        "top_L4_mac",
+    ]
+]
+# L2 characterization (python auto_framework.py l2): the L2 variants (L2_MODE, BG,
+# DVAFS) of DESIGN_NAMES are synthesized as top_L2_mac and power-simulated with its
+# fixed-length powerbench (L2_PB_CYCLES), with all precisions constrained like
+# L4_prec_only. Results go to RESULT_DIR/L2/<variant>/<mapping>
+DESIGN_L2 = "top_L2_mac"
+SYN_FILE_L2 = f"{RTL_DIR}/syn_L2_mac.tcl"
+PB_FILE_L2 = f"{RTL_DIR}/pb_L2_mac.sv"
+SIM_PB_L2 = f"{RTL_DIR}/sim_pb_L2_mac.tcl"
+SDC_MODE_L2 = "prec_only"
+L2_PB_CYCLES = 2 * 256
+RTL_FILES_L2 = [
+    f"{RTL_DIR}/{f}.sv"
+    for f in [
+        "helper",
+        "macro_utils",
+        "counter",
+        "mult_2b",
+        "L1_mult",
+        "L2_mult",
+        "L2_mac",
+        "top_L2_mac",
+    ]
+]
+# Compositional model (see compose.py): the L4 array holds L2_PER_L4 L2 units (4x4 L3
+# units of 4x4 L2 units). The COMPOSE_AREA_KEYS of area.csv and COMPOSE_POWER_KEYS of
+# power.csv are predicted from the L2_mult area and power of the L2 variant, and
+# validated against the full-array breakdowns in RESULT_DIR/breakdown
+L2_PER_L4 = 256
+COMPOSE_AREA_KEYS = ["top", "mult"]
+COMPOSE_POWER_KEYS = ["top", "L4"]
+# Design name prefix per BG (bit-groups unrolled in L2, in L3 or bit-serial)
+BG_NAMES = {"00": "BG_L2", "01": "BG_L3", "11": "BG_BS"}
+# Hierarchical synthesis (HIERARCHICAL in auto_framework.py): the L2_mult block of every
+# L2 variant is synthesized once per clock mapping (SYN_BLOCK_L2), with BLOCK_BUDGET of
+# the clock periods for its paths (constraints/L2_mult_block.sdc), and its mapped netlist
+# is kept in RESULT_DIR/blocks/<variant>/<mapping>. SYN_HIER_L4 links it into every design
+# with that L2 variant, and only synthesizes the L3/L4 levels around it
+SYN_BLOCK_L2 = f"{RTL_DIR}/syn_L2_block.tcl"
+SYN_HIER_L4 = f"{RTL_DIR}/syn_L4_hier.tcl"
+SDC_MODE_BLOCK = "L2_mult_block"
+BLOCK_NAME = "L2_mult_block"
+BLOCK_BUDGET = 0.5
+RTL_FILES_BLOCK = [
+    f"{RTL_DIR}/{f}.sv" for f in ["helper", "macro_utils", "mult_2b", "L1_mult", "L2_mult"]
+]
+# The HIER_QOR_DESIGNS are also synthesized flat (to <mapping>/flat), and the area, worst
+# slack and synthesis time of both flows are compared in breakdown/hierarchical/qor.csv
+HIER_QOR_DESIGNS = DESIGN_NAMES[::9]
+# Cell statistics (CELL_STATS in auto_framework.py, see netlist.py): the cells of every
+# post.v are counted per module and per instance path, down to CELL_DEPTH levels below
+# top_L4_mac. Cell areas and kinds come from the liberty file LIB_DB (cells it doesn't
+# have are classified by name, without area)
+CELL_DEPTH = 3
+# The journal records the state of every job with a hash of its inputs. It is kept
+# outside TMP_DIR, so interrupted runs can resume (see RESUME in auto_framework.py)
+JOURNAL_FILE = f"{LOCAL_DIR}/journal.jsonl"
+# Duration, threads and peak memory of every tool run, across benchmark runs
+HISTORY_FILE = f"{LOCAL_DIR}/history.jsonl"
+# Timeline of every tool run, cache hit/miss and report parse (JSON lines, one run id
+# per benchmark run), and its Chrome trace export of the last run (chrome://tracing)
+TIMELINE_FILE = f"{LOCAL_DIR}/timeline.jsonl"
+TRACE_FILE = f"{LOCAL_DIR}/trace.json"
+# Live progress of the run (finished/running jobs per phase, throughput and ETA),
+# rewritten every STATUS_INTERVAL s and logged every PROGRESS_LOG_INTERVAL s (None:
+# never). With a DEADLINE (e.g. time.mktime((2021, 6, 1, 8, 0, 0, 0, 0, -1)), the end
+# of the license window) the status tells if the run is expected to finish in time
+STATUS_FILE = f"{LOCAL_DIR}/status.txt"
+STATUS_INTERVAL = 30
+PROGRESS_LOG_INTERVAL = 1800
+DEADLINE = None
+# Tool backend (see backend.py): "eda" runs Genus and QuestaSim, "fake" runs the
+# stand-ins of fake_tools.py, e.g. to test the framework without licenses
+TOOL_BACKEND = os.environ.get("AUTO_TOOL_BACKEND", "eda")
+# Distributed mode (DISTRIBUTED in auto_framework.py): jobs are published to QUEUE_DIR,
+# and run by workers on any host (python auto_framework.py worker). QUEUE_DIR,
+# RESULT_DIR and the journal, history and timeline files have to be on a filesystem
+# shared by all hosts, TMP_DIR is local to each host. Workers exit after
+# WORKER_IDLE_TIMEOUT s without jobs (None: never)
+QUEUE_DIR = f"{LOCAL_DIR}/queue"
+WORKER_IDLE_TIMEOUT = None
+# Persistent genus sessions (SESSIONS in auto_framework.py, see sessions.py): jobs of
+# the SESSION_STAGES run in long-lived genus processes, which run their
+# SESSION_SETUP once (the power scripts then skip loading the library, syn_L4_mac.tcl
+# sets it itself). A session is replaced after SESSION_MAX_JOBS jobs
+SESSION_STAGES = ["syn", "power"]
+SESSION_SETUP = {
+    "syn": "",
+    "power": f"set_attribute library {LIB_DB}\n",
+}
+SESSION_MAX_JOBS = 50
+# Fmax search (FMAX in auto_framework.py): per design, FMAX_POINTS syntheses run in
+# parallel per round, at clock periods (ns) within [FMAX_MIN, FMAX_MAX] and the bounds
+# found so far, until the minimum period which meets timing is known within FMAX_TOL
+# (or after FMAX_ROUNDS rounds)
+FMAX_MIN = 0.20
+FMAX_MAX = 10.00
+FMAX_POINTS = 3
+FMAX_TOL = 0.05
+FMAX_ROUNDS = 6
+# Worst negative slack in the TIMING - SUMMARY section of the synthesis report: the
+# first pattern which matches (with the ns per unit of its value), the worst value of
+# all timing modes is kept. Adjust to the report format of your Genus version
+SLACK_PATTERNS = [
+    (r"WNS\s*\(ns\)\s*[:=|]?\s*(-?\d+(?:\.\d+)?)", 1),
+    (r"WNS\s*\(ps\)\s*[:=|]?\s*(-?\d+(?:\.\d+)?)", 1e-3),
+    (r"[Ss]lack\s*:?=?\s*(-?\d+(?:\.\d+)?)\s*ps", 1e-3),
+    (r"WNS\s*[:=|]?\s*(-?\d+(?:\.\d+)?)", 1e-3),
+]
+# Operations (multiplications and additions) per clock cycle per precision, of FU
+# and SWU (DVAFS) designs
+OPS_PER_CYCLE = {"0000": 512, "0010": 1024, "0011": 2048, "1010": 2048, "1111": 8192}
+OPS_PER_CYCLE_SWU = {"0000": 512, "1010": 1024, "1111": 2048}
 
 
 
@@ -150,12 +374,103 @@ KEYS_AREA = [
     "comb",
 ]
 PREC_DICT = {"0000": "8x8", "0010": "8x4", "0011": "8x2", "1010": "4x4", "1111": "2x2"}
+# Clock of every precision in a clock mapping (CLK_8B, CLK_4B, CLK_2B), as constrained
+# per mode in L4_prec_only.sdc (the weight-only modes run at CLK_8B)
+PREC_CLOCK = {"0000": 0, "0010": 0, "0011": 0, "1010": 1, "1111": 2}
+# Power reports can be produced at different fidelities, from high to low. "full"
+# reports keep their original name (report_power_{prec}.rpt), all others are suffixed
+# with the fidelity. "zd" are zero-delay simulations (see CALIBRATION_DESIGNS)
+FIDELITIES = ["full", "zd", "screen"]
+# Power keys which are derived from the extracted ones by subtraction
+DERIVED_POWER_KEYS = ["L4_tree", "L3_tree", "L2_tree", "accum"]
+# Power trees (POWER_TREE in auto_framework.py, see powertree.py): every power report is
+# parsed once into the power of all its instances, kept next to the report in
+# power_tree_{prec}.npz. The breakdown rolls them up to POWER_TREE_DEPTH levels below
+# top_L4_mac, and sums the POWER_TREE_GROUPS (instances matching a regex of their path
+# relative to top_L4_mac, with their children). New groups don't need a new parse
+POWER_TREE_DEPTH = 3
+POWER_TREE_GROUPS = {
+    "L4": r"^L4/L4_mult$",
+    "L3": r"(^|/)L3_mult_gen\[\d+\]\.L3$",
+    "L2": r"(^|/)L2_mult_gen\[\d+\]\.L2$",
+    "mult_2x2": r"(^|/)mult_2b_gen\[\d+\]\.mult$",
+    "count": r"(^|/)count_\w+$",
+    "out_reg": r"^L4/\w*_reg\[\d*\]$",
+    "in_reg": r"^\w_reg_reg(\[\d+\]){5}$",
+}
 
 ############# Function Definitions ##################
 
+############# CLOCK MAPPINGS
+# A clock (CLK) is either one clock period for all precisions, or a per-precision
+# clock mapping (CLK_8B, CLK_4B, CLK_2B) in 'ns'
+def clk_periods(CLK):
+    # (CLK_8B, CLK_4B, CLK_2B) of (CLK). Mappings are lists once stored as JSON
+    if isinstance(CLK, (list, tuple)):
+        return tuple(float(c) for c in CLK)
+    return (CLK, CLK, CLK)
+
+
+def clk_mapping(CLK):
+    # Name of the results directory of (CLK): clk:CLK_8B-CLK_4B-CLK_2B
+    return "clk:" + "-".join(f"{c:3.2f}" for c in clk_periods(CLK))
+
+
+def is_uniform(CLK):
+    return len(set(clk_periods(CLK))) == 1
+
+
+def prec_clk(CLK, prec):
+    # Clock period at which (prec) runs in the clock mapping (CLK)
+    return clk_periods(CLK)[PREC_CLOCK[prec]]
+
+
+def clock_sweep(clk_8_list, clk_4_list, clk_2_list):
+    # Clock mappings of all combinations of the per-precision clock periods. Lower
+    # precisions have shorter critical paths, so only mappings with
+    # CLK_2B <= CLK_4B <= CLK_8B are kept. Uniform mappings are plain clock periods
+    mappings = []
+    for clk in product(clk_8_list, clk_4_list, clk_2_list):
+        if not clk[2] <= clk[1] <= clk[0]:
+            continue
+        clk = clk[0] if len(set(clk)) == 1 else clk
+        if clk not in mappings:
+            mappings.append(clk)
+    return mappings
+
+
 ############# SYNTHESIS
-def generate_syn_setup_script(export, des, report, clk_8, clk_4, clk_2):
-    with open("syn_setup.tcl", "w") as syn_fp:
+def generate_syn_setup_script(
+    export,
+    des,
+    report,
+    clk_8,
+    clk_4,
+    clk_2,
+    cpus=SYN_CPUS,
+    work=".",
+    generic_db=None,
+    block=None,
+):
+    # The generic stage of a staged synthesis has no clock periods (its report is the
+    # provisional area), both stages of a staged synthesis pass the generic database
+    # (generic_db). Hierarchical
+    # syntheses pass the netlist of their L2_mult block (block)
+    clocks = ""
+    if clk_8 is not None:
+        clocks = f"""
+set CLK_8B       {clk_8:3.2f}
+set CLK_4B       {clk_4:3.2f}
+set CLK_2B       {clk_2:3.2f}
+"""
+    paths = ""
+    if report is not None:
+        paths += f"set REPORT_FILE  {report}\n"
+    if generic_db is not None:
+        paths += f"set GENERIC_DB   {generic_db}\n"
+    if block is not None:
+        paths += f"set BLOCK_NETLIST {block}\nset BLOCK_NAME   {BLOCK_NAME}\n"
+    with open(f"{work}/syn_setup.tcl", "w") as syn_fp:
         syn_fp.write(
             f"""########### INFO ###########
 set AUTO         yes
@@ -170,24 +485,34 @@ set L3_MODE      {DESIGN_CFG[des]["L3_MODE"]}
 set L2_MODE      {DESIGN_CFG[des]["L2_MODE"]}
 set BG           {DESIGN_CFG[des]["BG"]}
 set DVAFS        {DESIGN_CFG[des]["DVAFS"]}
-
-set CLK_8B       {clk_8:3.2f}
-set CLK_4B       {clk_4:3.2f}
-set CLK_2B       {clk_2:3.2f}
+{clocks}
+set MAX_CPUS     {cpus}
 
 set LIB_DB       {LIB_DB}
 
 set SDC_PATH     {SDC_PATH}
 set EXPORT_PATH  {export}
-set REPORT_FILE  {report}
-set RTL_PATH     {RTL_DIR}
+{paths}set RTL_PATH     {RTL_DIR}
 
 """
         )
 
 
-def generate_PB_setup_script(export, des, prec, clk, rst=RST, rep=REP):
-    with open(f"PB_setup_{prec}_{des}.tcl", "w") as power_sim_fp:
+def generate_PB_setup_script(
+    export,
+    des,
+    prec,
+    clk,
+    rst=RST,
+    rep=REP,
+    window=0,
+    seed=SEED,
+    tag="",
+    mixed=None,
+    sdf=True,
+    work=".",
+):
+    with open(f"{work}/PB_setup_{prec}_{des}{tag}.tcl", "w") as power_sim_fp:
         power_sim_fp.write(
             f"""########### INFO ###########
 set AUTO         yes
@@ -209,9 +534,16 @@ set L3_MODE      {DESIGN_CFG[des]["L3_MODE"]}
 set L2_MODE      {DESIGN_CFG[des]["L2_MODE"]}
 set BG           {DESIGN_CFG[des]["BG"]}
 set DVAFS        {DESIGN_CFG[des]["DVAFS"]}
-set VCD_FILE     dump_{prec}_clk{clk:3.2f}_{des}.vcd
+set VCD_FILE     dump_{prec}_clk{clk:3.2f}_{des}{tag}.vcd
 set RST          {rst}
 set REP          {rep}
+set WINDOW       {window}
+set STOP_FILE    stop_{prec}_{des}{tag}
+set SEED         {seed}
+set MIXED        {1 if mixed else 0}
+set N_PRCSN      {len(mixed) if mixed else 1}
+set PRCSN_SEQ    {"".join(mixed or [prec]).rjust(20, "0")}
+set SDF          {1 if sdf else 0}
 
 set LIB_DB       {LIB_DB}
 
@@ -221,12 +553,21 @@ set SDC_PATH     {SDC_PATH}
         )
 
 
-def generate_power_setup_script(export, prec, clk, des, report):
-    with open(f"power_{prec}_{des}.tcl", "w") as power_fp:
+def library_script():
+    # Persistent power sessions loaded the library when they started
+    if sessions.enabled("power"):
+        return "# Library loaded by the genus session"
+    return f"set_attribute library {LIB_DB}"
+
+
+def generate_power_setup_script(
+    export, prec, clk, des, report, tag="", work=".", design=DESIGN
+):
+    with open(f"{work}/power_{prec}_{des}{tag}.tcl", "w") as power_fp:
         power_fp.write(
             f"""################# LIBRARY #################
 
-set_attribute library {LIB_DB}
+{library_script()}
 
 ################# DESIGN ##################
 
@@ -234,11 +575,11 @@ set_attribute lp_power_analysis_effort high
 
 read_hdl -library work {export}/post.v
 
-elaborate {DESIGN}
+elaborate {design}
 
 ############### ANALYZE VCD ###############
 
-read_vcd -static dump_{prec}_clk{clk:3.2f}_{des}.vcd
+read_vcd -static dump_{prec}_clk{clk:3.2f}_{des}{tag}.vcd
 
 ############### REPORT POWER ##############
 
@@ -255,6 +596,119 @@ delete_obj /designs/*
         )
 
 
+def generate_mixed_power_setup_script(export, clk, des, vcd, windows, work="."):
+    # One genus session extracts the power of every window (report, label, start, end)
+    # of a mixed precision VCD file
+    with open(f"{work}/power_mixed_{des}.tcl", "w") as power_fp:
+        power_fp.write(
+            f"""################# LIBRARY #################
+
+{library_script()}
+
+################# DESIGN ##################
+
+set_attribute lp_power_analysis_effort high
+
+read_hdl -library work {export}/post.v
+
+elaborate {DESIGN}
+
+"""
+        )
+        for report, label, start, end in windows:
+            START = round(start * READ_VCD_TIME_SCALE)
+            END = round(end * READ_VCD_TIME_SCALE)
+            power_fp.write(
+                f"""############### {label} ###############
+
+read_vcd -static -start_time {START} -end_time {END} {vcd}
+
+echo "\\n############### POWER - {label} SUMMARY\\nSimulated at {clk:3.2f} clock period ({start}-{end} ns).\\n" > {report}
+report power -verbose >> {report}
+
+echo "\\n############### POWER - {label} DETAILS\\nSimulated at {clk:3.2f} clock period ({start}-{end} ns).\\n" >> {report}
+report power -flat -sort dynamic >> {report}
+
+"""
+            )
+        power_fp.write(
+            """# Clean-up
+delete_obj /designs/*
+
+"""
+        )
+
+
+def generate_L2_syn_setup_script(
+    export, var, report, clk, cpus=SYN_CPUS, work=".", design=DESIGN_L2, sdc_mode=SDC_MODE_L2
+):
+    # Setup of syn_L2_mac.tcl for the L2 variant (var) at the clock mapping (clk), or of
+    # syn_L2_block.tcl (design=BLOCK_NAME, see block_synthesis)
+    cfg = l2_cfg(var)
+    clk_8, clk_4, clk_2 = clk_periods(clk)
+    block = ""
+    if design == BLOCK_NAME:
+        block = f"set BLOCK_NAME   {BLOCK_NAME}\nset BUDGET       {BLOCK_BUDGET}\n"
+    with open(f"{work}/syn_setup.tcl", "w") as syn_fp:
+        syn_fp.write(
+            f"""########### INFO ###########
+set AUTO         yes
+
+set DESIGN_NAME  {var}
+set SDC_MODE     {sdc_mode}
+set DESIGN       {design}
+{block}
+set HEADROOM     {HEADROOM}
+set MODE         {cfg["L2_MODE"]}
+set BG           {cfg["BG"]}
+set DVAFS        {cfg["DVAFS"]}
+
+set CLK_8B       {clk_8:3.2f}
+set CLK_4B       {clk_4:3.2f}
+set CLK_2B       {clk_2:3.2f}
+
+set MAX_CPUS     {cpus}
+
+set LIB_DB       {LIB_DB}
+
+set SDC_PATH     {SDC_PATH}
+set EXPORT_PATH  {export}
+set REPORT_FILE  {report}
+set RTL_PATH     {RTL_DIR}
+
+"""
+        )
+
+
+def generate_L2_PB_setup_script(export, var, prec, clk, work="."):
+    # Setup of sim_pb_L2_mac.tcl for (prec) of the L2 variant (var) at period (clk)
+    cfg = l2_cfg(var)
+    with open(f"{work}/PB_setup_{prec}_{var}.tcl", "w") as power_sim_fp:
+        power_sim_fp.write(
+            f"""########### INFO ###########
+set AUTO         yes
+
+set EXPORT_PATH  {export}
+set LIB_V        {LIB_V}
+
+set V_FILE       {export}/post.v
+set SDF_FILE     {export}/post.sdf
+set PB_FILE      {PB_FILE_L2}
+set HELPER       {HELPER_FILE}
+
+set TEST         0
+set PRECISION    {prec}
+set CLK_PERIOD   {clk:3.2f}
+set HEADROOM     {HEADROOM}
+set MODE         {cfg["L2_MODE"]}
+set BG           {cfg["BG"]}
+set DVAFS        {cfg["DVAFS"]}
+set VCD_FILE     dump_{prec}_clk{clk:3.2f}_{var}.vcd
+
+"""
+        )
+
+
 ############# Data Extration
 def area_extract(dict_in, file_in, design):
     for line in file_in:
@@ -274,6 +728,19 @@ def area_extract(dict_in, file_in, design):
         dict_in[design]["out_reg"] += re.findall(r"^sequential\s+\d+\s+(\d+)", line)
 
 
+def slack_extract(file_in):
+    # Worst negative slack (ns) of a synthesis report, None if it has no timing summary
+    text = file_in.read()
+    section = re.search(r"TIMING - SUMMARY(.*?)(?:###############|$)", text, re.S)
+    if not section:
+        return None
+    for pattern, unit in SLACK_PATTERNS:
+        values = re.findall(pattern, section.group(1))
+        if values:
+            return round(min(float(v) for v in values) * unit, 4)
+    return None
+
+
 def power_extract(dict_in, file_in, prec, design):
     for line in file_in:
         dict_in[prec][design]["top"] += re.findall(
@@ -309,198 +776,1299 @@ def power_extract(dict_in, file_in, prec, design):
         )
 
 
-def get_extracted_dataframes(mapping, prec_list):
+def fidelity_tag(fidelity):
+    # Full fidelity files keep their original names
+    return "" if fidelity == "full" else f"_{fidelity}"
+
+
+def write_sim_info(export, prec, fidelity="full", **info):
+    # Store how a power report was produced next to the report itself
+    with open(f"{export}/sim_info_{prec}{fidelity_tag(fidelity)}.json", "w") as f:
+        json.dump({"fidelity": fidelity, **info}, f)
+
+
+def read_sim_info(export, prec, fidelity="full"):
+    try:
+        with open(f"{export}/sim_info_{prec}{fidelity_tag(fidelity)}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Reports from older runs have no info file, assume default settings
+        return {"fidelity": fidelity, "rst": RST, "rep": REP, "cycles": RST * REP}
+
+
+def write_syn_info(export, **info):
+    # Store how a synthesis was produced next to its report: (flow) is "full", "staged"
+    # (mapping of a generic database, whose syn_generic ran without the SDC) or "hier"
+    with open(f"{export}/syn_info.json", "w") as f:
+        json.dump(info, f)
+
+
+def read_syn_info(export):
+    try:
+        with open(f"{export}/syn_info.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Syntheses of older runs have no info file
+        return {"flow": "unknown"}
+
+
+def find_power_fidelity(export, prec):
+    # Return the highest fidelity for which a power report is available
+    for fidelity in FIDELITIES:
+        if power_reports(export, prec, fidelity):
+            return fidelity
+    return "full"
+
+
+def derive_power_keys(power, factors=None):
+    # Sum up the extracted values, and derive the tree and accumulator powers
+    # Zero-delay powers are first corrected by their glitch (factors) per key
+    for k in KEYS_POWER:
+        power[k] = round(sum(float(i) for i in power[k]), 4)
+        if factors is not None and k not in DERIVED_POWER_KEYS:
+            power[k] = round(power[k] * factors.get(k, 1), 4)
+    power["accum"] = power["top"] - power["in_reg"] - power["L4"] - power["out_reg"]
+    power["accum"] = round(power["accum"], 4)
+    power["L4_tree"] = power["L4"] - power["L3"]
+    power["L3_tree"] = power["L3"] - power["L2"]
+    power["L2_tree"] = power["L2"] - power["mult_2x2"] - power["pipe_reg"]
+    power["L4_tree"] = round(power["L4_tree"], 4)
+    power["L3_tree"] = round(power["L3_tree"], 4)
+    power["L2_tree"] = round(power["L2_tree"], 4)
+    return power
+
+
+def shard_weights(reports, shards):
+    # Weight each shard report by its number of simulated cycles
+    weights = []
+    for report_file in reports:
+        c = re.search(r"_s(\d+)\.rpt$", report_file)
+        k = int(c.group(1)) if c else 0
+        weights.append(shards[k]["cycles"] if k < len(shards) and shards[k] else 1)
+    return weights
+
+
+def extract_power(export, prec, fidelity="full", factors=None):
+    # Power breakdown of one design/precision. Sharded simulations are merged into
+    # their cycle-weighted mean, with the 95% confidence interval in ({key}_ci95)
+    reports = power_reports(export, prec, fidelity)
+    if not reports:
+        raise FileNotFoundError(f"No power report for {prec} in {export}")
+    shards = read_sim_info(export, prec, fidelity).get("shards") or []
+    samples = []
+    for report_file in reports:
+        sample = {k: [] for k in KEYS_POWER}
+        with open(report_file) as report:
+            power_extract(
+                dict_in={prec: {"sample": sample}},
+                file_in=report,
+                prec=prec,
+                design="sample",
+            )
+        samples.append(derive_power_keys(sample, factors))
+    weights = shard_weights(reports, shards)
+    if len(samples) == 1:
+        return samples[0]
+    power = {}
+    for k in KEYS_POWER:
+        mean, ci = weighted_mean_ci([s[k] for s in samples], weights)
+        power[k] = round(mean, 4)
+        power[f"{k}_ci95"] = round(ci, 4)
+    return power
+
+
+def sum_areas(area):
+    # Sum up the area lists of a design (see area_extract), and derive the in_reg,
+    # others, seq and comb areas
+    for k in KEYS_AREA:
+        area[k] = sum(int(i) for i in area[k])
+    area["in_reg"] = area["top"] - area["mac"]
+    area["others"] = area["mac"] - area["mult_2x2"] - area["out_reg"]
+    area["seq"] = area["in_reg"] + area["out_reg"]
+    area["comb"] = area["top"] - area["seq"]
+    return area
+
+
+def get_extracted_dataframes(mapping, prec_list, designs=None):
+    # Area, power and power info of (designs) (default: DESIGN_NAMES) at (mapping)
+    designs = DESIGN_NAMES if designs is None else designs
     # Initialize Areas and Powers Dictionaries - to be able to append to their lists later!
     precisions = [PREC_DICT[prec] for prec in prec_list]
-    areas = {d: {k: [] for k in KEYS_AREA} for d in DESIGN_NAMES}
-    powers = {
-        p: {d: {k: [] for k in KEYS_POWER} for d in DESIGN_NAMES} for p in precisions
-    }
+    areas = {d: {k: [] for k in KEYS_AREA} for d in designs}
+    powers = {p: {} for p in precisions}
+    # Keep track of how each power report was produced (fidelity, cycles, ...) and of
+    # the synthesis flow of each design, which affects both its area and power
+    infos = {}
+    flows = {}
+    # Glitch correction factors of zero-delay power reports (if calibrated)
+    factors = load_glitch_factors(mapping)
     # Extract Area and Power from Report
-    for d in DESIGN_NAMES:
-        with open(f"{RESULT_DIR}/{d}/{mapping}/report_syn.rpt") as report:
-            area_extract(dict_in=areas, file_in=report, design=d)
+    for d in designs:
+        EXPORT_PATH = f"{RESULT_DIR}/{d}/{mapping}"
+        with timeline.span("parse", f"{d} area", design=d, mapping=mapping):
+            with open(f"{EXPORT_PATH}/report_syn.rpt") as report:
+                area_extract(dict_in=areas, file_in=report, design=d)
+        flows[d] = read_syn_info(EXPORT_PATH)["flow"]
         for prec in prec_list:
-            with open(f"{RESULT_DIR}/{d}/{mapping}/report_power_{prec}.rpt") as report:
-                power_extract(
-                    dict_in=powers, file_in=report, prec=PREC_DICT[prec], design=d
+            fidelity = find_power_fidelity(EXPORT_PATH, prec)
+            p_factors = None
+            if fidelity == "zd" and factors is not None:
+                p_factors = factors.loc[PREC_DICT[prec], "factor"].to_dict()
+            with timeline.span("parse", f"{d} {prec}", design=d, mapping=mapping):
+                powers[PREC_DICT[prec]][d] = extract_power(
+                    EXPORT_PATH, prec, fidelity, p_factors
                 )
+            info = read_sim_info(EXPORT_PATH, prec, fidelity)
+            info["corrected"] = p_factors is not None
+            info["flow"] = flows[d]
+            if "shards" in info:
+                info["seeds"] = " ".join(str(s["seed"]) for s in info["shards"] if s)
+                info["shards"] = len(info["shards"])
+            infos[(PREC_DICT[prec], d)] = info
 
     # Change area values to int, and sum up needed lists
-    for d in DESIGN_NAMES:
-        for k in KEYS_AREA:
-            areas[d][k] = sum(int(i) for i in areas[d][k])
-        areas[d]["in_reg"] = areas[d]["top"] - areas[d]["mac"]
-        areas[d]["others"] = (
-            areas[d]["mac"] - areas[d]["mult_2x2"] - areas[d]["out_reg"]
-        )
-        areas[d]["seq"] = areas[d]["in_reg"] + areas[d]["out_reg"]
-        areas[d]["comb"] = areas[d]["top"] - areas[d]["seq"]
-
-    # Change power values to float, and sum up needed lists
-    for p in precisions:
-        for d in DESIGN_NAMES:
-            for k in KEYS_POWER:
-                powers[p][d][k] = round(sum(float(i) for i in powers[p][d][k]), 4)
-            powers[p][d]["accum"] = (
-                powers[p][d]["top"]
-                - powers[p][d]["in_reg"]
-                - powers[p][d]["L4"]
-                - powers[p][d]["out_reg"]
-            )
-            powers[p][d]["accum"] = round(powers[p][d]["accum"], 4)
-            powers[p][d]["L4_tree"] = powers[p][d]["L4"] - powers[p][d]["L3"]
-            powers[p][d]["L3_tree"] = powers[p][d]["L3"] - powers[p][d]["L2"]
-            powers[p][d]["L2_tree"] = (
-                powers[p][d]["L2"] - powers[p][d]["mult_2x2"] - powers[p][d]["pipe_reg"]
-            )
-            powers[p][d]["L4_tree"] = round(powers[p][d]["L4_tree"], 4)
-            powers[p][d]["L3_tree"] = round(powers[p][d]["L3_tree"], 4)
-            powers[p][d]["L2_tree"] = round(powers[p][d]["L2_tree"], 4)
+    for d in designs:
+        sum_areas(areas[d])
 
     # Convert to Pandas Dataframes
+    # Sharded simulations add uncertainty columns ({key}_ci95) after the KEYS_POWER columns
     power_df = (
         pd.DataFrame.from_dict(
-            {(p, d): powers[p][d] for p in precisions for d in DESIGN_NAMES},
+            {(p, d): powers[p][d] for p in precisions for d in designs},
             orient="index",
         )
         .sort_index(level=0, ascending=False)
-        .reindex(DESIGN_NAMES, level=1)
+        .reindex(designs, level=1)
         / 1e6
     )
-    area_df = pd.DataFrame.from_dict(areas, orient="index").reindex(DESIGN_NAMES)
-    return area_df, power_df
+    CI_KEYS = [f"{k}_ci95" for k in KEYS_POWER if f"{k}_ci95" in power_df.columns]
+    power_df = power_df[KEYS_POWER + CI_KEYS]
+    area_df = pd.DataFrame.from_dict(areas, orient="index").reindex(designs)
+    area_df["flow"] = pd.Series(flows)
+    info_df = (
+        pd.DataFrame.from_dict(infos, orient="index")
+        .sort_index(level=0, ascending=False)
+        .reindex(designs, level=1)
+    )
+    return area_df, power_df, info_df
+
+
+def phase_extract(file_in):
+    # Return the (precision, start, end) phases printed by a mixed precision powerbench
+    phases, starts = [], {}
+    for line in file_in:
+        c = re.search(r"PHASE (START|END) (\d{4}) (\d+\.?\d*)", line)
+        if c and c.group(1) == "START":
+            starts[c.group(2)] = float(c.group(3))
+        elif c:
+            phases.append((c.group(2), starts.pop(c.group(2)), float(c.group(3))))
+    return phases
+
+
+def get_energy_dataframe(clk, power_df, prec_list, dvafs=False):
+    # Clock period, power (mW), energy per operation (fJ) and throughput (GOPS) of
+    # every precision and design of (power_df), at the period of the precision in
+    # the clock mapping (clk)
+    ops = OPS_PER_CYCLE_SWU if dvafs else OPS_PER_CYCLE
+    rows = {}
+    for prec in prec_list:
+        period = prec_clk(clk, prec)
+        for d in DESIGN_NAMES:
+            power = power_df.loc[(PREC_DICT[prec], d), "top"]
+            rows[(PREC_DICT[prec], d)] = {
+                "period": period,
+                "freq_mhz": round(1e3 / period, 1),
+                "power": round(power, 5),
+                # mW * ns = pJ
+                "energy_per_op": round(power * period * 1e3 / ops[prec], 4),
+                "gops": round(ops[prec] / period, 1),
+            }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def get_switch_dataframe(mapping, prec_list):
+    # Power and energy of the switch phases of mixed precision power simulations
+    # Power is in mW (like power.csv), so energy is in pJ
+    switches = {}
+    for d in DESIGN_NAMES:
+        EXPORT_PATH = f"{RESULT_DIR}/{d}/{mapping}"
+        for a, b in zip(prec_list[:-1], prec_list[1:]):
+            if not power_reports(EXPORT_PATH, f"switch_{a}_{b}"):
+                continue
+            power = extract_power(EXPORT_PATH, f"switch_{a}_{b}")["top"] / 1e6
+            duration = read_sim_info(EXPORT_PATH, f"switch_{a}_{b}")["duration"]
+            switches[(f"{PREC_DICT[a]}->{PREC_DICT[b]}", d)] = {
+                "duration": duration,
+                "top": round(power, 5),
+                "energy": round(power * duration, 5),
+            }
+    return pd.DataFrame.from_dict(switches, orient="index")
+
+
+def load_glitch_factors(mapping):
+    try:
+        return pd.read_csv(
+            f"{RESULT_DIR}/calibration/{mapping}/glitch_factors.csv", index_col=[0, 1]
+        )
+    except OSError:
+        return None
+
+
+def glitch_calibration(clk, prec_list, designs=CALIBRATION_DESIGNS):
+    # Learn per-precision, per-component glitch correction factors (SDF / zero-delay)
+    # from designs which were simulated in both tiers. The error columns are
+    # leave-one-out errors: each design is predicted with the factor of the other ones
+    MAPPING = clk_mapping(clk)
+    CALIBRATION_DIR = f"{RESULT_DIR}/calibration/{MAPPING}"
+    os.makedirs(CALIBRATION_DIR, exist_ok=True)
+    KEYS = [k for k in KEYS_POWER if k not in DERIVED_POWER_KEYS]
+    factors = {}
+    for prec in prec_list:
+        sdf, zd = [], []
+        for d in designs:
+            EXPORT_PATH = f"{RESULT_DIR}/{d}/{MAPPING}"
+            if power_reports(EXPORT_PATH, prec) and power_reports(EXPORT_PATH, prec, "zd"):
+                sdf.append(extract_power(EXPORT_PATH, prec))
+                zd.append(extract_power(EXPORT_PATH, prec, "zd"))
+        for k in KEYS:
+            pairs = [(s[k], z[k]) for s, z in zip(sdf, zd) if z[k] > 0]
+            if not pairs:
+                factors[(PREC_DICT[prec], k)] = {"factor": 1.0, "std": None, "n": 0}
+                continue
+            ratios = np.array([s / z for s, z in pairs])
+            # Ratio of sums weighs designs by their power, which keeps small keys stable
+            total_s, total_z = sum(s for s, _ in pairs), sum(z for _, z in pairs)
+            factor = total_s / total_z
+            errors = np.array(
+                [
+                    abs((total_s - s) / (total_z - z) * z - s) / s
+                    for s, z in pairs
+                    if s > 0 and total_z > z
+                ]
+            )
+            factors[(PREC_DICT[prec], k)] = {
+                "factor": round(factor, 4),
+                "std": round(ratios.std(ddof=1), 4) if len(ratios) > 1 else None,
+                "n": len(pairs),
+                "mape": round(errors.mean(), 4) if len(errors) else None,
+                "max_error": round(errors.max(), 4) if len(errors) else None,
+            }
+    factor_df = pd.DataFrame.from_dict(factors, orient="index")
+    factor_df.to_csv(f"{CALIBRATION_DIR}/glitch_factors.csv")
+    logger.info(f"Glitch correction factors for {MAPPING} saved to {CALIBRATION_DIR}")
+    top = factor_df.xs("top", level=1)
+    for p, row in top.iterrows():
+        logger.info(
+            f"  {p}: top factor {row['factor']} ({int(row['n'])} designs, mean error {row.get('mape')})"
+        )
+    return factor_df
+
+
+def longest_first(jobs, stages, key, cycles=None):
+    # Order (jobs) by their duration over (stages) predicted from the run history,
+    # longest first, so the slowest jobs don't start last and leave a long tail.
+    # key(*job) returns the (design, clock, precision) of a job. Jobs without any
+    # history go first, in their original order
+    groups = [history.group(history.load(HISTORY_FILE, stage)) for stage in stages]
+    jobs = list(jobs)
+    predictions = []
+    for job in jobs:
+        des, clk, prec = key(*job)
+        durations = [
+            history.predict(g, des, clk, prec, DESIGN_CFG, cycles) for g in groups
+        ]
+        predictions.append(float("inf") if None in durations else sum(durations))
+    order = sorted(range(len(jobs)), key=lambda i: -predictions[i])
+    known = [p for p in predictions if p != float("inf")]
+    if known:
+        logger.info(
+            f"Ordered {len(jobs)} {'+'.join(stages)} jobs longest first ({len(known)} predicted, {timedelta(seconds=round(sum(known)))} in total)"
+        )
+    return [jobs[i] for i in order]
+
+
+def pareto_contenders(clk, prec_list, margin=SCREEN_MARGIN):
+    # Return the power simulation jobs of all designs which lie within (margin) of the
+    # (area, power) Pareto front of each precision. A design is dropped only if
+    # another design beats both its area and power by more than (margin)
+    # Designs without a synthesis or screening report (e.g. a failed screening job)
+    # can't be ranked, they stay contenders
+    MAPPING = clk_mapping(clk)
+    screened, unscreened = [], []
+    for d in DESIGN_NAMES:
+        EXPORT_PATH = f"{RESULT_DIR}/{d}/{MAPPING}"
+        reports = [
+            power_reports(EXPORT_PATH, prec, find_power_fidelity(EXPORT_PATH, prec))
+            for prec in prec_list
+        ]
+        if os.path.exists(f"{EXPORT_PATH}/report_syn.rpt") and all(reports):
+            screened.append(d)
+        else:
+            unscreened.append(d)
+    if unscreened:
+        logger.warning(
+            f"{MAPPING} - No screening reports for {len(unscreened)} designs, keeping them: {' '.join(unscreened)}"
+        )
+    contenders = [((prec, clk), d) for prec in prec_list for d in unscreened]
+    if not screened:
+        return contenders
+    area_df, power_df, _ = get_extracted_dataframes(MAPPING, prec_list, screened)
+    area = area_df["top"]
+    for prec in prec_list:
+        power = power_df.loc[PREC_DICT[prec], "top"]
+        for d in screened:
+            better_area = area * (1 + margin) <= area[d]
+            better_power = power * (1 + margin) <= power[d]
+            strictly = (area * (1 + margin) < area[d]) | (power * (1 + margin) < power[d])
+            if not (better_area & better_power & strictly).any():
+                contenders.append(((prec, clk), d))
+    logger.info(
+        f"{MAPPING} - {len(contenders)}/{len(prec_list) * len(DESIGN_NAMES)} jobs within {margin:.0%} of the Pareto front"
+    )
+    return contenders
 
 
 ############# High Level Operations
-def populate_tmp_dir(CLK_LIST):
-    if os.path.exists(TMP_DIR):
+def populate_tmp_dir(CLK_LIST, resume=False):
+    # When resuming, intermediate results of finished stages (e.g. VCD files) are kept
+    if os.path.exists(TMP_DIR) and not resume:
         try:
             shutil.rmtree(TMP_DIR)
         except PermissionError as e:
             logger.warning("Could not delete TMP directory. Error Message: ")
             logger.warning(f"  {e}")
     try:
-        os.makedirs(TMP_DIR)
+        os.makedirs(TMP_DIR, exist_ok=resume)
     except:
         logger.warning("Could not create TMP directory!")
     for DES in DESIGN_NAMES:
         for CLK in CLK_LIST:
-            MAPPING = f"clk:{CLK:3.2f}-{CLK:3.2f}-{CLK:3.2f}"
+            MAPPING = clk_mapping(CLK)
             try:
-                os.makedirs(f"{TMP_DIR}/{DES}/{MAPPING}")
+                os.makedirs(f"{TMP_DIR}/{DES}/{MAPPING}", exist_ok=resume)
             except:
                 logger.warning(f"Could not create {DES} subdirectory in TMP")
 
 
-def synthesis(CLK, DES):
+def tool_options(stage, work):
+    # Options of a supervised tool run of (stage) in the (work) directory: limits, log
+    # patterns and concurrency slot (see STAGE_LIMITS, LOG_PATTERNS and STAGE_SLOTS)
+    return dict(cwd=work, slot=stage, **STAGE_LIMITS[stage], **LOG_PATTERNS[stage])
+
+
+async def run_genus(scripts, stage, log, slot, work):
+    # Run the genus (scripts) of a (slot) stage job in (work): in a persistent session
+    # of the stage if enabled, else in a new genus -batch process
+    if sessions.enabled(slot):
+        return await sessions.run(slot, scripts, stage=stage, log=log, **tool_options(slot, work))
+    args = [arg for script in scripts for arg in ("-f", script)]
+    return await supervisor.run(
+        backend.command("genus", "-legacy_ui", "-batch", *args),
+        stage=stage,
+        log=log,
+        **tool_options(slot, work),
+    )
+
+
+def record_run(stage, DES, CLK, prec, status, **extra):
+    # Record a supervised tool run in the run history (across benchmark runs) and in
+    # the timeline of this run
+    history.record(HISTORY_FILE, stage, DES, CLK, prec, status, **extra)
+    timeline.job(stage, DES, CLK, prec, status, **extra)
+
+
+def is_cached(stage, DES, CLK, prec, digest, outputs, legacy=True):
+    # journal.is_complete(), counted as a cache hit or miss in the timeline
+    hit = journal.is_complete(JOURNAL_FILE, stage, DES, CLK, prec, digest, outputs, legacy)
+    timeline.cache(stage, DES, CLK, prec, hit)
+    return hit
+
+
+def generic_db(DES):
+    # Generic database of a staged synthesis, kept with the results so that workers on
+    # other hosts (see workqueue.py) can map it
+    return f"{RESULT_DIR}/{DES}/generic/generic.db"
+
+
+async def generic_synthesis(DES, cpus=SYN_CPUS):
+    # First stage of a staged synthesis: read, elaborate and syn_generic once per
+    # design, for all clock periods (see SYN_GENERIC_L4). Also the area screening, from
+    # the area report of the generic netlist (see generate_area_screen_df)
+    EXPORT_PATH = f"{RESULT_DIR}/{DES}/generic"
+    WORK = f"{TMP_DIR}/{DES}/generic"
+    os.makedirs(WORK, exist_ok=True)
+    DB = generic_db(DES)
+    REPORT_FILE = f"{EXPORT_PATH}/report_generic.rpt"
+    GEN_HASH = journal.inputs_hash(
+        [SYN_GENERIC_L4] + RTL_FILES_L4,
+        cfg=DESIGN_CFG[DES],
+        headroom=HEADROOM,
+        lib=LIB_DB,
+    )
+    if is_cached("generic", DES, None, None, GEN_HASH, [DB, REPORT_FILE], legacy=False):
+        logger.info(f"Design ({DES}) generic database already exists! Skipping")
+        return journal.DONE
+    os.makedirs(EXPORT_PATH, exist_ok=True)
+    generate_syn_setup_script(
+        export=EXPORT_PATH,
+        des=DES,
+        report=REPORT_FILE,
+        clk_8=None,
+        clk_4=None,
+        clk_2=None,
+        cpus=cpus,
+        work=WORK,
+        generic_db=DB,
+    )
+    logger.info(f"\nSTARTING GENERIC SYNTHESIS OF DESIGN: ({DES})")
+    os.makedirs(f"{EXPORT_PATH}/no_backup", exist_ok=True)
+    journal.record(JOURNAL_FILE, "generic", DES, None, None, journal.STARTED, GEN_HASH)
+    status = await run_genus(
+        ["./syn_setup.tcl", SYN_GENERIC_L4], f"{DES} generic", "syn_generic.log", "syn", WORK
+    )
+    record_run("generic", DES, None, None, status, cpus=cpus)
+    STATE = journal.DONE if status.ok and os.path.exists(DB) else journal.FAILED
+    journal.record(JOURNAL_FILE, "generic", DES, None, None, STATE, GEN_HASH)
+    try:
+        shutil.move(f"{WORK}/syn_generic.log", f"{EXPORT_PATH}/no_backup/syn_generic.log")
+    except Exception as e:
+        logger.warning(f"  {e}")
+    logger.info(f"\nFINISHED GENERIC SYNTHESIS OF DESIGN: ({DES})")
+    return STATE
+
+
+def block_netlist(VAR, CLK):
+    # Mapped netlist of the L2_mult block of the L2 variant (VAR) at (CLK)
+    return f"{RESULT_DIR}/blocks/{VAR}/{clk_mapping(CLK)}/block.v"
+
+
+# Blocks being synthesized by this process, see block_synthesis()
+_block_jobs = {}
+
+
+async def block_synthesis(CLK, VAR, cpus=SYN_CPUS):
+    # Synthesis of the L2_mult block of the L2 variant (VAR) at (CLK), shared by all
+    # hierarchical syntheses of designs with this variant. Concurrent requests of the
+    # same block (e.g. from fmax searches) wait for the first one
+    key = (VAR, history.clk_key(CLK))
+    if key not in _block_jobs:
+        _block_jobs[key] = asyncio.ensure_future(_block_synthesis(CLK, VAR, cpus))
+        _block_jobs[key].add_done_callback(lambda _: _block_jobs.pop(key, None))
+    return await asyncio.shield(_block_jobs[key])
+
+
+async def _block_synthesis(CLK, VAR, cpus):
+    EXPORT_PATH = os.path.dirname(block_netlist(VAR, CLK))
+    REPORT_FILE = f"{EXPORT_PATH}/report_syn.rpt"
+    WORK = f"{TMP_DIR}/blocks/{VAR}/{clk_mapping(CLK)}"
+    os.makedirs(WORK, exist_ok=True)
+    os.makedirs(EXPORT_PATH, exist_ok=True)
+    OUTPUTS = [block_netlist(VAR, CLK), REPORT_FILE]
+    BLOCK_HASH = journal.inputs_hash(
+        [SYN_BLOCK_L2, f"{SDC_PATH}/{SDC_MODE_BLOCK}.sdc"] + RTL_FILES_BLOCK,
+        cfg=l2_cfg(VAR),
+        clk=list(clk_periods(CLK)),
+        budget=BLOCK_BUDGET,
+        lib=LIB_DB,
+    )
+    if is_cached("block", VAR, CLK, None, BLOCK_HASH, OUTPUTS):
+        logger.info(f"Block ({VAR}/{CLK}) already exists! Skipping synthesis")
+        return journal.DONE
+    generate_L2_syn_setup_script(
+        EXPORT_PATH, VAR, REPORT_FILE, CLK, cpus, WORK, BLOCK_NAME, SDC_MODE_BLOCK
+    )
+    logger.info(f"STARTING SYNTHESIS OF L2 BLOCK: ({VAR}) AT CLOCK PERIODS: {clk_mapping(CLK)}")
+    journal.record(JOURNAL_FILE, "block", VAR, CLK, None, journal.STARTED, BLOCK_HASH)
+    status = await run_genus(
+        ["./syn_setup.tcl", SYN_BLOCK_L2], f"{VAR}/{CLK} block", "syn.log", "syn", WORK
+    )
+    record_run("block", VAR, CLK, None, status, cpus=cpus)
+    STATE = journal.DONE if status.ok and os.path.exists(OUTPUTS[0]) else journal.FAILED
+    journal.record(JOURNAL_FILE, "block", VAR, CLK, None, STATE, BLOCK_HASH)
+    try:
+        os.makedirs(f"{EXPORT_PATH}/no_backup", exist_ok=True)
+        shutil.move(f"{WORK}/syn.log", f"{EXPORT_PATH}/no_backup/syn.log")
+    except Exception as e:
+        logger.warning(f"  {e}")
+    return STATE
+
+
+async def synthesis(CLK, DES, cpus=SYN_CPUS, staged=False, hier=False, reference=False):
+    # Full synthesis of (DES) at (CLK), or only the mapping from the generic database
+    # of generic_synthesis() if (staged), or only the L3/L4 levels around the L2_mult
+    # block of block_synthesis() if (hier). A (reference) synthesis is the flat
+    # synthesis of a hierarchical run, exported to <mapping>/flat (see HIER_QOR_DESIGNS)
+    # Like all jobs, returns its journal state (journal.SKIPPED if a job it depends on
+    # failed), see Progress.track
     # Additional Parameters
-    MAPPING = f"clk:{CLK:3.2f}-{CLK:3.2f}-{CLK:3.2f}"
+    MAPPING = clk_mapping(CLK)
     EXPORT_PATH = f"{RESULT_DIR}/{DES}/{MAPPING}"
+    STAGE = "syn"
+    FLOW = "hier" if hier else "staged" if staged else "full"
+    if reference:
+        EXPORT_PATH, STAGE = f"{EXPORT_PATH}/flat", "flat_syn"
     REPORT_FILE = f"{EXPORT_PATH}/report_syn.rpt"
+    WORK = f"{TMP_DIR}/{DES}/{MAPPING}"
+    if reference:
+        WORK = f"{WORK}/flat"
+    # Workers (see workqueue.py) only create the work directories of their own jobs
+    os.makedirs(WORK, exist_ok=True)
+
+    OUTPUTS = [f"{EXPORT_PATH}/post.v", f"{EXPORT_PATH}/post.sdf", REPORT_FILE]
+    SDC = f"{SDC_PATH}/{DESIGN_CFG[DES]['SDC_MODE']}.sdc"
+    BLOCK = None
+    if hier:
+        BLOCK = block_netlist(l2_variant(DESIGN_CFG[DES]), CLK)
+        if not os.path.exists(BLOCK):
+            # Clock periods without a block yet (e.g. of an fmax search)
+            await block_synthesis(CLK, l2_variant(DESIGN_CFG[DES]), cpus)
+        SCRIPTS = ["./syn_setup.tcl", SYN_HIER_L4]
+        INPUTS = [SYN_HIER_L4, SDC, BLOCK] + RTL_FILES_L4
+    elif staged:
+        # The generic database stands for the RTL files
+        SCRIPTS = ["./syn_setup.tcl", SYN_MAP_L4]
+        INPUTS = [SYN_MAP_L4, SDC, generic_db(DES)]
+    else:
+        SCRIPTS = ["./syn_setup.tcl", SYN_FILE_L4]
+        INPUTS = [SYN_FILE_L4, SDC] + RTL_FILES_L4
+    SYN_HASH = journal.inputs_hash(
+        INPUTS,
+        cfg=DESIGN_CFG[DES],
+        clk=list(clk_periods(CLK)),
+        headroom=HEADROOM,
+        lib=LIB_DB,
+    )
 
-    os.chdir(f"{TMP_DIR}/{DES}/{MAPPING}")
     # Create synthesis setup script (tcl)
     generate_syn_setup_script(
-        export=EXPORT_PATH, des=DES, report=REPORT_FILE, clk_8=CLK, clk_4=CLK, clk_2=CLK
+        export=EXPORT_PATH,
+        des=DES,
+        report=REPORT_FILE,
+        clk_8=clk_periods(CLK)[0],
+        clk_4=clk_periods(CLK)[1],
+        clk_2=clk_periods(CLK)[2],
+        cpus=cpus,
+        work=WORK,
+        generic_db=generic_db(DES) if staged and not hier else None,
+        block=BLOCK,
     )
     # BOOKMARK: Run genus with the synthesis script
     # If already synthesized and exported .v and .sdf file, don't synthesize again!
-    if not os.path.exists(f"{EXPORT_PATH}/post.v"):
+    # (unless the journal shows the synthesis was interrupted or its inputs changed)
+    cached = is_cached(STAGE, DES, CLK, None, SYN_HASH, OUTPUTS)
+    if not cached and hier and not os.path.exists(BLOCK):
+        # Failed block synthesis: the dependent power simulations are skipped
+        logger.warning(f"  {DES}/{CLK} syn: no L2_mult block, skipping synthesis")
+        journal.record(JOURNAL_FILE, STAGE, DES, CLK, None, journal.FAILED, SYN_HASH)
+        return journal.SKIPPED
+    if not cached and staged and not hier and not os.path.exists(generic_db(DES)):
+        # Failed generic stage: the dependent power simulations are skipped
+        logger.warning(f"  {DES}/{CLK} syn: no generic database, skipping mapping")
+        journal.record(JOURNAL_FILE, STAGE, DES, CLK, None, journal.FAILED, SYN_HASH)
+        return journal.SKIPPED
+    if not cached:
         logger.info(
             f"\nSTARTING SYNTHESIS OF DESIGN: ({DES}) AT CLOCK PERIODS: {MAPPING}"
         )
-        os.system(
-            f"genus -legacy_ui -batch -f ./syn_setup.tcl -f {SYN_FILE_L4} >> syn.log"
+        journal.record(JOURNAL_FILE, STAGE, DES, CLK, None, journal.STARTED, SYN_HASH)
+        status = await run_genus(SCRIPTS, f"{DES}/{CLK} syn", "syn.log", "syn", WORK)
+        # Mapping and hierarchical runs have their own durations in the run history
+        record_run(
+            "hier" if hier else "map" if staged else "syn", DES, CLK, None, status, cpus=cpus
         )
+        STATE = (
+            journal.DONE
+            if status.ok and os.path.exists(OUTPUTS[0])
+            else journal.FAILED
+        )
+        journal.record(JOURNAL_FILE, STAGE, DES, CLK, None, STATE, SYN_HASH)
         try:
             os.makedirs(f"{EXPORT_PATH}/no_backup", exist_ok=True)
-            shutil.move(f"syn.log", f"{EXPORT_PATH}/no_backup/syn.log")
+            shutil.move(f"{WORK}/syn.log", f"{EXPORT_PATH}/no_backup/syn.log")
         except Exception as e:
             logger.warning(f"  {e}")
         logger.info(
             f"\nFINISHED SYNTHESIS OF DESIGN: ({DES}) AT CLOCK PERIODS: {MAPPING}"
         )
+        if STATE == journal.DONE:
+            write_syn_info(EXPORT_PATH, flow=FLOW)
+        return STATE
     else:
         logger.info(f"Design ({DES}/{CLK}) already exists! Skipping synthesis")
+        return journal.DONE
+
+
+def mapping_clk(mapping):
+    # Clock period of a uniform mapping (clk:X-X-X), None for other mappings
+    m = re.fullmatch(r"clk:([\d.]+)-\1-\1", mapping)
+    return float(m.group(1)) if m else None
+
+
+def synthesized_slacks(DES):
+    # Worst slack (ns) per clock period of the finished syntheses of (DES)
+    slacks = {}
+    for report_file in glob.glob(f"{RESULT_DIR}/{DES}/clk:*/report_syn.rpt"):
+        clk = mapping_clk(os.path.basename(os.path.dirname(report_file)))
+        if clk is None or synthesis_failed(DES, clk):
+            continue
+        with open(report_file) as report:
+            wns = slack_extract(report)
+        if wns is not None:
+            slacks[clk] = wns
+    return slacks
+
+
+def fmax_bounds(slacks):
+    # (lo, hi): longest period known to fail timing and shortest period known to meet
+    # it (FMAX_MIN and FMAX_MAX if none)
+    hi = min((c for c, w in slacks.items() if w >= 0), default=FMAX_MAX)
+    lo = max((c for c, w in slacks.items() if w < 0 and c < hi), default=FMAX_MIN)
+    return lo, hi
+
+
+def fmax_candidates(slacks, tried, points=FMAX_POINTS):
+    # Clock periods of the next round: the period predicted by the slack of the
+    # synthesis closest to meeting timing (period - slack), and periods evenly
+    # spread over the remaining bounds. Without any passing synthesis FMAX_MAX is tried
+    lo, hi = fmax_bounds(slacks)
+    clks = []
+    if not any(w >= 0 for w in slacks.values()):
+        clks.append(hi)
+    if slacks:
+        clk = min(slacks, key=lambda c: abs(slacks[c]))
+        clks.append(clk - slacks[clk])
+    n = max(points - len(clks), 1)
+    clks += [lo + (hi - lo) * (i + 1) / (n + 1) for i in range(n)]
+    clks = sorted({round(c, 2) for c in clks})
+    return [c for c in clks if lo < c <= hi and c not in tried][:points]
+
+
+async def fmax_search(DES, synthesize=synthesis, rounds=FMAX_ROUNDS, tol=FMAX_TOL):
+    # Minimum clock period (ns) at which (DES) meets timing, searched with parallel
+    # rounds of syntheses (synthesize(CLK, DES)). The slacks of earlier syntheses
+    # (e.g. of CLK_LIST) are reused as bounds. Returns None if no period in
+    # [FMAX_MIN, FMAX_MAX] meets timing
+    slacks = synthesized_slacks(DES)
+    tried = set(slacks)
+    for i in range(rounds):
+        lo, hi = fmax_bounds(slacks)
+        if slacks.get(FMAX_MAX, 0) < 0:
+            break
+        if hi - lo <= tol and hi in slacks:
+            break
+        clks = fmax_candidates(slacks, tried)
+        if not clks:
+            break
+        logger.info(f"  {DES} fmax: round {i + 1}, bounds ({lo}, {hi}] ns, trying {clks}")
+        tried.update(clks)
+        await asyncio.gather(*(synthesize(clk, DES) for clk in clks))
+        for clk in clks:
+            report_file = f"{RESULT_DIR}/{DES}/{clk_mapping(clk)}/report_syn.rpt"
+            if synthesis_failed(DES, clk) or not os.path.exists(report_file):
+                continue
+            with open(report_file) as report:
+                wns = slack_extract(report)
+            if wns is not None:
+                slacks[clk] = wns
+    lo, hi = fmax_bounds(slacks)
+    if hi not in slacks:
+        logger.warning(f"  {DES} fmax: no clock period up to {FMAX_MAX} ns meets timing")
+        return None
+    logger.info(f"  {DES} fmax: minimum clock period {hi} ns (fails at {lo} ns)")
+    return hi
+
+
+def synthesis_failed(DES, CLK, stage="syn"):
+    # Power simulations depend on the synthesis of (DES, CLK), and are skipped if the
+    # last synthesis run failed (e.g. cancelled on a fatal log message)
+    entry = journal.last_record(JOURNAL_FILE, stage, DES, CLK)
+    return entry is not None and entry["state"] == journal.FAILED
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
 
 
-def power_simulation(prec_tuple, DES, rst=RST, rep=REP, overwrite_vcd=False):
-    # Additional Parameters
-    PRECISION, CLK = prec_tuple
-    MAPPING = f"clk:{CLK:3.2f}-{CLK:3.2f}-{CLK:3.2f}"
-    EXPORT_PATH = f"{RESULT_DIR}/{DES}/{MAPPING}"
-    REPORT_FILE = f"{EXPORT_PATH}/report_power_{PRECISION}.rpt"
-    os.chdir(f"{TMP_DIR}/{DES}/{MAPPING}")
-
-    if os.path.exists(REPORT_FILE) and overwrite_vcd == False:
+def estimate_vcd_bytes(EXPORT_PATH, DES, CLK, PRECISION, cycles):
+    # Peak VCD size of a power simulation: learned per cycle from the VCD sizes of the
+    # most similar jobs in the run history, else estimated from the netlist size
+    groups = history.group(history.load_cached(HISTORY_FILE, "vsim"), "vcd_bytes")
+    nbytes = history.predict(
+        groups, DES, CLK, PRECISION, DESIGN_CFG, cycles, field="vcd_bytes"
+    )
+    if nbytes is None:
+        netlist = file_size(f"{EXPORT_PATH}/post.v") or 0
+        nbytes = netlist * VCD_BYTES_PER_NETLIST_BYTE * cycles
+    return int(nbytes)
+
+
+def power_reports(export, prec, fidelity="full"):
+    # Return the power report(s) of (prec) at (fidelity). Sharded simulations
+    # produce one report per shard (report_power_{prec}{tag}_s{k}.rpt)
+    TAG = fidelity_tag(fidelity)
+    if os.path.exists(f"{export}/report_power_{prec}{TAG}.rpt"):
+        return [f"{export}/report_power_{prec}{TAG}.rpt"]
+    return sorted(glob.glob(f"{export}/report_power_{prec}{TAG}_s[0-9]*.rpt"))
+
+
+async def generate_vcd(
+    EXPORT_PATH, WORK, DES, PRECISION, CLK, VCD_FILE, TAG, rst, rep, seed, adaptive, sdf
+):
+    # Run the powerbench of one design/precision, and return information on the run
+    # (None if vsim failed, was killed, or exceeded its STAGE_LIMITS)
+    # Create PB setup script
+    logger.info(f"  {DES}/{CLK} - {PRECISION}{TAG}: Generating VCD")
+    PERIOD = prec_clk(CLK, PRECISION)
+    generate_PB_setup_script(
+        export=EXPORT_PATH,
+        des=DES,
+        prec=PRECISION,
+        clk=PERIOD,
+        rep=rep,
+        rst=rst,
+        window=ADAPTIVE_WINDOW if adaptive else 0,
+        seed=seed,
+        tag=TAG,
+        sdf=sdf,
+        work=WORK,
+    )
+    # BOOKMARK: Run questa and generate VCD files, then correct VCD file by removing pb_L2 and genblk1 scope
+    VSIM_CMD = backend.command(
+        "vsim", "-batch", "-do", f"PB_setup_{PRECISION}_{DES}{TAG}.tcl", "-do", SIM_PB_L4
+    )
+    if adaptive:
+        # (rep) is only an upper bound, the VCD file is monitored while it is written
+        # and the powerbench stops once the windowed toggle activity converged
+        sim_info, status = await run_until_converged(
+            VSIM_CMD,
+            vcd_file=VCD_FILE,
+            stop_file=f"stop_{PRECISION}_{DES}{TAG}",
+            clk=PERIOD,
+            window=ADAPTIVE_WINDOW,
+            tol=ADAPTIVE_TOL,
+            min_windows=ADAPTIVE_MIN_WINDOWS,
+            stage=f"{DES}/{CLK} {PRECISION}{TAG} vsim",
+            log=f"vsim_PB_{PRECISION}{TAG}.log",
+            **tool_options("vsim", WORK),
+        )
+        record_run(
+            "vsim",
+            DES,
+            CLK,
+            PRECISION,
+            status,
+            cycles=sim_info["cycles"],
+            sdf=sdf,
+            vcd_bytes=file_size(f"{WORK}/{VCD_FILE}"),
+        )
         logger.info(
-            f"{DES}/{CLK} - Report file already exists for {PRECISION}, skipping power simulations!"
+            f"  {DES}/{CLK} - {PRECISION}{TAG}: Simulated {sim_info['cycles']}/{rst * rep} cycles (converged: {sim_info['converged']})"
         )
     else:
-        logger.info(f"{DES}/{CLK} - PRECISION: {PRECISION}, CLOCK PERIOD: {CLK}")
-        # Create PB setup script
-        logger.info(f"  {DES}/{CLK} - {PRECISION}: Generating VCD")
-        generate_PB_setup_script(
-            export=EXPORT_PATH, des=DES, prec=PRECISION, clk=CLK, rep=rep, rst=rst
-        )
-        # BOOKMARK: Run questa and generate VCD files, then correct VCD file by removing pb_L2 and genblk1 scope
-        os.system(
-            f"vsim -batch -do PB_setup_{PRECISION}_{DES}.tcl -do {SIM_PB_L4} >> vsim_PB_{PRECISION}.log"
-        )
-        # TB signals are not dumped into VCD, which results in some empty lines in the VCD
-        # The line numbers are always (10 -> 15). We use sed to delete these lines
-        # If we don't delete these lines, you'll get incorrect power values
-        os.system(f"sed -e '10,15d' -i dump_{PRECISION}_clk{CLK:3.2f}_{DES}.vcd")
-        # See if there are errors in the simulation
-        with open(f"vsim_PB_{PRECISION}.log", "r") as f:
-            assert_error = re.search(r"Errors: [1-9][0-9]*", f.readlines()[-1])
-        if assert_error:
-            logger.warning(f"  {DES}/{CLK} - {PRECISION}: Assertion Error!")
+        status = await supervisor.run(
+            VSIM_CMD,
+            stage=f"{DES}/{CLK} {PRECISION}{TAG} vsim",
+            log=f"vsim_PB_{PRECISION}{TAG}.log",
+            **tool_options("vsim", WORK),
+        )
+        sim_info = {"cycles": rst * rep}
+        record_run(
+            "vsim",
+            DES,
+            CLK,
+            PRECISION,
+            status,
+            cycles=rst * rep,
+            sdf=sdf,
+            vcd_bytes=file_size(f"{WORK}/{VCD_FILE}"),
+        )
+    sim_info["seed"] = seed
+    if not status.ok:
+        # A killed or failed simulation (e.g. assertion errors) leaves an incomplete
+        # or wrong VCD file behind
+        logger.warning(f"  {DES}/{CLK} - {PRECISION}{TAG}: Simulation failed!")
+        if os.path.exists(f"{WORK}/{VCD_FILE}"):
+            os.remove(f"{WORK}/{VCD_FILE}")
+        return None
+    # TB signals are not dumped into VCD, which results in some empty lines in the VCD
+    # The line numbers are always (10 -> 15). We use sed to delete these lines
+    # If we don't delete these lines, you'll get incorrect power values
+    status = await supervisor.run(
+        ["sed", "-e", "10,15d", "-i", VCD_FILE], stage="sed", **tool_options("sed", WORK)
+    )
+    timeline.job("sed", DES, CLK, PRECISION, status)
+    return sim_info
+
+
+async def simulate_power(
+    EXPORT_PATH, WORK, DES, PRECISION, CLK, REPORT_FILE, TAG, rst, rep, seed, adaptive, sdf
+):
+    # Single power simulation: questa (VCD) -> genus (power report)
+    # Returns information on the simulation, or None if no VCD file was produced
+    # Both stages are journaled, so a resumed run skips the finished ones
+    # (PRECISION) is simulated at its own clock period of the mapping (CLK)
+    PERIOD = prec_clk(CLK, PRECISION)
+    VCD_FILE = f"dump_{PRECISION}_clk{PERIOD:3.2f}_{DES}{TAG}.vcd"
+    SIM_HASH = journal.inputs_hash(
+        [
+            f"{EXPORT_PATH}/post.v",
+            f"{EXPORT_PATH}/post.sdf",
+            PB_FILE_L4,
+            SIM_PB_L4,
+            HELPER_FILE,
+        ],
+        rst=rst,
+        rep=rep,
+        seed=seed,
+        adaptive=adaptive,
+        sdf=sdf,
+    )
+    JOB = (DES, CLK, PRECISION)
+    if is_cached(f"report{TAG}", *JOB, SIM_HASH, [REPORT_FILE], legacy=False):
+        logger.info(f"  {DES}/{CLK} - {PRECISION}{TAG}: Power report already complete")
+        return journal.last_record(JOURNAL_FILE, f"report{TAG}", *JOB)["sim_info"]
+    # Disk admission control: wait until the VCD file fits (see DISK_BUDGET)
+    with timeline.span("disk wait", f"{DES}/{CLK} {PRECISION}{TAG}", design=DES):
+        reservation = await supervisor.reserve_disk(
+            estimate_vcd_bytes(EXPORT_PATH, DES, CLK, PRECISION, rst * rep),
+            f"{WORK}/{VCD_FILE}",
+            f"{DES}/{CLK} {PRECISION}{TAG}",
+        )
+    try:
+        if is_cached(f"vcd{TAG}", *JOB, SIM_HASH, [f"{WORK}/{VCD_FILE}"], legacy=False):
+            logger.info(f"  {DES}/{CLK} - {PRECISION}{TAG}: VCD already complete")
+            sim_info = journal.last_record(JOURNAL_FILE, f"vcd{TAG}", *JOB)["sim_info"]
+        else:
+            journal.record(JOURNAL_FILE, f"vcd{TAG}", *JOB, journal.STARTED, SIM_HASH)
+            sim_info = await generate_vcd(
+                EXPORT_PATH,
+                WORK,
+                DES,
+                PRECISION,
+                CLK,
+                VCD_FILE,
+                TAG,
+                rst,
+                rep,
+                seed,
+                adaptive,
+                sdf,
+            )
+            STATE = journal.DONE if os.path.exists(f"{WORK}/{VCD_FILE}") else journal.FAILED
+            journal.record(
+                JOURNAL_FILE, f"vcd{TAG}", *JOB, STATE, SIM_HASH, sim_info=sim_info
+            )
 
         # Create power setup script
-        if os.path.exists(f"./dump_{PRECISION}_clk{CLK:3.2f}_{DES}.vcd"):
-            logger.info(f"  {DES}/{CLK} - {PRECISION}: Power Simulation")
-            generate_power_setup_script(
-                export=EXPORT_PATH, prec=PRECISION, clk=CLK, des=DES, report=REPORT_FILE
+        if not os.path.exists(f"{WORK}/{VCD_FILE}"):
+            logger.warning(f"  {DES}/{CLK} - {PRECISION}{TAG}: Can't find VCD file!")
+            return None
+        logger.info(f"  {DES}/{CLK} - {PRECISION}{TAG}: Power Simulation")
+        generate_power_setup_script(
+            export=EXPORT_PATH,
+            prec=PRECISION,
+            clk=PERIOD,
+            des=DES,
+            report=REPORT_FILE,
+            tag=TAG,
+            work=WORK,
+        )
+        # BOOKMARK: Run genus to extract power readings
+        journal.record(JOURNAL_FILE, f"report{TAG}", *JOB, journal.STARTED, SIM_HASH)
+        status = await run_genus(
+            [f"power_{PRECISION}_{DES}{TAG}.tcl"],
+            f"{DES}/{CLK} {PRECISION}{TAG} power",
+            f"genus_PB_{PRECISION}{TAG}.log",
+            "power",
+            WORK,
+        )
+        record_run("power", DES, CLK, PRECISION, status, cycles=sim_info["cycles"])
+        STATE = (
+            journal.DONE if status.ok and os.path.exists(REPORT_FILE) else journal.FAILED
+        )
+        journal.record(
+            JOURNAL_FILE, f"report{TAG}", *JOB, STATE, SIM_HASH, sim_info=sim_info
+        )
+        if STATE == journal.FAILED:
+            # The VCD file is kept for the next run, like a failed mixed extraction
+            logger.warning(f"  {DES}/{CLK} - {PRECISION}{TAG}: Power extraction failed!")
+            return None
+        # Move VCD and Power Extraction script to export path in case further analysis is required
+        logger.info(f"  {DES}/{CLK} - {PRECISION}{TAG}: Backing up tcl and log files")
+        try:
+            os.makedirs(f"{EXPORT_PATH}/no_backup", exist_ok=True)
+            shutil.move(
+                f"{WORK}/power_{PRECISION}_{DES}{TAG}.tcl",
+                f"{EXPORT_PATH}/no_backup/power_{PRECISION}{TAG}.tcl",
             )
-            # BOOKMARK: Run genus to extract power readings
-            os.system(
-                f"genus -legacy_ui -batch -f power_{PRECISION}_{DES}.tcl >> genus_PB_{PRECISION}.log"
+            shutil.move(
+                f"{WORK}/vsim_PB_{PRECISION}{TAG}.log",
+                f"{EXPORT_PATH}/no_backup/vsim_PB_{PRECISION}{TAG}.log",
             )
-            # Move VCD and Power Extraction script to export path in case further analysis is required
-            logger.info(f"  {DES}/{CLK} - {PRECISION}: Backing up tcl and log files")
-            try:
-                os.makedirs(f"{EXPORT_PATH}/no_backup", exist_ok=True)
-                shutil.move(
-                    f"power_{PRECISION}_{DES}.tcl",
-                    f"{EXPORT_PATH}/no_backup/power_{PRECISION}.tcl",
-                )
-                shutil.move(
-                    f"vsim_PB_{PRECISION}.log",
-                    f"{EXPORT_PATH}/no_backup/vsim_PB_{PRECISION}.log",
+            shutil.move(
+                f"{WORK}/genus_PB_{PRECISION}{TAG}.log",
+                f"{EXPORT_PATH}/no_backup/genus_PB_{PRECISION}{TAG}.log",
+            )
+            logger.info(f"  {DES} - {PRECISION}{TAG}: Attempting to remove VCD file")
+            os.remove(f"{WORK}/{VCD_FILE}")
+            logger.info(f"  {DES}/{CLK} - {PRECISION}{TAG}: VCD file deleted successfully!")
+
+        except Exception as e:
+            logger.warning(f"  {e}")
+        return sim_info
+    finally:
+        await supervisor.release_disk(reservation)
+
+
+async def power_simulation(
+    prec_tuple,
+    DES,
+    rst=RST,
+    rep=REP,
+    overwrite_vcd=False,
+    fidelity="full",
+    adaptive=False,
+    shards=1,
+    skip_higher=True,
+):
+    # Additional Parameters
+    PRECISION, CLK = prec_tuple
+    MAPPING = clk_mapping(CLK)
+    EXPORT_PATH = f"{RESULT_DIR}/{DES}/{MAPPING}"
+    WORK = f"{TMP_DIR}/{DES}/{MAPPING}"
+    os.makedirs(WORK, exist_ok=True)
+    # Lower fidelity runs get their own report and log names (see FIDELITIES)
+    TAG = fidelity_tag(fidelity)
+    # A lower fidelity run is not needed if a higher fidelity report already exists
+    # (unless it is used for calibration, see skip_higher)
+    HIGHER = FIDELITIES[: FIDELITIES.index(fidelity)] if skip_higher else []
+    if synthesis_failed(DES, CLK):
+        logger.warning(f"{DES}/{CLK} - Synthesis failed, skipping {PRECISION}{TAG}")
+        return journal.SKIPPED
+    # Job-level journal entry, the single stages are journaled in simulate_power
+    JOB_HASH = journal.inputs_hash(
+        [f"{EXPORT_PATH}/post.v", PB_FILE_L4, SIM_PB_L4],
+        rst=rst,
+        rep=rep,
+        fidelity=fidelity,
+        adaptive=adaptive,
+        shards=shards,
+    )
+    JOB_OUTPUTS = power_reports(EXPORT_PATH, PRECISION, fidelity) or [
+        f"{EXPORT_PATH}/report_power_{PRECISION}{TAG}.rpt"
+    ]
+
+    if (
+        is_cached(f"power{TAG}", DES, CLK, PRECISION, JOB_HASH, JOB_OUTPUTS)
+        and overwrite_vcd == False
+    ):
+        logger.info(
+            f"{DES}/{CLK} - Report file already exists for {PRECISION}{TAG}, skipping power simulations!"
+        )
+        return journal.DONE
+    elif (
+        any(power_reports(EXPORT_PATH, PRECISION, f) for f in HIGHER)
+        and overwrite_vcd == False
+    ):
+        logger.info(
+            f"{DES}/{CLK} - Higher fidelity report exists for {PRECISION}, skipping {fidelity} power simulations!"
+        )
+        return journal.DONE
+    elif shards == 1:
+        logger.info(
+            f"{DES}/{CLK} - PRECISION: {PRECISION}, CLOCK PERIOD: {prec_clk(CLK, PRECISION)}, FIDELITY: {fidelity} ({rst}x{rep} cycles)"
+        )
+        journal.record(
+            JOURNAL_FILE, f"power{TAG}", DES, CLK, PRECISION, journal.STARTED, JOB_HASH
+        )
+        sim_info = await simulate_power(
+            EXPORT_PATH,
+            WORK,
+            DES,
+            PRECISION,
+            CLK,
+            REPORT_FILE=f"{EXPORT_PATH}/report_power_{PRECISION}{TAG}.rpt",
+            TAG=TAG,
+            rst=rst,
+            rep=rep,
+            seed=SEED,
+            adaptive=adaptive,
+            sdf=fidelity != "zd",
+        )
+        if sim_info is not None:
+            write_sim_info(
+                EXPORT_PATH, PRECISION, fidelity, rst=rst, rep=rep, **sim_info
+            )
+            journal.record(
+                JOURNAL_FILE, f"power{TAG}", DES, CLK, PRECISION, journal.DONE, JOB_HASH
+            )
+            return journal.DONE
+        return journal.FAILED
+    else:
+        # Split the job into (shards) shorter runs with different seeds, which run
+        # concurrently (within the vsim and power STAGE_SLOTS)
+        logger.info(
+            f"{DES}/{CLK} - PRECISION: {PRECISION}, CLOCK PERIOD: {prec_clk(CLK, PRECISION)}, FIDELITY: {fidelity} ({shards}x{rst}x{rep // shards} cycles)"
+        )
+        journal.record(
+            JOURNAL_FILE, f"power{TAG}", DES, CLK, PRECISION, journal.STARTED, JOB_HASH
+        )
+        shard_infos = await asyncio.gather(
+            *(
+                simulate_power(
+                    EXPORT_PATH,
+                    WORK,
+                    DES,
+                    PRECISION,
+                    CLK,
+                    REPORT_FILE=f"{EXPORT_PATH}/report_power_{PRECISION}{TAG}_s{k}.rpt",
+                    TAG=f"{TAG}_s{k}",
+                    rst=rst,
+                    rep=rep // shards,
+                    seed=SEED + k,
+                    adaptive=adaptive,
+                    sdf=fidelity != "zd",
                 )
-                shutil.move(
-                    f"genus_PB_{PRECISION}.log",
-                    f"{EXPORT_PATH}/no_backup/genus_PB_{PRECISION}.log",
+                for k in range(shards)
+            )
+        )
+        write_sim_info(
+            EXPORT_PATH,
+            PRECISION,
+            fidelity,
+            rst=rst,
+            rep=rep,
+            cycles=sum(i["cycles"] for i in shard_infos if i is not None),
+            shards=shard_infos,
+        )
+        STATE = journal.FAILED if None in shard_infos else journal.DONE
+        journal.record(
+            JOURNAL_FILE, f"power{TAG}", DES, CLK, PRECISION, STATE, JOB_HASH
+        )
+        return STATE
+
+
+async def generate_mixed_vcd(EXPORT_PATH, WORK, DES, CLK, VCD_FILE, prec_list, rst, rep):
+    # One powerbench run of all precisions of (prec_list) -> VCD_FILE
+    # Returns the (precision, start, end) phases of the run, or None if it failed
+    logger.info(f"  {DES}/{CLK} - mixed: Generating VCD")
+    generate_PB_setup_script(
+        export=EXPORT_PATH,
+        des=DES,
+        prec=prec_list[0],
+        clk=CLK,
+        rep=rep,
+        rst=rst,
+        tag="_mixed",
+        mixed=prec_list,
+        work=WORK,
+    )
+    # BOOKMARK: Run questa and generate one VCD file for all precisions
+    status = await supervisor.run(
+        backend.command(
+            "vsim",
+            "-batch",
+            "-do",
+            f"PB_setup_{prec_list[0]}_{DES}_mixed.tcl",
+            "-do",
+            SIM_PB_L4,
+        ),
+        stage=f"{DES}/{CLK} mixed vsim",
+        log="vsim_PB_mixed.log",
+        **tool_options("vsim", WORK),
+    )
+    record_run(
+        "vsim",
+        DES,
+        CLK,
+        "mixed",
+        status,
+        cycles=rst * rep * len(prec_list),
+        vcd_bytes=file_size(f"{WORK}/{VCD_FILE}"),
+    )
+    if not status.ok:
+        logger.warning(f"  {DES}/{CLK} - mixed: Simulation failed!")
+        return None
+    # Same VCD correction as in power_simulation()
+    status = await supervisor.run(
+        ["sed", "-e", "10,15d", "-i", VCD_FILE], stage="sed", **tool_options("sed", WORK)
+    )
+    timeline.job("sed", DES, CLK, "mixed", status)
+    with open(f"{WORK}/vsim_PB_mixed.log", "r") as f:
+        phases = phase_extract(f)
+    if not os.path.exists(f"{WORK}/{VCD_FILE}") or len(phases) != len(prec_list):
+        logger.warning(f"  {DES}/{CLK} - mixed: Can't find VCD file or phases!")
+        return None
+    return phases
+
+
+async def mixed_power_simulation(
+    CLK, DES, prec_list, rst=RST, rep=REP, overwrite_vcd=False
+):
+    # Simulate all precisions of (prec_list) and the switches between them in a single
+    # powerbench run, then extract the power of every phase in a single genus session
+    # The powerbench runs at a single clock period, i.e. only uniform clock mappings
+    if not is_uniform(CLK):
+        logger.warning(f"{DES}/{CLK} - Mixed power simulations need a uniform clock mapping")
+        return journal.FAILED
+    CLK = clk_periods(CLK)[0]
+    MAPPING = clk_mapping(CLK)
+    EXPORT_PATH = f"{RESULT_DIR}/{DES}/{MAPPING}"
+    WORK = f"{TMP_DIR}/{DES}/{MAPPING}"
+    os.makedirs(WORK, exist_ok=True)
+    VCD_FILE = f"dump_{prec_list[0]}_clk{CLK:3.2f}_{DES}_mixed.vcd"
+    if synthesis_failed(DES, CLK):
+        logger.warning(f"{DES}/{CLK} - Synthesis failed, skipping mixed power simulation")
+        return journal.SKIPPED
+
+    # The VCD and report stages are journaled like in simulate_power(). Reports of runs
+    # before the journal existed count as complete
+    SIM_HASH = journal.inputs_hash(
+        [
+            f"{EXPORT_PATH}/post.v",
+            f"{EXPORT_PATH}/post.sdf",
+            PB_FILE_L4,
+            SIM_PB_L4,
+            HELPER_FILE,
+        ],
+        rst=rst,
+        rep=rep,
+        prec_list=prec_list,
+    )
+    JOB = (DES, CLK, "mixed")
+    REPORTS = [f"{EXPORT_PATH}/report_power_{prec}.rpt" for prec in prec_list]
+    if is_cached("report_mixed", *JOB, SIM_HASH, REPORTS) and overwrite_vcd == False:
+        logger.info(
+            f"{DES}/{CLK} - Report files already exist for all precisions, skipping power simulations!"
+        )
+        return journal.DONE
+    logger.info(
+        f"{DES}/{CLK} - MIXED PRECISION: {' '.join(prec_list)}, CLOCK PERIOD: {CLK}"
+    )
+    # Disk admission control, see simulate_power()
+    with timeline.span("disk wait", f"{DES}/{CLK} mixed", design=DES):
+        reservation = await supervisor.reserve_disk(
+            estimate_vcd_bytes(EXPORT_PATH, DES, CLK, "mixed", rst * rep * len(prec_list)),
+            f"{WORK}/{VCD_FILE}",
+            f"{DES}/{CLK} mixed",
+        )
+    try:
+        if is_cached("vcd_mixed", *JOB, SIM_HASH, [f"{WORK}/{VCD_FILE}"], legacy=False):
+            logger.info(f"  {DES}/{CLK} - mixed: VCD already complete")
+            phases = journal.last_record(JOURNAL_FILE, "vcd_mixed", *JOB)["phases"]
+        else:
+            journal.record(JOURNAL_FILE, "vcd_mixed", *JOB, journal.STARTED, SIM_HASH)
+            phases = await generate_mixed_vcd(
+                EXPORT_PATH, WORK, DES, CLK, VCD_FILE, prec_list, rst, rep
+            )
+            STATE = journal.DONE if phases is not None else journal.FAILED
+            journal.record(JOURNAL_FILE, "vcd_mixed", *JOB, STATE, SIM_HASH, phases=phases)
+        if phases is None:
+            return journal.FAILED
+
+        # Power windows: every precision, and every switch from one precision to the next
+        windows = []
+        for i, (prec, start, end) in enumerate(phases):
+            if i > 0:
+                last, _, last_end = phases[i - 1]
+                windows.append(
+                    (
+                        f"{EXPORT_PATH}/report_power_switch_{last}_{prec}.rpt",
+                        f"{last} -> {prec}",
+                        last_end,
+                        start,
+                    )
                 )
-                logger.info(f"  {DES} - {PRECISION}: Attempting to remove VCD file")
-                os.remove(f"dump_{PRECISION}_clk{CLK:3.2f}_{DES}.vcd")
-                logger.info(
-                    f"  {DES}/{CLK} - {PRECISION}: VCD file deleted successfully!"
+            windows.append((f"{EXPORT_PATH}/report_power_{prec}.rpt", prec, start, end))
+
+        logger.info(f"  {DES}/{CLK} - mixed: Power Simulation of {len(windows)} windows")
+        generate_mixed_power_setup_script(
+            export=EXPORT_PATH, clk=CLK, des=DES, vcd=VCD_FILE, windows=windows, work=WORK
+        )
+        # BOOKMARK: Run genus to extract power readings of all windows
+        journal.record(JOURNAL_FILE, "report_mixed", *JOB, journal.STARTED, SIM_HASH)
+        status = await run_genus(
+            [f"power_mixed_{DES}.tcl"],
+            f"{DES}/{CLK} mixed power",
+            "genus_PB_mixed.log",
+            "power",
+            WORK,
+        )
+        record_run(
+            "power", DES, CLK, "mixed", status, cycles=rst * rep * len(prec_list)
+        )
+        # A failed genus run may leave some reports missing or cut short
+        ok = status.ok and all(file_size(w[0]) for w in windows)
+        STATE = journal.DONE if ok else journal.FAILED
+        journal.record(JOURNAL_FILE, "report_mixed", *JOB, STATE, SIM_HASH)
+        if not ok:
+            # The VCD file is kept for the next run
+            logger.warning(f"  {DES}/{CLK} - mixed: Power extraction failed!")
+            return journal.FAILED
+        for i, (prec, start, end) in enumerate(phases):
+            write_sim_info(
+                EXPORT_PATH,
+                prec,
+                rst=rst,
+                rep=rep,
+                cycles=round((end - start) / CLK),
+                mixed=True,
+            )
+            if i > 0:
+                last, _, last_end = phases[i - 1]
+                write_sim_info(
+                    EXPORT_PATH, f"switch_{last}_{prec}", duration=round(start - last_end, 3)
                 )
 
-            except Exception as e:
-                logger.warning(f"  {e}")
-        else:
-            logger.warning(f"  {DES}/{CLK} - {PRECISION}: Can't find VCD file!")
+        logger.info(f"  {DES}/{CLK} - mixed: Backing up tcl and log files")
+        try:
+            os.makedirs(f"{EXPORT_PATH}/no_backup", exist_ok=True)
+            shutil.move(
+                f"{WORK}/power_mixed_{DES}.tcl", f"{EXPORT_PATH}/no_backup/power_mixed.tcl"
+            )
+            shutil.move(
+                f"{WORK}/vsim_PB_mixed.log", f"{EXPORT_PATH}/no_backup/vsim_PB_mixed.log"
+            )
+            shutil.move(
+                f"{WORK}/genus_PB_mixed.log", f"{EXPORT_PATH}/no_backup/genus_PB_mixed.log"
+            )
+            os.remove(f"{WORK}/{VCD_FILE}")
+            logger.info(f"  {DES}/{CLK} - mixed: VCD file deleted successfully!")
+        except Exception as e:
+            logger.warning(f"  {e}")
+        return journal.DONE
+    finally:
+        await supervisor.release_disk(reservation)
+
+
+############# L2 VARIANTS
+def l2_variant(cfg):
+    # Name of the L2 unit of a design configuration (see DESIGN_CFG)
+    return f"L2_{cfg['L2_MODE']}_BG_{cfg['BG']}_DVAFS_{cfg['DVAFS']}"
+
+
+def l2_cfg(var):
+    # Configuration of the L2 variant (var), see l2_variant()
+    _, mode, _, bg, _, dvafs = var.split("_")
+    return {"L2_MODE": mode, "BG": bg, "DVAFS": dvafs}
+
+
+def l2_variants(designs):
+    # L2 variants of (designs), in order of first use
+    return list(dict.fromkeys(l2_variant(DESIGN_CFG[d]) for d in designs))
 
 
 def generate_breakdown_df(clk_8b, prec_list, dvafs=False):
-    MAPPING = f"clk:{clk_8b:3.2f}-{clk_8b:3.2f}-{clk_8b:3.2f}"
+    # (clk_8b) is a clock period or a per-precision clock mapping (see clk_periods)
+    MAPPING = clk_mapping(clk_8b)
+    # Breakdowns of clock mappings are named after their periods (CLK_8B-CLK_4B-CLK_2B)
+    CLK_DIR = clk_8b if is_uniform(clk_8b) else journal.clk_label(clk_8b)
 
     ############ Power and Area Breakdown ############
-    BREAKDOWN_DIR = f"{RESULT_DIR}/breakdown/{clk_8b}/{'SWU' if dvafs else 'FU'}/"
+    BREAKDOWN_DIR = f"{RESULT_DIR}/breakdown/{CLK_DIR}/{'SWU' if dvafs else 'FU'}/"
     # Create breakdown directory for area and power extraction
     if not os.path.exists(BREAKDOWN_DIR):
         os.makedirs(BREAKDOWN_DIR)
@@ -510,12 +2078,247 @@ def generate_breakdown_df(clk_8b, prec_list, dvafs=False):
 
     # Get area and power dataframes
     logger.info(f"Reading reports and creating dataframes for {MAPPING}")
-    area_df, power_df = get_extracted_dataframes(MAPPING, prec_list)
+    area_df, power_df, info_df = get_extracted_dataframes(MAPPING, prec_list)
 
     logger.info("Exporting to CSV")
     # Export CSV files
     area_df.to_csv(f"{BREAKDOWN_DIR}/area.csv")
     power_df.round(5).to_csv(f"{BREAKDOWN_DIR}/power.csv")
+    # power_info.csv tells which power numbers are screening estimates
+    info_df.to_csv(f"{BREAKDOWN_DIR}/power_info.csv")
+    # Energy per operation and throughput of every precision at its own clock period
+    energy_df = get_energy_dataframe(clk_8b, power_df, prec_list, dvafs)
+    energy_df.to_csv(f"{BREAKDOWN_DIR}/energy.csv")
+    # Energy cost of switching precision (mixed precision power simulations only)
+    switch_df = get_switch_dataframe(MAPPING, prec_list)
+    if not switch_df.empty:
+        switch_df.to_csv(f"{BREAKDOWN_DIR}/switch.csv")
+
+
+def generate_fmax_df(fmax, prec_list, dvafs=False):
+    # Throughput-optimal comparison: the minimum clock period of every design (fmax,
+    # see fmax_search) and its area, and the power, energy per operation (fJ) and
+    # throughput (GOPS) of every precision at that period
+    FMAX_DIR = f"{RESULT_DIR}/breakdown/fmax/{'SWU' if dvafs else 'FU'}/"
+    os.makedirs(FMAX_DIR, exist_ok=True)
+    ops = OPS_PER_CYCLE_SWU if dvafs else OPS_PER_CYCLE
+    rows = {}
+    for DES, CLK in fmax.items():
+        if CLK is None:
+            continue
+        EXPORT_PATH = f"{RESULT_DIR}/{DES}/{clk_mapping(CLK)}"
+        with open(f"{EXPORT_PATH}/report_syn.rpt") as report:
+            wns = slack_extract(report)
+        areas = {DES: {k: [] for k in KEYS_AREA}}
+        with open(f"{EXPORT_PATH}/report_syn.rpt") as report:
+            area_extract(dict_in=areas, file_in=report, design=DES)
+        area = sum(int(i) for i in areas[DES]["top"])
+        for prec in prec_list:
+            fidelity = find_power_fidelity(EXPORT_PATH, prec)
+            if not power_reports(EXPORT_PATH, prec, fidelity):
+                logger.warning(f"  {DES}/{CLK} - {prec}: No power report at fmax")
+                continue
+            # mW (like power.csv) * ns = pJ
+            power = extract_power(EXPORT_PATH, prec, fidelity)["top"] / 1e6
+            rows[(PREC_DICT[prec], DES)] = {
+                "min_period": CLK,
+                "fmax_mhz": round(1e3 / CLK, 1),
+                "wns": wns,
+                "area": area,
+                "power": round(power, 5),
+                "energy_per_op": round(power * CLK * 1e3 / ops[prec], 4),
+                "gops": round(ops[prec] / CLK, 1),
+                "fidelity": fidelity,
+            }
+    fmax_df = pd.DataFrame.from_dict(rows, orient="index")
+    fmax_df.to_csv(f"{FMAX_DIR}/fmax.csv")
+    logger.info(f"Fmax results of {len(fmax)} designs saved to {FMAX_DIR}/fmax.csv")
+    return fmax_df
+
+
+def last_duration(entries, stage, des, clk):
+    # Duration (s) of the last successful run of (stage) of (des) at (clk) in the run
+    # history (entries), None if there is none
+    durations = [
+        e["duration"]
+        for e in entries
+        if e["stage"] == stage and e["design"] == des and history.clk_key(e["clk"]) == clk
+    ]
+    return durations[-1] if durations else None
+
+
+def synthesis_qor(report):
+    # Area of top_L4_mac and worst slack (ns) of a synthesis report
+    areas = {"qor": {k: [] for k in KEYS_AREA}}
+    with open(report) as f:
+        area_extract(dict_in=areas, file_in=f, design="qor")
+    with open(report) as f:
+        wns = slack_extract(f)
+    return sum(int(i) for i in areas["qor"]["top"]), wns
+
+
+def generate_qor_df(clk, designs):
+    # QoR of hierarchical synthesis against flat synthesis of (designs) at (clk): area,
+    # worst slack, and synthesis time (hierarchical: L3/L4 levels plus the L2_mult block
+    # synthesis shared by all designs with its L2 variant)
+    MAPPING = clk_mapping(clk)
+    CLK_DIR = clk if is_uniform(clk) else journal.clk_label(clk)
+    QOR_DIR = f"{RESULT_DIR}/breakdown/hierarchical/{CLK_DIR}"
+    os.makedirs(QOR_DIR, exist_ok=True)
+    entries = history.load(HISTORY_FILE)
+    clk = history.clk_key(clk)
+    # Designs sharing every block
+    shared = {}
+    for des in DESIGN_NAMES:
+        shared[l2_variant(DESIGN_CFG[des])] = shared.get(l2_variant(DESIGN_CFG[des]), 0) + 1
+    rows = {}
+    for DES in designs:
+        EXPORT_PATH = f"{RESULT_DIR}/{DES}/{MAPPING}"
+        reports = [f"{EXPORT_PATH}/report_syn.rpt", f"{EXPORT_PATH}/flat/report_syn.rpt"]
+        if not all(os.path.exists(r) for r in reports):
+            logger.warning(f"  {DES}/{MAPPING}: No hierarchical and flat synthesis reports")
+            continue
+        (hier_area, hier_wns), (flat_area, flat_wns) = map(synthesis_qor, reports)
+        VAR = l2_variant(DESIGN_CFG[DES])
+        hier_time, block_time = last_duration(entries, "hier", DES, clk), last_duration(
+            entries, "block", VAR, clk
+        )
+        flat_time = last_duration(entries, "syn", DES, clk)
+        if hier_time is not None and block_time is not None:
+            hier_time += block_time / shared.get(VAR, 1)
+        rows[DES] = {
+            "flat_area": flat_area,
+            "hier_area": hier_area,
+            "area_delta": round((hier_area - flat_area) / flat_area, 4) if flat_area else None,
+            "flat_wns": flat_wns,
+            "hier_wns": hier_wns,
+            "flat_syn_time": flat_time,
+            "hier_syn_time": round(hier_time, 2) if hier_time is not None else None,
+            "speedup": round(flat_time / hier_time, 2) if flat_time and hier_time else None,
+        }
+    qor_df = pd.DataFrame.from_dict(rows, orient="index")
+    qor_df.to_csv(f"{QOR_DIR}/qor.csv")
+    if not qor_df.empty:
+        logger.info(
+            f"Hierarchical synthesis at {MAPPING}: {100 * qor_df['area_delta'].mean():+.1f}% area, "
+            f"{pd.to_numeric(qor_df['speedup']).mean():.1f}x faster than flat ({len(qor_df)} designs)"
+        )
+    logger.info(f"QoR comparison saved to {QOR_DIR}/qor.csv")
+    return qor_df
+
+
+def generate_area_screen_df(designs, dvafs=False):
+    # Provisional area breakdown of (designs) from the area reports of their generic
+    # netlists (see generic_synthesis): generic cells, without timing constraints, so
+    # only for ranking designs before their full synthesis
+    SCREEN_DIR = f"{RESULT_DIR}/breakdown/area_screen/{'SWU' if dvafs else 'FU'}"
+    os.makedirs(SCREEN_DIR, exist_ok=True)
+    areas = {}
+    for DES in designs:
+        REPORT_FILE = f"{RESULT_DIR}/{DES}/generic/report_generic.rpt"
+        if not os.path.exists(REPORT_FILE):
+            logger.warning(f"  {DES}: No generic area report")
+            continue
+        area = {DES: {k: [] for k in KEYS_AREA}}
+        with timeline.span("parse", f"{DES} generic area", design=DES):
+            with open(REPORT_FILE) as report:
+                area_extract(dict_in=area, file_in=report, design=DES)
+        areas[DES] = sum_areas(area[DES])
+    area_df = pd.DataFrame.from_dict(areas, orient="index", columns=KEYS_AREA)
+    area_df["rank"] = area_df["top"].rank(method="min").astype(int)
+    area_df["provisional"] = True
+    area_df.sort_values("top").to_csv(f"{SCREEN_DIR}/area_provisional.csv")
+    logger.info(
+        f"Provisional (generic) areas of {len(area_df)} designs saved to "
+        f"{SCREEN_DIR}/area_provisional.csv"
+    )
+    return area_df
+
+
+def generate_cell_df(clk, designs, dvafs=False):
+    # Cell histogram (cells.csv) and per instance path cell counts and areas
+    # (hierarchy.csv) of the netlists of (designs) at (clk), from their post.v
+    MAPPING = clk_mapping(clk)
+    CLK_DIR = clk if is_uniform(clk) else journal.clk_label(clk)
+    CELL_DIR = f"{RESULT_DIR}/breakdown/{CLK_DIR}/{'SWU' if dvafs else 'FU'}/cells"
+    os.makedirs(CELL_DIR, exist_ok=True)
+    library = None
+    if os.path.exists(LIB_DB):
+        with timeline.span("parse", "liberty cells"):
+            library = netlist.liberty_cells(LIB_DB)
+    else:
+        logger.warning(f"  No liberty file {LIB_DB}, cells are classified by name only")
+    cells, paths = [], []
+    for DES in designs:
+        NETLIST = f"{RESULT_DIR}/{DES}/{MAPPING}/post.v"
+        if not os.path.exists(NETLIST):
+            logger.warning(f"  {DES}/{MAPPING}: No netlist")
+            continue
+        with timeline.span("parse", f"{DES} netlist", design=DES, clk=MAPPING):
+            net = netlist.scan(NETLIST)
+        cells.append(netlist.histogram(net, library).assign(design=DES))
+        paths.append(netlist.hierarchy(net, library, CELL_DEPTH).assign(design=DES))
+    if not cells:
+        return None, None
+    cell_df = pd.concat(cells).set_index(["design", "module", "cell"])
+    hier_df = pd.concat(paths).reset_index().set_index(["design", "path"])
+    cell_df.round(4).to_csv(f"{CELL_DIR}/cells.csv")
+    hier_df.round(4).to_csv(f"{CELL_DIR}/hierarchy.csv")
+    logger.info(f"Cell statistics of {len(cells)} netlists saved to {CELL_DIR}")
+    return cell_df, hier_df
+
+
+def power_tree(export, prec, fidelity="full"):
+    # Power tree of one design/precision, parsed once and kept in power_tree_{prec}.npz.
+    # Sharded simulations are merged into their cycle-weighted mean
+    reports = power_reports(export, prec, fidelity)
+    if not reports:
+        raise FileNotFoundError(f"No power report for {prec} in {export}")
+    TREE_FILE = f"{export}/power_tree_{prec}{fidelity_tag(fidelity)}.npz"
+    if os.path.exists(TREE_FILE) and os.path.getmtime(TREE_FILE) >= max(
+        os.path.getmtime(r) for r in reports
+    ):
+        return powertree.PowerTree.load(TREE_FILE)
+    trees = [powertree.parse(r) for r in reports]
+    shards = read_sim_info(export, prec, fidelity).get("shards") or []
+    tree = powertree.merge(trees, shard_weights(reports, shards)) if len(trees) > 1 else trees[0]
+    tree.save(TREE_FILE)
+    return tree
+
+
+def generate_power_tree_df(clk, prec_list, dvafs=False):
+    # Power of the instances of every design/precision at (clk) up to POWER_TREE_DEPTH
+    # (power_tree.csv), and of the POWER_TREE_GROUPS (power_groups.csv), in mW like
+    # power.csv
+    MAPPING = clk_mapping(clk)
+    CLK_DIR = clk if is_uniform(clk) else journal.clk_label(clk)
+    TREE_DIR = f"{RESULT_DIR}/breakdown/{CLK_DIR}/{'SWU' if dvafs else 'FU'}/power_tree"
+    os.makedirs(TREE_DIR, exist_ok=True)
+    rollups, groups = [], []
+    for DES in DESIGN_NAMES:
+        EXPORT_PATH = f"{RESULT_DIR}/{DES}/{MAPPING}"
+        for prec in prec_list:
+            fidelity = find_power_fidelity(EXPORT_PATH, prec)
+            if not power_reports(EXPORT_PATH, prec, fidelity):
+                logger.warning(f"  {DES}/{MAPPING}: No power report for {prec}")
+                continue
+            with timeline.span("parse", f"{DES} {prec} tree", design=DES, mapping=MAPPING):
+                tree = power_tree(EXPORT_PATH, prec, fidelity)
+            keys = {"precision": PREC_DICT[prec], "design": DES}
+            rollups.append(tree.rollup(POWER_TREE_DEPTH).reset_index().assign(**keys))
+            group = tree.groups(POWER_TREE_GROUPS).T
+            groups.append(group.rename_axis("group").reset_index().assign(**keys))
+    if not rollups:
+        return None, None
+    index = ["precision", "design"]
+    tree_df = pd.concat(rollups).set_index(index + ["path"])
+    group_df = pd.concat(groups).set_index(index + ["group"])
+    tree_df[powertree.COLUMNS] /= 1e6
+    group_df[powertree.COLUMNS] /= 1e6
+    tree_df.round(6).to_csv(f"{TREE_DIR}/power_tree.csv")
+    group_df.round(6).to_csv(f"{TREE_DIR}/power_groups.csv")
+    logger.info(f"Power trees of {len(rollups)} reports saved to {TREE_DIR}")
+    return tree_df, group_df
 
 
 def cleanup(DIR):
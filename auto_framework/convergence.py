@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Convergence checks for adaptive power simulations
+#           Streams a VCD file while it is being written, counts
+#           toggles per window of clock cycles, and stops the
+#           simulation once the mean activity has converged
+# -----------------------------------------------------
+
+from imports import *
+import supervisor
+
+logger = logging.getLogger("auto_L4")
+
+# Two-sided 95% quantiles of the student-t distribution for 1..30 degrees of freedom
+T95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+# Bytes of the VCD file read at once by VCDWindowMonitor
+READ_CHUNK = 1 << 20
+# VCD timescale units in seconds
+TIME_UNITS = {"s": 1, "ms": 1e-3, "us": 1e-6, "ns": 1e-9, "ps": 1e-12, "fs": 1e-15}
+
+
+def t95(dof):
+    # Large sample sizes fall back to the normal distribution
+    if dof < 1:
+        return float("inf")
+    return T95[dof - 1] if dof <= len(T95) else 1.96
+
+
+def weighted_mean_ci(values, weights):
+    # Weighted mean of independent estimates, and the half-width of its 95% confidence
+    # interval. The effective sample size accounts for unequal weights
+    n = len(values)
+    total = sum(weights)
+    mean = sum(w * x for w, x in zip(weights, values)) / total
+    if n < 2:
+        return mean, float("nan")
+    var = sum(w * (x - mean) ** 2 for w, x in zip(weights, values)) / total * n / (n - 1)
+    n_eff = total ** 2 / sum(w ** 2 for w in weights)
+    return mean, t95(n - 1) * (var / n_eff) ** 0.5
+
+
+class RunningStats:
+    # Welford's algorithm: mean and variance in constant memory
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def std(self):
+        return (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else float("inf")
+
+    def ci95(self):
+        # Half-width of the 95% confidence interval of the mean
+        return t95(self.n - 1) * self.std() / max(self.n, 1) ** 0.5
+
+
+class VCDWindowMonitor:
+    # Count value changes per window of (window) clock cycles of a growing VCD file
+    # The first (warmup) windows contain the reset and dumpvars transients, and
+    # are not taken into account
+    def __init__(self, vcd_file, clk, window, warmup=1):
+        self.vcd_file = vcd_file
+        self.clk = clk
+        self.window = window
+        self.warmup = warmup
+        self.stats = RunningStats()
+        self.offset = 0
+        self.rest = ""
+        self.header = True
+        self.in_timescale = False
+        self.timescale = None
+        self.window_ticks = None
+        self.start = None
+        self.now = 0
+        self.windows = 0
+        self.toggles = 0
+
+    def _set_timescale(self, text):
+        c = re.search(r"(\d+)\s*(s|ms|us|ns|ps|fs)", text)
+        if c:
+            self.timescale = int(c.group(1)) * TIME_UNITS[c.group(2)]
+            self.window_ticks = self.window * self.clk * 1e-9 / self.timescale
+
+    def _close_windows(self):
+        # Close all windows which ended before the current time stamp
+        while self.now - self.start >= (self.windows + 1) * self.window_ticks:
+            if self.windows >= self.warmup:
+                self.stats.add(self.toggles)
+            self.windows += 1
+            self.toggles = 0
+
+    def _parse(self, line):
+        if self.header:
+            # $timescale may be written on one or on multiple lines
+            if "$timescale" in line:
+                self.in_timescale = True
+            if self.in_timescale:
+                self._set_timescale(line)
+                self.in_timescale = "$end" not in line
+            if "$enddefinitions" in line:
+                self.header = False
+            return
+        if line.startswith("#"):
+            self.now = int(line[1:])
+            if self.start is None:
+                self.start = self.now
+            self._close_windows()
+        elif line and line[0] in "01xzXZbBrR":
+            self.toggles += 1
+
+    def update(self):
+        # Read what was appended to the VCD file since the last call, in chunks of
+        # READ_CHUNK bytes (the simulator may have written GBs meanwhile)
+        try:
+            with open(self.vcd_file, "rb") as f:
+                f.seek(self.offset)
+                while True:
+                    data = f.read(READ_CHUNK)
+                    if not data:
+                        break
+                    self.offset += len(data)
+                    lines = (self.rest + data.decode(errors="replace")).split("\n")
+                    self.rest = lines.pop()
+                    for line in lines:
+                        self._parse(line.strip())
+        except OSError:
+            return
+
+    def cycles(self):
+        # Number of dumped clock cycles so far
+        if self.start is None or self.window_ticks is None:
+            return 0
+        return int((self.now - self.start) / self.window_ticks * self.window)
+
+    def converged(self, tol, min_windows):
+        n, mean = self.stats.n, self.stats.mean
+        if n < min_windows or mean <= 0:
+            return False
+        return self.stats.ci95() <= tol * mean
+
+
+async def run_until_converged(
+    argv, vcd_file, stop_file, clk, window, tol, min_windows, poll=1.0, **limits
+):
+    # Run (argv) as a supervised job (see supervisor.Job for the limits) and monitor
+    # (vcd_file) until the tool exits. Once the windowed toggle activity converged,
+    # (stop_file) is created and the powerbench stops itself
+    # (vcd_file) and (stop_file) are relative to the working directory of the job
+    # Returns information on the run, and the ExitStatus of the job
+    cwd = limits.get("cwd", ".")
+    vcd_file, stop_file = os.path.join(cwd, vcd_file), os.path.join(cwd, stop_file)
+    # Left over by an interrupted run, it would stop the powerbench after one window
+    if os.path.exists(stop_file):
+        os.remove(stop_file)
+    monitor = VCDWindowMonitor(vcd_file, clk, window)
+    job = await supervisor.Job(argv, **limits).start()
+    stopped = False
+    try:
+        while await job.poll() is None:
+            await asyncio.sleep(poll)
+            monitor.update()
+            if not stopped and monitor.converged(tol, min_windows):
+                open(stop_file, "w").close()
+                stopped = True
+        status = await job.wait()
+    except BaseException:
+        await job.cancel("interrupted")
+        raise
+    finally:
+        # wait() releases the slot, unless an exception came first
+        job.release()
+        if os.path.exists(stop_file):
+            os.remove(stop_file)
+    if not status.ok:
+        logger.warning(f"  {status}")
+    monitor.update()
+    info = {
+        "cycles": monitor.cycles(),
+        "converged": stopped,
+        "windows": monitor.stats.n,
+        "toggles_per_window": round(monitor.stats.mean, 2),
+        "ci95_rel": round(monitor.stats.ci95() / monitor.stats.mean, 4)
+        if monitor.stats.mean > 0
+        else None,
+    }
+    return info, status
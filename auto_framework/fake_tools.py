@@ -0,0 +1,497 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Stand-in Genus and QuestaSim for Auto Framework
+#           Reads the tcl scripts written by config.py, sleeps
+#           according to a duration model, and writes netlists,
+#           VCD files and area/power reports in the formats the
+#           framework parses. Used by the "fake" tool backend
+#           to test and benchmark the orchestration without
+#           licenses
+#
+#   python fake_tools.py genus -legacy_ui -batch -f <setup.tcl> [-f <script.tcl>]
+#   python fake_tools.py genus -legacy_ui -no_gui   (session, jobs read from stdin)
+#   python fake_tools.py vsim -batch -do <PB_setup.tcl> -do <sim_pb.tcl>
+#
+# The duration model and failure rate are set in the environment:
+#   FAKE_TOOLS_SCALE   multiplies all durations (default 1, 0 for no sleeping)
+#   FAKE_TOOLS_FAIL    probability that a run fails (default 0)
+#   FAKE_TOOLS_SEED    seed of the failures and of the simulated activity
+#   FAKE_TOOLS_MODEL   JSON object overriding entries of MODEL
+# -----------------------------------------------------
+
+# Only the standard library: a fake tool is started for every job, and has to start
+# fast for the orchestration benchmark (see benchmark.py)
+import os
+import re
+import sys
+import json
+import time
+import random
+
+# Duration model (s, before FAKE_TOOLS_SCALE) and output sizes
+MODEL = {
+    # Genus start-up: license checkout, tool start and library loading
+    "genus_start": 30.0,
+    # Synthesis: syn_time * design size * (1 + syn_clk / clock period)
+    "syn_time": 600.0,
+    "syn_clk": 1.0,
+    # Share of syn_time which doesn't depend on the clock (read, elaborate, syn_generic)
+    "syn_generic": 0.5,
+    # Area of a generic netlist, relative to the mapped netlist at a relaxed clock
+    "generic_area": 1.15,
+    # Hierarchical synthesis: share of syn_time spent on the L2_mult blocks (synthesized
+    # once per L2 variant), and the area and critical path overhead of the preserved blocks
+    "hier_block": 0.6,
+    "hier_area": 1.03,
+    "hier_path": 1.05,
+    # Critical path (ns) of the largest design, and its spread between designs
+    "path_delay": 1.5,
+    "path_spread": 0.1,
+    # Critical path of the 4b and 2b modes, relative to the 8b mode
+    "path_4b": 0.6,
+    "path_2b": 0.35,
+    # Simulation: vsim_time + vsim_cycle per cycle * design size (bit-serial designs
+    # need bs_cycles clock cycles per multiplication)
+    "vsim_time": 20.0,
+    "vsim_cycle": 0.05,
+    "bs_cycles": 4,
+    # Power extraction: power_time + power_cycle per VCD cycle * design size
+    "power_time": 60.0,
+    "power_cycle": 0.01,
+    # Netlist cells per unit of area, and dumped signals per VCD file
+    "cells_per_area": 0.01,
+    "signals": 32,
+    # Cycles written at once (and between two checks of the adaptive stop file)
+    "chunk": 64,
+}
+
+# Area (um2) of the largest design, and power (nW at 1 ns and full activity) per um2
+BASE_AREA = 460000
+POWER_DENSITY = 2500
+# End of a job of a persistent session (see sessions.MARKER)
+SESSION_MARKER = "@@AUTO_SESSION_DONE"
+# Toggle probability of the datapath signals per precision
+L2_PER_L4 = 256
+ACTIVITY = {"0000": 0.5, "0010": 0.4, "0011": 0.3, "1010": 0.35, "1111": 0.25}
+# Mode sizes (relative): input (00), hybrid (10) and output (11) sharing
+MODE_SIZE = {"00": 1.0, "10": 0.8, "11": 0.65}
+
+
+def options():
+    model = dict(MODEL)
+    model.update(json.loads(os.environ.get("FAKE_TOOLS_MODEL", "{}")))
+    scale = float(os.environ.get("FAKE_TOOLS_SCALE", 1))
+    fail = float(os.environ.get("FAKE_TOOLS_FAIL", 0))
+    return model, scale, fail
+
+
+def rng(*key):
+    # Deterministic per job: the same job fails (or toggles) the same way every run
+    return random.Random(" ".join([os.environ.get("FAKE_TOOLS_SEED", "0"), *key]))
+
+
+def tcl_vars(path):
+    # "set NAME value" lines of a tcl script
+    with open(path) as f:
+        return dict(re.findall(r"^set\s+(\w+)\s+(\S+)", f.read(), re.M))
+
+
+def design_size(v):
+    # Relative size of a design, from its synthesis or powerbench parameters
+    size = MODE_SIZE.get(v.get("L4_MODE"), 1) * MODE_SIZE.get(v.get("L3_MODE"), 1)
+    size *= {"0000": 1.0, "1010": 0.85, "1111": 0.75}.get(v.get("L2_MODE", v.get("MODE")), 0.8)
+    size *= 0.3 if v.get("BG") == "11" else 1
+    # An L2 unit (L2 characterization) or L2_mult block (hierarchical synthesis) is one of
+    # the 256 L2 units of an L4 array
+    return size / L2_PER_L4 if v.get("DESIGN") in ("top_L2_mac", "L2_mult_block") else size
+
+
+def fail(tool, log_line, *key):
+    _, _, rate = options()
+    if rng(tool, "fail", *key).random() < rate:
+        print(log_line, flush=True)
+        sys.exit(1)
+
+
+############# GENUS
+def generic(v, model, scale):
+    # First stage of a staged synthesis: the clock-independent part, saved to a database
+    size = design_size(v)
+    print(f"Generic synthesis of {v['DESIGN_NAME']} ({v.get('MAX_CPUS', 1)} threads)")
+    fail("genus", "Error   : Fake generic synthesis failure [FAKE-3]", v["DESIGN_NAME"])
+    time.sleep(scale * model["syn_time"] * size * model["syn_generic"])
+    os.makedirs(os.path.dirname(v["GENERIC_DB"]), exist_ok=True)
+    with open(v["GENERIC_DB"], "w") as f:
+        f.write(f"fake generic database of {v['DESIGN_NAME']} (size {size:.4f})\n")
+    if "REPORT_FILE" in v:
+        # Provisional area: generic cells are larger than mapped ones, and there are no
+        # clock constraints
+        r = rng(v["DESIGN_NAME"], "generic")
+        top = round(BASE_AREA * size * model["generic_area"] * r.uniform(0.97, 1.03))
+        with open(v["REPORT_FILE"], "w") as f:
+            f.write("\n############### AREA - SUMMARY (GENERIC)\n\n")
+            area_report(f, v, top, r)
+    print("Normal exit.")
+
+
+def synthesis(v, model, scale):
+    export, report = v["EXPORT_PATH"], v["REPORT_FILE"]
+    clks = [float(v[k]) for k in ("CLK_8B", "CLK_4B", "CLK_2B")]
+    paths = [1, model["path_4b"], model["path_2b"]]
+    # The mode with the tightest clock relative to its critical path drives the effort
+    clk = min(c / p for c, p in zip(clks, paths))
+    key = str(clks[0]) if len(set(clks)) == 1 else "-".join(map(str, clks))
+    size = design_size(v)
+    print(f"Synthesizing {v['DESIGN_NAME']} at {key} ns ({v.get('MAX_CPUS', 1)} threads)")
+    fail("genus", "Error   : Fake synthesis failure [FAKE-1]", v["DESIGN_NAME"], key)
+    work = 1 + model["syn_clk"] / clk
+    if "GENERIC_DB" in v:
+        # Mapping of a staged synthesis: the generic part was done once per design
+        if not os.path.exists(v["GENERIC_DB"]):
+            print(f"Error   : Cannot open database {v['GENERIC_DB']} [FAKE-4]")
+            sys.exit(1)
+        work -= model["syn_generic"]
+    if "BLOCK_NETLIST" in v:
+        # Hierarchical synthesis: the L2_mult blocks were synthesized once per L2 variant
+        if not os.path.exists(v["BLOCK_NETLIST"]):
+            print(f"Error   : Cannot open file {v['BLOCK_NETLIST']} [FAKE-5]")
+            sys.exit(1)
+        work *= 1 - model["hier_block"]
+    time.sleep(scale * model["syn_time"] * size * work)
+    hier = model["hier_area"] if "BLOCK_NETLIST" in v else 1
+
+    r = rng(v["DESIGN_NAME"], key)
+    top = round(BASE_AREA * size * (1 + 0.2 / clk) * r.uniform(0.97, 1.03) * hier)
+
+    # The critical path only depends on the design, so fmax searches converge
+    delay = model["path_delay"] * (0.5 + size / 2)
+    delay *= 1 + rng(v["DESIGN_NAME"], "path").uniform(-1, 1) * model["path_spread"]
+    delay *= model["hier_path"] if "BLOCK_NETLIST" in v else 1
+    wns = min(c - delay * p for c, p in zip(clks, paths))
+
+    design = v.get("DESIGN", "top_L4_mac")
+    os.makedirs(export, exist_ok=True)
+    if design == "L2_mult_block":
+        with open(f"{export}/block.v", "w") as f:
+            f.write(f"// Fake netlist of {v['DESIGN_NAME']} (size {size:.6f})\n")
+            f.write(f"module {design} (prec, a, w, out);\nendmodule\n")
+        with open(report, "w") as f:
+            f.write(f"############### TIMING - SUMMARY\n\n     WNS (ns):   {wns:.3f}\n")
+        print(f"Exported {export}/block.v\nNormal exit.")
+        return
+    with open(f"{export}/post.v", "w") as f:
+        f.write(f"// Fake netlist of {v['DESIGN_NAME']} (size {size:.6f})\n")
+        netlist(f, design, int(top * model["cells_per_area"]), rng(v["DESIGN_NAME"], "netlist"))
+    with open(f"{export}/post.sdf", "w") as f:
+        f.write(f'(DELAYFILE (DESIGN "{design}") (TIMESCALE 1ps))\n')
+    if design == "top_L2_mac":
+        mac = top - round(top * r.uniform(0.002, 0.01))
+        l2 = round(0.45 * top)
+        with open(report, "w") as f:
+            f.write(
+                f"""############### TIMING - SUMMARY
+
+     WNS (ns):   {wns:.3f}
+
+############### AREA - SUMMARY
+
+       Instance              Module          Cell Count  Cell Area  Net Area   Total Area
+-------------------------------------------------------------------------------------------
+top_L2_mac                                     {top // 10}  {top * 7 // 10}  {top - top * 7 // 10}  {top}
+  mac                  L2_mac_{v.get('MODE', '0000')}            {mac // 10}  {mac * 7 // 10}  {mac - mac * 7 // 10}  {mac}
+    L2                 L2_mult_{v.get('MODE', '0000')}            {l2 // 10}  {l2 * 7 // 10}  {l2 - l2 * 7 // 10}  {l2}
+"""
+            )
+        print(f"Exported {export}/post.v\nNormal exit.")
+        return
+    with open(report, "w") as f:
+        f.write(
+            f"""############### TIMING - SUMMARY
+
+     WNS (ns):   {wns:.3f}
+     TNS (ns):   {min(wns, 0) * 64:.3f}
+
+############### AREA - SUMMARY
+"""
+        )
+        area_report(f, v, top, r)
+    print(f"Exported {export}/post.v\nNormal exit.")
+
+
+# Library cells of the fake netlists, and their share of the combinational cells
+FAKE_CELLS = {"NAND2X1": 0.4, "XOR2X1": 0.3, "ADDFX1": 0.2, "INVX1": 0.1}
+
+
+def netlist(f, design, cells, r):
+    # A netlist of about (cells) cells: the top module with 4 L4_mult instances (a fifth
+    # of the cells each, a quarter of them flops), and a genus clock gating module in
+    # front of the accumulator flops of the top module
+    mult = cells // 5
+    kinds = r.choices(list(FAKE_CELLS), weights=list(FAKE_CELLS.values()), k=mult)
+    f.write("module RC_CG_MOD (enable, ck_in, ck_out);\n")
+    f.write("  input enable, ck_in;\n  output ck_out;\n")
+    f.write("  TLATNCAX2 RC_CGIC_INST (.E(enable), .CK(ck_in), .ECK(ck_out));\nendmodule\n\n")
+    f.write("module L4_mult (clk, rst, a, b, z);\n  input clk, rst;\n")
+    for i in range(mult):
+        cell = kinds[i] if i % 4 else "DFFRX1"
+        f.write(f"  {cell} g{i} (.A(n{i}), .B(a),\n    .Y(n{i + 1}));\n")
+    f.write("endmodule\n\n")
+    f.write(f"module {design} (clk, rst, a, b, z);\n  input clk, rst;\n  wire gclk;\n")
+    f.write("  RC_CG_MOD RC_CG_HIER_INST0 (.enable(rst), .ck_in(clk), .ck_out(gclk));\n")
+    for i in range(4):
+        f.write(f"  L4_mult \\mult[{i}].L4 (.clk(clk), .rst(rst), .a(a), .b(b), .z(z{i}));\n")
+    for i in range(cells - 4 * mult):
+        f.write(f"  DFFRX1 acc_reg_{i} (.D(n{i}), .CK(gclk), .RN(rst), .Q(n{i + 1}));\n")
+    f.write("endmodule\n")
+
+
+def area_report(f, v, top, r):
+    # Area table of top_L4_mac and the sequential area, in the formats of report area
+    # and report gates
+    in_reg = round(top * r.uniform(0.002, 0.01))
+    mac = top - in_reg
+    out_reg = round(top * r.uniform(0.05, 0.2))
+    mult = round(mac * r.uniform(0.35, 0.6))
+    count = round(top * 0.01) if v.get("BG") == "11" else 0
+    f.write(
+        f"""
+============================================================
+  Generated by:           Genus(TM) Synthesis Solution (fake_tools)
+  Module:                 top_L4_mac
+============================================================
+
+       Instance              Module          Cell Count  Cell Area  Net Area   Total Area
+-------------------------------------------------------------------------------------------
+top_L4_mac                                     {top // 10}  {top * 7 // 10}  {top - top * 7 // 10}  {top}
+  L4                   L4_mac_HR{v.get('HEADROOM', 4)}            {mac // 10}  {mac * 7 // 10}  {mac - mac * 7 // 10}  {mac}
+    L4_mult            L4_mult_{v.get('L4_MODE', '00')}            {mult // 10}  {mult * 7 // 10}  {mult - mult * 7 // 10}  {mult}
+"""
+    )
+    for i in range(64):
+        f.write(f"      gen[{i}].mult_2b   mult_2b_{i}   26  200  56  256\n")
+    if count:
+        f.write(f"  count_bs             counter_W4   {count // 10}  {count}  0  {count}\n")
+    f.write("\n  Type       Instances    Area   Area %\n")
+    f.write(f"sequential      {out_reg // 20}   {out_reg}   {100 * out_reg / top:.1f}\n")
+    f.write(f"inverter        {top // 50}   {top // 20}   5.0\n")
+
+
+def vcd_activity(vcd, start=None, end=None):
+    # Value changes, dumped signals and time span (ps) of (vcd) between (start) and
+    # (end) (ps)
+    toggles, signals, now, first, last = 0, 0, 0, None, 0
+    with open(vcd) as f:
+        for line in f:
+            if line.startswith("$var"):
+                signals += 1
+            elif line.startswith("#"):
+                now = int(line[1:])
+                if (start is None or now >= start) and (end is None or now <= end):
+                    first = now if first is None else first
+                    last = now
+            elif line[:1] in ("0", "1") and (start is None or now >= start) and (
+                end is None or now <= end
+            ):
+                toggles += 1
+    return toggles, max(signals, 1), last - (first or 0)
+
+
+def power_report(report, label, clk, window, vcd, size, model, key, design="top_L4_mac"):
+    start, end = window if window else (None, None)
+    toggles, signals, span = vcd_activity(vcd, start, end)
+    cycles = max(span / (clk * 1000), 1)
+    activity = toggles / cycles / signals
+    r = rng(key, label)
+    top = POWER_DENSITY * BASE_AREA * size * activity / clk * r.uniform(0.95, 1.05)
+    l4, in_reg, out_reg = 0.45 * top, 0.015 * top, 0.3 * top
+    l3, l2 = 0.9 * l4, 0.81 * l4
+    mult = 0.15 * l2
+
+    def row(name, power, cells=100):
+        return f"{name:<28} {cells:>6} {power * 1e-4:.5f} {power * 0.6:.5f} {power * 0.3:.5f} {power * 0.1:.5f} {power:.5f}\n"
+
+    with open(report, "w") as f:
+        f.write(f"\n############### POWER - {label} SUMMARY\nSimulated at {clk:3.2f} clock period.\n\n")
+        f.write(f"{'Instance':<28}  Cells  Leakage  Internal  Switching  Net  Total\n")
+        if design == "top_L2_mac":
+            f.write(row("top_L2_mac", top, 40))
+            f.write(row("  mac", 0.9 * top, 36))
+            f.write(row("    L2", 0.45 * top, 18))
+            return cycles
+        f.write(row("top_L4_mac", top, 10000))
+        f.write(row("  L4", 0.96 * top, 9000))
+        f.write(row("    L4_mult", l4, 5000))
+        for i in range(4):
+            f.write(row(f"      L3_mult_gen[{i}].L3", l3 / 4, 1200))
+            for j in range(4):
+                f.write(row(f"        L2_mult_gen[{j}].L2", l2 / 16, 300))
+                for k in range(4):
+                    f.write(row(f"          mult_2b_gen[{k}].mult", mult / 64, 20))
+        f.write(f"\n############### POWER - {label} DETAILS\nSimulated at {clk:3.2f} clock period.\n\n")
+        f.write(f"{'Instance':<28}  Leakage  Dynamic  Total\n")
+        for i in range(20):
+            f.write(f"L4/out_reg[{i}]   0.00010 {out_reg / 40:.5f} {out_reg / 20:.5f}\n")
+        for i in range(16):
+            f.write(f"{'ab'[i % 2]}_reg_reg[0][{i // 8}][{i // 4 % 2}][{i // 2 % 2}][{i % 2}]   0.00010 {in_reg / 32:.5f} {in_reg / 16:.5f}\n")
+    return cycles
+
+
+def power(script, model, scale):
+    text = open(script).read()
+    netlist = re.search(r"read_hdl .*?(\S+/post\.v)", text).group(1)
+    with open(netlist) as f:
+        size = float(re.search(r"\(size (\S+)\)", f.readline()).group(1))
+    design = re.search(r"^elaborate (\S+)", text, re.M).group(1)
+    fail("genus", "Error   : Fake power extraction failure [FAKE-2]", netlist, script)
+    cycles = 0
+    # One section per read_vcd (several windows of a mixed precision VCD file)
+    sections = re.split(r"^read_vcd ", text, flags=re.M)[1:]
+    for section in sections:
+        args = section.split("\n", 1)[0].split()
+        vcd = args[-1]
+        window = None
+        if "-start_time" in args:
+            window = (int(args[args.index("-start_time") + 1]), int(args[args.index("-end_time") + 1]))
+        for label, clk, report in re.findall(
+            r'POWER - (.+?) SUMMARY(?:\\n|\n)Simulated at (\S+) clock period[^"]*" > (\S+)', section
+        ):
+            print(f"Reading {vcd} ({label})")
+            cycles += power_report(
+                report, label, float(clk), window, vcd, size, model, netlist, design
+            )
+    time.sleep(scale * (model["power_time"] + model["power_cycle"] * cycles) * size)
+    print("Normal exit.")
+
+
+def genus_job(scripts, model, scale):
+    v = tcl_vars(scripts[0])
+    if "GENERIC_DB" in v and "CLK_8B" not in v:
+        generic(v, model, scale)
+    elif "REPORT_FILE" in v:
+        synthesis(v, model, scale)
+    else:
+        power(scripts[0], model, scale)
+
+
+def genus_session(model, scale):
+    # Persistent session: only the cd and auto_job commands sent by sessions.py are
+    # interpreted, a failed job prints its error and the session goes on
+    for line in sys.stdin:
+        line = line.strip()
+        cd = re.match(r"cd \{(.+)\}$", line)
+        job = re.match(r"auto_job (\d+) \{(.*)\}$", line)
+        if line == "exit":
+            break
+        elif cd:
+            os.chdir(cd.group(1))
+        elif job:
+            rc = 0
+            try:
+                genus_job(re.findall(r"\{([^}]*)\}", job.group(2)), model, scale)
+            except SystemExit as e:
+                rc = 1 if e.code else 0
+            print(f"{SESSION_MARKER} {job.group(1)} {rc}", flush=True)
+
+
+def genus(argv):
+    model, scale, _ = options()
+    time.sleep(scale * model["genus_start"])
+    scripts = [argv[i + 1] for i, a in enumerate(argv) if a == "-f"]
+    if scripts:
+        genus_job(scripts, model, scale)
+    else:
+        genus_session(model, scale)
+
+
+############# QUESTA
+def vcd_header(f, signals):
+    # Lines 10-15 hold testbench signals, which the framework deletes with sed
+    f.write("$date fake_tools $end\n$version QuestaSim (fake_tools) $end\n$timescale 1ps $end\n")
+    f.write("$scope module pb_L4 $end\n$var wire 1 ! clk $end\n$scope module genblk1 $end\n")
+    f.write("$scope module genblk1 $end\n$scope module top_L4_mac $end\n$var wire 1 \" rst $end\n")
+    f.write("$scope module tb $end\n")
+    f.write("".join(f"$var wire 1 tb{i} tb_{i} $end\n" for i in range(4)))
+    f.write("$upscope $end\n")
+    f.write("".join(f"$var wire 1 s{i} n{i} $end\n" for i in range(signals)))
+    f.write("$upscope $end\n$upscope $end\n$upscope $end\n$upscope $end\n$enddefinitions $end\n")
+    f.write("#0\n$dumpvars\n0!\n1\"\n" + "".join(f"0s{i}\n" for i in range(signals)) + "$end\n")
+
+
+def vsim(argv):
+    model, scale, _ = options()
+    setup = argv[argv.index("-do") + 1]
+    v = tcl_vars(setup)
+    clk = float(v["CLK_PERIOD"])
+    period = round(clk * 1000)
+    # The L2 powerbench has a fixed length
+    cycles = int(v.get("RST", 2)) * int(v.get("REP", 256))
+    window = int(v.get("WINDOW", 0))
+    size = design_size(v)
+    if v.get("MIXED") == "1":
+        seq = v["PRCSN_SEQ"]
+        n = int(v["N_PRCSN"])
+        precisions = [seq[i : i + 4] for i in range(len(seq) - 4 * n, len(seq), 4)]
+    else:
+        precisions = [v["PRECISION"]]
+    per_cycle = model["vsim_cycle"] * size * (model["bs_cycles"] if v.get("BG") == "11" else 1)
+    print(f"# Loading pb_L4 ({v['VCD_FILE']})", flush=True)
+    fail("vsim", "# ** Error: Assertion error.", v["VCD_FILE"], v.get("SEED", ""))
+    time.sleep(scale * model["vsim_time"])
+
+    r = rng(v["VCD_FILE"], v.get("SEED", ""))
+    signals = int(model["signals"])
+    state = [0] * signals
+    t = 0
+    with open(v["VCD_FILE"], "w") as f:
+        vcd_header(f, signals)
+        for p, prec in enumerate(precisions):
+            if p > 0:
+                # Precision switch: a few idle cycles
+                t += 4 * period
+            print(f"PHASE START {prec} {t / 1000:.3f}", flush=True)
+            activity = ACTIVITY.get(prec, 0.4)
+            done = 0
+            while done < cycles:
+                n = min(int(model["chunk"]), cycles - done)
+                lines = []
+                for _ in range(n):
+                    lines.append(f"#{t}\n1!\n")
+                    for i in range(signals):
+                        if r.random() < activity:
+                            state[i] ^= 1
+                            lines.append(f"{state[i]}s{i}\n")
+                    lines.append(f"#{t + period // 2}\n0!\n")
+                    t += period
+                f.write("".join(lines))
+                f.flush()
+                done += n
+                time.sleep(scale * per_cycle * n)
+                if window and os.path.exists(v.get("STOP_FILE", "stop_sim")):
+                    print(f"ADAPTIVE STOP: {done} cycles", flush=True)
+                    break
+            print(f"PHASE END {prec} {t / 1000:.3f}", flush=True)
+        f.write(f"#{t}\n")
+    print("# Errors: 0, Warnings: 0")
+
+
+if __name__ == "__main__":
+    tools = {"genus": genus, "vsim": vsim}
+    if len(sys.argv) < 2 or sys.argv[1] not in tools:
+        sys.exit(f"usage: {sys.argv[0]} genus|vsim <tool arguments>")
+    tools[sys.argv[1]](sys.argv[2:])
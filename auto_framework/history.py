@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Run history for Auto Framework
+#           Keeps the duration, thread count and peak memory of
+#           every tool run across benchmark runs
+# -----------------------------------------------------
+
+from imports import *
+import journal
+
+logger = logging.getLogger("auto_L4")
+
+# Cache of load_cached(): (history_file, stage) -> (load time, entries)
+_cache = {}
+
+
+def record(history_file, stage, des, clk, prec, status, cpus=1, **extra):
+    # Append the ExitStatus of a supervised tool run of (stage)
+    journal.append(
+        history_file,
+        {
+            "time": round(time.time(), 3),
+            "stage": stage,
+            "design": des,
+            "clk": clk,
+            "prec": prec,
+            "cpus": cpus,
+            "duration": round(status.duration, 2),
+            "peak_mem": status.peak_mem,
+            "ok": status.ok,
+            **extra,
+        },
+    )
+
+
+def load(history_file, stage=None, ok=True):
+    # Entries of (stage) (all stages if None). Only successful runs by default, as
+    # the duration of a failed or killed run says little about a full run
+    return [
+        entry
+        for entry in journal.read(history_file)
+        if (stage is None or entry["stage"] == stage) and (entry["ok"] or not ok)
+    ]
+
+
+def load_cached(history_file, stage, max_age=600):
+    # load(), reloaded at most every (max_age) seconds (used for every job)
+    key = (history_file, stage)
+    if key not in _cache or time.time() - _cache[key][0] > max_age:
+        _cache[key] = (time.time(), load(history_file, stage))
+    return _cache[key][1]
+
+
+def clk_key(clk):
+    # Clock mappings (CLK_8B, CLK_4B, CLK_2B) are lists once stored as JSON
+    return tuple(clk) if isinstance(clk, list) else clk
+
+
+def group(entries, field="duration"):
+    # Entries which recorded (field), per job (design, clock, precision)
+    groups = {}
+    for entry in entries:
+        if entry.get(field) is not None:
+            key = (entry["design"], clk_key(entry["clk"]), entry["prec"])
+            groups.setdefault(key, []).append(entry)
+    return groups
+
+
+def similarity(job, des, clk, prec, design_cfg):
+    # Number of matching design parameters (see DESIGN_CFG), clock and precision
+    score = (job[1] == clk) + (job[2] == prec)
+    a, b = design_cfg.get(job[0]), design_cfg.get(des)
+    if a and b:
+        score += sum(a[k] == b[k] for k in b)
+    return score
+
+
+def predict(
+    groups, des, clk, prec=None, design_cfg=None, cycles=None, field="duration"
+):
+    # Predicted (field) (duration by default) of a run of (des, clk, prec): median of
+    # the runs of the most similar jobs in (groups) of one stage (see group()).
+    # Simulation run times and VCD sizes scale with the number of cycles: with
+    # (cycles), the median per cycle is scaled. Returns None without any history
+    if not groups:
+        return None
+    clk = clk_key(clk)
+    scores = {job: similarity(job, des, clk, prec, design_cfg or {}) for job in groups}
+    best = max(scores.values())
+    entries = [e for job, s in scores.items() if s == best for e in groups[job]]
+    if cycles:
+        per_cycle = [e[field] / e["cycles"] for e in entries if e.get("cycles")]
+        if per_cycle:
+            return float(np.median(per_cycle)) * cycles
+    return float(np.median([e[field] for e in entries]))
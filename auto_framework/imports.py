@@ -24,26 +24,31 @@ import shutil
 import re
 import sys
 import time
+import math
+import json
+import hashlib
+import glob
+import subprocess
+import signal
+import socket
+import asyncio
 import pdb
 from datetime import timedelta
 import logging
 from itertools import product
-import multiprocessing as mp
+from functools import partial
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-plt.rcParams.update({'font.size': 12})
 
 # Setting up the logger
 log_file = time.strftime("%d-%m_%H:%M:%S", time.localtime()) + "-auto_L4.log"
 logger = logging.getLogger('auto_L4')
 logger.setLevel(level=logging.DEBUG)
-# fh = logging.FileHandler(filename=log_file, encoding='utf-8')
-# fh.setFormatter(logging.Formatter('%(asctime)s: %(levelname)-8s: %(message)s', datefmt='%d/%m %H:%M:%S'))
+# The log file is only created once something is logged (not by plain imports)
+fh = logging.FileHandler(filename=log_file, encoding='utf-8', delay=True)
+fh.setFormatter(logging.Formatter('%(asctime)s: %(levelname)-8s: %(message)s', datefmt='%d/%m %H:%M:%S'))
 console = logging.StreamHandler()
 console.setLevel(logging.INFO)
 console.setFormatter(logging.Formatter('%(levelname)-8s: %(message)s'))
-# logger.addHandler(fh)
+logger.addHandler(fh)
 logger.addHandler(console)
\ No newline at end of file
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Append-only job journal for Auto Framework
+#           Records every (stage, design, precision, clock) state
+#           transition with a hash of its inputs, so interrupted
+#           runs can resume instead of restarting
+# -----------------------------------------------------
+
+from imports import *
+
+logger = logging.getLogger("auto_L4")
+
+# Job states
+STARTED = "started"
+DONE = "done"
+FAILED = "failed"
+# Result of a job which did not run because a job it depends on failed (not journaled)
+SKIPPED = "skipped"
+
+# Last record of every job per journal file, and the bytes of the file read so far
+# ({journal_file: (offset, {key: entry})}), see load()
+_indexes = {}
+
+
+def fingerprint(path):
+    # Cheap file fingerprint: size and modification time (re-synthesized netlists or
+    # edited scripts get a new fingerprint)
+    try:
+        st = os.stat(path)
+        return [path, st.st_size, st.st_mtime_ns]
+    except OSError:
+        return [path, None, None]
+
+
+def inputs_hash(files=(), **params):
+    # Hash of the input files and parameters of a job
+    digest = hashlib.sha1()
+    digest.update(json.dumps([fingerprint(f) for f in files]).encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def clk_label(clk):
+    # Clock period, or the per-precision periods of a non-uniform clock mapping
+    # (CLK_8B-CLK_4B-CLK_2B). Clock-independent stages (e.g. generic synthesis) have
+    # no clock
+    if clk is None:
+        return "-"
+    if isinstance(clk, (list, tuple)):
+        if len(set(clk)) > 1:
+            return "-".join(f"{c:3.2f}" for c in clk)
+        clk = clk[0]
+    return f"{clk:3.2f}"
+
+
+def job_key(stage, des, clk, prec=None):
+    return f"{stage}/{des}/{clk_label(clk)}/{prec or '-'}"
+
+
+def append(path, entry):
+    # Append one JSON line. A single write() on an O_APPEND file keeps lines from
+    # concurrent writers intact
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (json.dumps(entry) + "\n").encode())
+    finally:
+        os.close(fd)
+
+
+def read(path):
+    # All entries of a JSON lines file (lines cut short by an interrupted write are
+    # skipped)
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    except OSError:
+        return
+
+
+def record(journal_file, stage, des, clk, prec, state, digest, **extra):
+    # Append one state transition
+    entry = {
+        "time": round(time.time(), 3),
+        "key": job_key(stage, des, clk, prec),
+        "stage": stage,
+        "design": des,
+        "clk": clk,
+        "prec": prec,
+        "state": state,
+        "hash": digest,
+        **extra,
+    }
+    append(journal_file, entry)
+    if journal_file in _indexes:
+        _indexes[journal_file][1][entry["key"]] = entry
+
+
+def load(journal_file):
+    # Last record of every job. The journal is read once, later calls only read the
+    # records appended since (e.g. by the workers of a distributed run)
+    offset, entries = _indexes.get(journal_file, (0, {}))
+    try:
+        size = os.path.getsize(journal_file)
+    except OSError:
+        size = 0
+    if size < offset:
+        # Deleted or replaced journal
+        offset, entries = 0, {}
+    if size > offset:
+        with open(journal_file, "rb") as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        # A line cut short by a running write is read with the next call
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry["key"]] = entry
+        offset += end
+    _indexes[journal_file] = (offset, entries)
+    return entries
+
+
+def last_record(journal_file, stage, des, clk, prec=None):
+    return load(journal_file).get(job_key(stage, des, clk, prec))
+
+
+def is_complete(journal_file, stage, des, clk, prec, digest, outputs, legacy=True):
+    # A job is verified-complete if its last record is DONE with the same inputs
+    # hash, and all its outputs exist. Jobs without any record (e.g. results from
+    # runs before the journal existed) are complete if (legacy) and outputs exist
+    entry = last_record(journal_file, stage, des, clk, prec)
+    exists = bool(outputs) and all(os.path.exists(o) for o in outputs)
+    if entry is None:
+        return legacy and exists
+    if entry["state"] != DONE:
+        logger.info(
+            f"{des}/{clk} - {stage} {prec or ''} was interrupted ({entry['state']}), retrying"
+        )
+        return False
+    if entry["hash"] != digest:
+        logger.info(f"{des}/{clk} - {stage} {prec or ''} inputs changed, rerunning")
+        return False
+    return exists
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Gate-level netlist statistics for Auto Framework
+#           Streams a netlist written by genus (post.v) in one
+#           pass, counts the library cells of every module and
+#           rolls them up along the instance hierarchy. Cells are
+#           split in sequential, clock gating and combinational
+#           cells, and joined with their liberty areas
+# -----------------------------------------------------
+
+from imports import *
+from collections import Counter
+
+logger = logging.getLogger("auto_L4")
+
+# Statements which don't instantiate anything
+KEYWORDS = {
+    "module", "endmodule", "input", "output", "inout", "wire", "reg", "assign",
+    "supply0", "supply1", "tri", "parameter", "defparam", "specify", "endspecify",
+}
+# Start of an instantiation: <cell or module> [#(...)] <instance> (
+INSTANCE = re.compile(r"^\s*([A-Za-z_][\w$]*)\s+(?:#\(.*?\)\s*)?(\\\S+|[A-Za-z_][\w$]*)\s*\(")
+MODULE = re.compile(r"^\s*module\s+(\\\S+|[A-Za-z_][\w$]*)")
+# Cell kinds of cells missing from the liberty file, by name
+SEQ_CELLS = re.compile(r"DFF|SDF|EDF|LATCH|^TLAT(?!NCA)|FF\d|^DF")
+ICG_CELLS = re.compile(r"ICG|CKLN|CLKGATE|^TLATNCA|^CKGT|PREICG")
+
+
+class Netlist:
+    # Library cell counts per module ({module: Counter(cell)}) and the submodule
+    # instances per module ({module: Counter(submodule)}) of a netlist. Instance names
+    # are not kept, so memory only grows with the number of distinct cells per module
+    def __init__(self):
+        self.cells = {}
+        self.children = {}
+        self.order = []
+
+    @property
+    def top(self):
+        # The module no other module instantiates (the last one genus writes)
+        instantiated = set()
+        for subs in self.children.values():
+            instantiated.update(subs)
+        tops = [m for m in self.order if m not in instantiated]
+        return tops[-1] if tops else None
+
+
+def scan(path):
+    # Stream the netlist at (path) once. Instances of types which are not defined in the
+    # netlist are library cells
+    net = Netlist()
+    instances = {}
+    module = None
+    # Inside a statement (e.g. the port connections of an instance) until its ";"
+    open_statement = False
+    with open(path, errors="replace") as f:
+        for line in f:
+            line = line.split("//", 1)[0]
+            if not line.strip():
+                continue
+            if not open_statement:
+                m = MODULE.match(line)
+                if m:
+                    module = m.group(1)
+                    net.order.append(module)
+                    instances[module] = Counter()
+                elif module is not None and line.strip() == "endmodule":
+                    module = None
+                elif module is not None:
+                    m = INSTANCE.match(line)
+                    if m and m.group(1) not in KEYWORDS:
+                        instances[module][m.group(1)] += 1
+            open_statement = not line.rstrip().endswith((";", "endmodule")) and (
+                open_statement or module is not None
+            )
+    defined = set(net.order)
+    for module, types in instances.items():
+        net.cells[module] = Counter({t: n for t, n in types.items() if t not in defined})
+        net.children[module] = Counter({t: n for t, n in types.items() if t in defined})
+    return net
+
+
+def liberty_cells(path):
+    # Area and kind (seq, icg or comb) of every cell of a liberty file, streamed. Cells
+    # with an ff or latch group are sequential, clock gating cells have the
+    # clock_gating_integrated_cell attribute
+    cells = {}
+    name, depth = None, 0
+    with open(path, errors="replace") as f:
+        for line in f:
+            if name is None:
+                m = re.match(r"^\s*cell\s*\(\s*\"?([^\"\s)]+)\"?\s*\)", line)
+                if m:
+                    name, depth = m.group(1), 0
+                    cells[name] = {"area": float("nan"), "kind": "comb"}
+            if name is not None:
+                cell = cells[name]
+                # Cell level area (the cell group may be on one line)
+                m = re.search(r"(?:^|[{;])\s*area\s*:\s*([\d.eE+-]+)", line)
+                if m and depth <= 1:
+                    cell["area"] = float(m.group(1))
+                if re.match(r"^\s*(ff|ff_bank|latch|latch_bank)\s*\(", line):
+                    cell["kind"] = "seq" if cell["kind"] == "comb" else cell["kind"]
+                if "clock_gating_integrated_cell" in line:
+                    cell["kind"] = "icg"
+                depth += line.count("{") - line.count("}")
+                if depth <= 0 and "}" in line:
+                    name = None
+    return cells
+
+
+def cell_kind(cell, library=None):
+    if library and cell in library:
+        return library[cell]["kind"]
+    if ICG_CELLS.search(cell):
+        return "icg"
+    return "seq" if SEQ_CELLS.search(cell) else "comb"
+
+
+def histogram(net, library=None):
+    # Cell histogram of every module: count, kind and area (liberty area x count, NaN
+    # for cells missing from the library)
+    rows = []
+    for module in net.order:
+        for cell, count in sorted(net.cells[module].items()):
+            area = library[cell]["area"] if library and cell in library else float("nan")
+            rows.append(
+                {
+                    "module": module,
+                    "cell": cell,
+                    "kind": cell_kind(cell, library),
+                    "count": count,
+                    "area": area * count,
+                }
+            )
+    return pd.DataFrame(rows, columns=["module", "cell", "kind", "count", "area"])
+
+
+def module_totals(net, library=None):
+    # Cells and area per kind of every module, including its submodules (bottom-up, so
+    # every module is summed once however often it is instantiated). Areas are the sums
+    # of the cells in the library, the other cells are counted in unknown_cells
+    hist = histogram(net, library)
+    own = {}
+    for module, df in hist.groupby("module"):
+        row = {"cells": df["count"].sum(), "area": df["area"].sum()}
+        for kind in ("seq", "icg", "comb"):
+            part = df[df["kind"] == kind]
+            row[f"{kind}_cells"] = part["count"].sum()
+            row[f"{kind}_area"] = part["area"].sum()
+        row["unknown_cells"] = df["count"][df["area"].isna()].sum()
+        own[module] = row
+    columns = ["cells", "area", "seq_cells", "seq_area", "icg_cells", "icg_area"]
+    columns += ["comb_cells", "comb_area", "unknown_cells"]
+    totals = {}
+
+    def total(module, stack=()):
+        if module in totals:
+            return totals[module]
+        if module in stack:
+            raise ValueError(f"Recursive instantiation of {module}")
+        row = dict(own.get(module, dict.fromkeys(columns, 0)))
+        for sub, n in net.children[module].items():
+            for k, v in total(sub, stack + (module,)).items():
+                row[k] += n * v
+        totals[module] = row
+        return row
+
+    for module in net.order:
+        total(module)
+    return pd.DataFrame.from_dict(totals, orient="index", columns=columns)
+
+
+def hierarchy(net, library=None, depth=None, top=None):
+    # Totals of every instance path of the hierarchy below (top), down to (depth)
+    # levels. Paths of submodules instantiated n times in a module end with " x<n>",
+    # (copies) is the number of instances of the path in the design
+    totals = module_totals(net, library)
+    rows = []
+
+    def visit(module, path, level, copies):
+        rows.append({"path": path, "module": module, "depth": level, "copies": copies})
+        if depth is not None and level >= depth:
+            return
+        for sub, n in sorted(net.children[module].items()):
+            visit(sub, f"{path}/{sub}" + (f" x{n}" if n > 1 else ""), level + 1, copies * n)
+
+    top = top or net.top
+    if top is None:
+        return pd.DataFrame()
+    visit(top, top, 0, 1)
+    df = pd.DataFrame(rows).set_index("path")
+    # Totals of one instance, and the area of all copies of the path
+    df = df.join(totals, on="module")
+    df["total_area"] = df["area"] * df["copies"]
+    return df
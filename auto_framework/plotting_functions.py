@@ -24,8 +24,11 @@
 from imports import *
 from math import ceil
 import itertools, pylab
+import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
+import seaborn as sns
 
+plt.rcParams.update({'font.size': 12})
 sns.set_theme(context="talk", palette="bright", style="whitegrid")
 
 DESIGN_NAMES = [
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Hierarchical power tree for Auto Framework
+#           Parses the hierarchical (report power -verbose) and
+#           flat (report power -flat) sections of a power report
+#           into arrays: the parent index, depth and leakage,
+#           internal, switching and total power of every instance.
+#           Roll-ups at any depth and power groups of instance
+#           paths are array sums, without re-parsing the report
+# -----------------------------------------------------
+
+from imports import *
+
+logger = logging.getLogger("auto_L4")
+
+# Power columns of every node
+COLUMNS = ["leakage", "internal", "switching", "total"]
+# Columns of a section without a header line
+SUMMARY_HEADER = ["cells", "leakage", "internal", "switching", "net", "total"]
+DETAILS_HEADER = ["leakage", "dynamic", "total"]
+SECTION = re.compile(r"^#+ POWER - .* (SUMMARY|DETAILS)\s*$")
+ROW = re.compile(r"^(\s*)(\S+)\s+((?:[-+]?\d[\d.eE+-]*\s+)*[-+]?\d[\d.eE+-]*)\s*$")
+
+
+class PowerTree:
+    # Instances of a power report, parents before their children. (paths) are relative
+    # to the top instance (""), (values) is the power of every instance without its
+    # children (self power), one column per COLUMNS. Instances of the flat section only
+    # report their dynamic power, which is split in internal and switching power like
+    # the power of their parent
+    def __init__(self, top, paths, parent, values):
+        self.top = top
+        self.paths = np.asarray(paths, dtype=str)
+        self.parent = np.asarray(parent, dtype=np.int32)
+        self.values = np.asarray(values, dtype=float).reshape(len(self.paths), len(COLUMNS))
+        self.depth = np.zeros(len(self.paths), dtype=np.int32)
+        up = self.parent.copy()
+        while (up >= 0).any():
+            self.depth += up >= 0
+            up = np.where(up >= 0, self.parent[np.maximum(up, 0)], -1)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def levels(self):
+        # Node indices per depth, top first
+        return [np.flatnonzero(self.depth == d) for d in range(self.depth.max() + 1)]
+
+    def inclusive(self):
+        # Power of every instance with its children (the values of the report), NaN
+        # self powers count as 0
+        total = np.nan_to_num(self.values)
+        for idx in reversed(self.levels()[1:]):
+            np.add.at(total, self.parent[idx], total[idx])
+        return total
+
+    def ancestor(self, depth):
+        # Ancestor of every node at (depth), the node itself if it is not deeper
+        anc = np.arange(len(self))
+        for _ in range(self.depth.max() - depth):
+            anc = np.where(self.depth[anc] > depth, self.parent[anc], anc)
+        return anc
+
+    def rollup(self, depth):
+        # Power of every instance up to (depth): the instances at (depth) with all their
+        # children, the ones above it without their children. Sums to the total power
+        anc = self.ancestor(depth)
+        power = np.zeros_like(self.values)
+        np.add.at(power, anc, np.nan_to_num(self.values))
+        keep = self.depth <= depth
+        df = pd.DataFrame(power[keep], columns=COLUMNS, index=self.paths[keep])
+        df.insert(0, "depth", self.depth[keep])
+        df.index = [p or self.top for p in df.index]
+        df.index.name = "path"
+        return df
+
+    def group(self, pattern):
+        # Power of the instances whose path matches (pattern) with all their children.
+        # Matches below a match are not counted twice
+        regex = re.compile(pattern)
+        match = np.array([bool(p) and bool(regex.search(p)) for p in self.paths])
+        covered = np.zeros(len(self), dtype=bool)
+        for idx in self.levels()[1:]:
+            covered[idx] = match[self.parent[idx]] | covered[self.parent[idx]]
+        return self.inclusive()[match & ~covered].sum(axis=0)
+
+    def groups(self, patterns):
+        # Power of every group {name: pattern}, one row per COLUMNS
+        return pd.DataFrame({k: self.group(p) for k, p in patterns.items()}, index=COLUMNS)
+
+    def save(self, path):
+        np.savez_compressed(
+            path, top=self.top, paths=self.paths, parent=self.parent, values=self.values
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(str(data["top"]), data["paths"], data["parent"], data["values"])
+
+
+def header(line):
+    # Column names of a header line, e.g. "Instance Cells Leakage(nW) Internal(nW) ..."
+    names = re.sub(r"\(.*?\)|power", " ", line.lower()).split()
+    return names[1:]
+
+
+def columns(names, numbers):
+    # Reported values of a row as COLUMNS (NaN if not reported)
+    row = dict(zip(names, numbers))
+    values = [row.get(k, np.nan) for k in COLUMNS]
+    if np.isnan(values[3]):
+        values[3] = sum(v for k, v in row.items() if k not in ("cells", "net", "total"))
+    return values
+
+
+def parse(path):
+    # Power tree of the report at (path). The hierarchical section gives the instances
+    # (nested by indentation) with the power of their children included, the flat
+    # section adds its instances below the deepest hierarchical instance of their path
+    top, paths, parent, reported = None, [], [], []
+    index = {}
+    section, names, stack = None, None, []
+    with open(path, errors="replace") as f:
+        for line in f:
+            m = SECTION.match(line)
+            if m:
+                # Only the first window of a report with several
+                if m.group(1) == "SUMMARY" and top is not None:
+                    break
+                section = m.group(1)
+                names = SUMMARY_HEADER if section == "SUMMARY" else DETAILS_HEADER
+                stack = []
+                continue
+            if section is None or not line.strip():
+                continue
+            if line.lstrip().startswith("Instance"):
+                names = header(line)
+                continue
+            m = ROW.match(line)
+            if not m:
+                continue
+            indent, name = len(m.group(1)), m.group(2)
+            try:
+                numbers = [float(v) for v in m.group(3).split()]
+            except ValueError:
+                continue
+            if section == "SUMMARY":
+                while stack and stack[-1][0] >= indent:
+                    stack.pop()
+                if not stack:
+                    if top is not None:
+                        # A second top instance
+                        continue
+                    top, node, up = name, "", -1
+                else:
+                    up = stack[-1][1]
+                    node = f"{paths[up]}/{name}" if paths[up] else name
+                stack.append((indent, len(paths)))
+            else:
+                if top is None or name in index:
+                    continue
+                # Deepest hierarchical instance of the path
+                node, up = name, 0
+                parts = name.split("/")
+                for k in range(len(parts) - 1, 0, -1):
+                    if "/".join(parts[:k]) in index:
+                        up = index["/".join(parts[:k])]
+                        break
+            index[node] = len(paths)
+            paths.append(node)
+            parent.append(up)
+            reported.append(columns(names, numbers))
+    if top is None:
+        raise ValueError(f"No power summary in {path}")
+    reported = np.array(reported, dtype=float)
+    parent = np.array(parent)
+    # Flat instances only report their dynamic power. Split it like the internal and
+    # switching power of their parent (parents come first), so that it is subtracted
+    # from both columns of the parent and every row adds up to its total
+    for i in np.flatnonzero(np.isnan(reported[:, 1]) & np.isnan(reported[:, 2])):
+        share = reported[parent[i], 1:3] if i else np.full(2, np.nan)
+        if np.isfinite(share).all() and share.sum() > 0:
+            dynamic = reported[i, 3] - np.nan_to_num(reported[i, 0])
+            reported[i, 1:3] = dynamic * share / share.sum()
+    # Self power: the reported power without the reported power of the children
+    children = np.zeros_like(reported)
+    np.add.at(children, parent[1:], np.nan_to_num(reported[1:]))
+    return PowerTree(top, paths, parent, reported - children)
+
+
+def merge(trees, weights):
+    # Weighted mean power tree of (trees) of the same design (e.g. sharded simulations).
+    # Instances missing from a tree count as 0 in it
+    paths, parent, up = [], [], {}
+    for tree in trees:
+        for p, i in zip(tree.paths, tree.parent):
+            if p not in up:
+                up[p] = tree.paths[i] if i >= 0 else None
+                paths.append(p)
+    index = {p: i for i, p in enumerate(paths)}
+    parent = [index[up[p]] if up[p] is not None else -1 for p in paths]
+    values = np.zeros((len(paths), len(COLUMNS)))
+    for tree, w in zip(trees, weights):
+        rows = np.array([index[p] for p in tree.paths])
+        values[rows] += w * np.nan_to_num(tree.values)
+    return PowerTree(trees[0].top, paths, parent, values / sum(weights))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Progress reporting for Auto Framework
+#           Tracks the finished, running and failed jobs of every
+#           phase of a benchmark run, and writes their throughput
+#           and ETA to a status file
+# -----------------------------------------------------
+
+from imports import *
+from collections import deque
+import supervisor
+import journal
+
+logger = logging.getLogger("auto_L4")
+
+# Jobs faster than this (s) were skipped (e.g. journal cache hits), and are left out
+# of the throughput
+MIN_DURATION = 1.0
+# Number of recent jobs per phase the throughput is computed from
+WINDOW = 20
+
+
+def clock(t):
+    return time.strftime("%a %d/%m %H:%M", time.localtime(t))
+
+
+class Phase:
+    # Jobs of one phase (e.g. synthesis): counts and (start, end) of recent jobs
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.running = 0
+        self.recent = deque(maxlen=WINDOW)
+
+    def throughput(self):
+        # Jobs per second over the recent jobs (includes the concurrency of the phase)
+        if not self.recent:
+            return None
+        start = min(s for s, _ in self.recent)
+        end = max(e for _, e in self.recent)
+        return len(self.recent) / max(end - start, MIN_DURATION)
+
+    def eta(self):
+        # Seconds until all jobs of the phase are finished, None if not known yet
+        remaining = self.total - self.done - self.failed
+        if remaining <= 0:
+            return 0
+        rate = self.throughput()
+        return remaining / rate if rate else None
+
+
+class Progress:
+    # Progress of a benchmark run, written to (status_file) every (interval) s and
+    # logged every (log_interval) s (None: never) while report() runs. With a
+    # (deadline) (epoch time, e.g. the end of the license window) the status tells if
+    # the run is expected to finish in time
+    def __init__(self, status_file, interval=30, log_interval=None, deadline=None):
+        self.status_file = status_file
+        self.interval = interval
+        self.log_interval = log_interval
+        self.deadline = deadline
+        self.start = time.time()
+        self.phases = {}
+
+    def add(self, phase, total):
+        # Phases are run one after the other, in the order they are added
+        self.phases.setdefault(phase, Phase(0)).total += total
+
+    async def track(self, phase, coro):
+        # Await the job (coro) of (phase), and count it. Jobs return their journal state
+        # (or a result): failed jobs return None (e.g. remote jobs, see workqueue.py) or
+        # journal.FAILED. Jobs skipped because a job they depend on failed
+        # (journal.SKIPPED) count as failed, but are left out of the throughput
+        p = self.phases[phase]
+        p.running += 1
+        start = time.time()
+        try:
+            result = await coro
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            p.failed += 1
+            raise
+        else:
+            if result is None or result in (journal.FAILED, journal.SKIPPED):
+                p.failed += 1
+            else:
+                p.done += 1
+            if result != journal.SKIPPED and time.time() - start >= MIN_DURATION:
+                p.recent.append((start, time.time()))
+            return result
+        finally:
+            p.running -= 1
+
+    def eta(self):
+        # Seconds until all added phases are finished, None if not known yet. Phases
+        # without throughput yet are estimated with the throughput of the running phase
+        eta, rate = 0, None
+        for p in self.phases.values():
+            phase_eta = p.eta()
+            if phase_eta is None:
+                if rate is None:
+                    return None
+                phase_eta = (p.total - p.done - p.failed) / rate
+            eta += phase_eta
+            rate = p.throughput() or rate
+        return eta
+
+    def status(self):
+        now = time.time()
+        elapsed = timedelta(seconds=round(now - self.start))
+        lines = [f"Benchmark run started {clock(self.start)}, running for {elapsed}"]
+        for name, p in self.phases.items():
+            rate = p.throughput()
+            eta = p.eta()
+            line = f"  {name:<12} {p.done + p.failed:>4}/{p.total} done"
+            line += f", {p.running} in progress, {p.failed} failed"
+            if rate:
+                line += f", {rate * 3600:.1f} jobs/h"
+            if eta:
+                line += f", ETA {timedelta(seconds=round(eta))}"
+            lines.append(line)
+        tools = supervisor.running()
+        if tools:
+            lines.append(
+                "  Tools running: " + ", ".join(f"{n} {s}" for s, n in sorted(tools.items()))
+            )
+        eta = self.eta()
+        if eta is None:
+            lines.append("Expected end: unknown (no job finished yet)")
+        else:
+            line = f"Expected end: {clock(now + eta)}"
+            if self.deadline:
+                late = now + eta > self.deadline
+                line += f" - deadline {clock(self.deadline)}: {'LATE' if late else 'on time'}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def write(self):
+        # Replace the status file at once, readers never see a partial status
+        tmp = f"{self.status_file}.tmp"
+        with open(tmp, "w") as f:
+            f.write(f"{self.status()}\n")
+        os.replace(tmp, self.status_file)
+
+    async def report(self):
+        # Keep the status file up to date, until cancelled
+        last_log = time.time()
+        try:
+            while True:
+                self.write()
+                if self.log_interval and time.time() - last_log >= self.log_interval:
+                    logger.info(f"Progress:\n{self.status()}")
+                    last_log = time.time()
+                await asyncio.sleep(self.interval)
+        finally:
+            self.write()
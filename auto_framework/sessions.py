@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Persistent tool sessions for Auto Framework
+#           Keeps genus processes open across jobs, so the
+#           license checkout, tool start-up and library loading
+#           are paid once per session instead of once per job.
+#           Jobs are sent as Tcl over stdin, the design state is
+#           reset between jobs, and sessions which crashed, were
+#           killed or ran too many jobs are replaced
+# -----------------------------------------------------
+
+from imports import *
+import supervisor
+
+logger = logging.getLogger("auto_L4")
+
+# Printed by a session at the end of every job: <MARKER> <job> <return code>
+MARKER = "@@AUTO_SESSION_DONE"
+# A session is replaced after this many jobs (bounds leaks in long-lived tools)
+MAX_JOBS = 50
+
+# Defined in every session before its first job. Sources the scripts of a job in the
+# global scope, resets the design state (like the power scripts do at their end) and
+# prints the end marker
+PROLOGUE = f"""proc auto_job {{job scripts}} {{
+    set rc 0
+    foreach script $scripts {{
+        if {{[catch {{uplevel #0 [list source $script]}} msg]}} {{
+            puts "Error   : $msg"
+            set rc 1
+            break
+        }}
+    }}
+    catch {{delete_obj /designs/*}}
+    puts "{MARKER} $job $rc"
+    flush stdout
+}}
+"""
+
+# Session pools per stage, see add_pool()
+_pools = {}
+
+
+class Session(supervisor.Job):
+    # A long-lived tool process (argv) which runs one job (Tcl scripts) at a time. The
+    # (setup) Tcl (e.g. loading the library) runs before its first job, and its output
+    # goes to the log of that job
+    def __init__(self, argv, kind, setup="", mem=None):
+        super().__init__(argv, f"{kind} session", mem=mem, slot=f"{kind} session", pipe=True)
+        self.setup = setup
+        self.jobs = 0
+        self.out = None
+        self.done = None
+        self.reader = None
+
+    async def start(self):
+        await super().start()
+        self.reader = asyncio.create_task(self._read())
+        return self
+
+    @property
+    def alive(self):
+        return self.proc.returncode is None and self.reason is None
+
+    def _line(self, line):
+        if MARKER.encode() in line:
+            # Interactive tools may print their prompt in front of the marker
+            job, rc = line.decode(errors="replace").split(MARKER)[1].split()[:2]
+            if self.done and not self.done.done() and int(job) == self.jobs:
+                self.done.set_result(int(rc))
+        elif self.out:
+            self.out.write(line)
+            self.out.flush()
+
+    async def _read(self):
+        # The tool output goes to the log of the running job, up to its end marker
+        rest = b""
+        while True:
+            data = await self.proc.stdout.read(1 << 16)
+            if not data:
+                break
+            lines = (rest + data).split(b"\n")
+            rest = lines.pop()
+            for line in lines:
+                self._line(line + b"\n")
+            if len(rest) > supervisor.MAX_LINE:
+                self._line(rest)
+                rest = b""
+        if rest:
+            self._line(rest)
+        await self.proc.wait()
+        self._unregister()
+        # Crashed or killed session: the running job ends without a return code
+        if self.done and not self.done.done():
+            self.done.set_result(None)
+
+    async def _send(self, tcl):
+        self.proc.stdin.write(tcl.encode())
+        await self.proc.stdin.drain()
+
+    async def run(self, scripts, stage="", cwd=".", timeout=None, log=None, fatal=(), error=()):
+        # Run the Tcl (scripts) in (cwd), within the (timeout) and log patterns of
+        # supervisor.Job, and return the ExitStatus of the job. A job which exceeds its
+        # limits, or is interrupted, kills the session
+        self.jobs += 1
+        self.stage = stage
+        path = os.path.join(cwd, log) if log else os.devnull
+        watcher = supervisor.LogWatcher(path, fatal, error) if log else None
+        start, cpu = time.time(), self.cpu_time or 0
+        self.done = asyncio.get_running_loop().create_future()
+        tcl = PROLOGUE + self.setup if self.jobs == 1 else ""
+        tcl += f"cd {{{os.path.abspath(cwd)}}}\n"
+        tcl += f"auto_job {self.jobs} {{{' '.join(f'{{{s}}}' for s in scripts)}}}\n"
+        self.out = open(path, "ab")
+        try:
+            await self._send(tcl)
+            while not self.done.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(self.done), supervisor.POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                if self.done.done():
+                    break
+                self._sample_memory()
+                self._sample_cpu()
+                if timeout and time.time() - start > timeout:
+                    await self.cancel("timeout")
+                elif watcher and watcher.update():
+                    await self.cancel(f"fatal log message: {watcher.fatal_line.strip()}")
+            rc = self.done.result()
+        except (BrokenPipeError, ConnectionResetError):
+            # The session exited before the job was sent
+            await self.proc.wait()
+            rc = None
+        except BaseException:
+            await self.cancel("interrupted")
+            raise
+        finally:
+            self.out.close()
+            self.out = None
+        self._sample_cpu()
+        reason = self.reason
+        if rc is None and reason is None:
+            reason = f"session exited with code {self.proc.returncode}"
+        if watcher and watcher.close() and reason is None:
+            reason = f"fatal log message: {watcher.fatal_line.strip()}"
+        return supervisor.ExitStatus(
+            self.argv + list(scripts),
+            stage,
+            rc if rc is not None else self.proc.returncode or -1,
+            time.time() - start,
+            reason,
+            watcher,
+            self.peak_mem,
+            start,
+            0,
+            round((self.cpu_time or 0) - cpu, 2) if self.cpu_time is not None else None,
+        )
+
+    async def close(self):
+        if self.alive:
+            try:
+                await self._send("exit\n")
+                await asyncio.wait_for(self.proc.wait(), supervisor.KILL_GRACE)
+            except (BrokenPipeError, ConnectionResetError, asyncio.TimeoutError):
+                await self.cancel("closed")
+        if self.reader:
+            await asyncio.gather(self.reader, return_exceptions=True)
+
+
+class SessionPool:
+    # Idle sessions of one stage (kind). Every job holds the concurrency slot of its
+    # stage, so there are never more sessions than slots
+    def __init__(self, kind, argv, setup="", max_jobs=MAX_JOBS):
+        self.kind = kind
+        self.argv = argv
+        self.setup = setup
+        self.max_jobs = max_jobs
+        self.idle = []
+        self.started = 0
+
+    async def run(self, scripts, stage="", slot=None, mem=None, **limits):
+        # Same limits as supervisor.Job (cwd, timeout, mem, log, fatal, error, slot).
+        # (mem) limits the whole session
+        slot = supervisor.slot(slot)
+        queued = time.time()
+        if slot:
+            await slot.acquire()
+        try:
+            queue_wait = time.time() - queued
+            session = None
+            while self.idle and session is None:
+                session = self.idle.pop()
+                if not session.alive:
+                    session = None
+            if session is None:
+                session = await Session(self.argv, self.kind, self.setup, mem).start()
+                self.started += 1
+            status = await session.run(scripts, stage, **limits)
+            status.queue_wait = queue_wait
+            if session.alive and session.jobs < self.max_jobs:
+                self.idle.append(session)
+            else:
+                await session.close()
+        finally:
+            if slot:
+                slot.release()
+        if not status.ok:
+            logger.warning(f"  {status}")
+            for message in status.messages:
+                logger.warning(f"    {message}")
+        return status
+
+    async def close(self):
+        sessions, self.idle = self.idle, []
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+
+def add_pool(kind, argv, setup="", max_jobs=MAX_JOBS):
+    # Run the jobs of stage (kind) in persistent sessions of (argv)
+    _pools[kind] = SessionPool(kind, argv, setup, max_jobs)
+
+
+def enabled(kind):
+    return kind in _pools
+
+
+async def run(kind, scripts, stage="", **limits):
+    # Run the Tcl (scripts) in a session of (kind), and return its ExitStatus
+    return await _pools[kind].run(scripts, stage, **limits)
+
+
+async def close_all():
+    # Exit all idle sessions, and log how many sessions every pool started
+    for kind, pool in _pools.items():
+        await pool.close()
+        logger.info(f"{kind}: {pool.started} tool sessions started")
+    _pools.clear()
@@ -0,0 +1,473 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Subprocess supervisor for Auto Framework
+#           Runs every tool (genus, vsim, sed) from one asyncio
+#           event loop, in its own process group and working
+#           directory, with a wall-time and memory limit and a
+#           per-stage concurrency limit. Only kills the process
+#           trees it started. Tool logs are tailed while they are
+#           written, and jobs are failed early on error patterns
+# -----------------------------------------------------
+
+from imports import *
+
+logger = logging.getLogger("auto_L4")
+
+# Seconds between SIGTERM and SIGKILL when a process group is cancelled
+KILL_GRACE = 10
+# Seconds between two checks of a running job (timeout and log)
+POLL_INTERVAL = 1.0
+# Log lines longer than this are cut (constant memory for tools printing huge lines)
+MAX_LINE = 4096
+# Number of matched error lines kept in the ExitStatus
+MAX_MESSAGES = 5
+
+# Process groups started by this process (pgid -> Job), used to cancel all of them
+# on shutdown
+_jobs = {}
+# Concurrency limit per stage (stage -> asyncio.Semaphore), see set_slots()
+_slots = {}
+# Disk admission control of jobs writing large files, see set_disk_budget()
+_disk = None
+# Seconds between two admission checks of a job waiting for disk space
+DISK_POLL = 10
+
+
+class LogWatcher:
+    # Tail a log file while a tool appends to it, and match every new line against
+    # (fatal) and (error) regex patterns. Only the unfinished last line is buffered
+    def __init__(self, path, fatal=(), error=()):
+        self.path = path
+        self.fatal = [re.compile(p) for p in fatal]
+        self.error = [re.compile(p) for p in error]
+        # Logs are appended to (>>), only watch what the job writes
+        self.offset = os.path.getsize(path) if os.path.exists(path) else 0
+        self.rest = ""
+        self.errors = 0
+        self.messages = []
+        self.fatal_line = None
+
+    def _match(self, line):
+        if any(p.search(line) for p in self.fatal):
+            self.fatal_line = self.fatal_line or line
+        elif any(p.search(line) for p in self.error):
+            self.errors += 1
+        else:
+            return
+        if len(self.messages) < MAX_MESSAGES:
+            self.messages.append(line.strip())
+
+    def update(self):
+        # Match the lines appended since the last call. Returns the first fatal line
+        try:
+            with open(self.path, "r", errors="replace") as f:
+                f.seek(self.offset)
+                while True:
+                    data = f.read(1 << 16)
+                    if not data:
+                        break
+                    lines = (self.rest + data).split("\n")
+                    self.rest = lines.pop()[-MAX_LINE:]
+                    for line in lines:
+                        self._match(line[:MAX_LINE])
+                self.offset = f.tell()
+        except OSError:
+            pass
+        return self.fatal_line
+
+    def close(self):
+        # The tool exited, its last line is complete
+        self.update()
+        if self.rest:
+            self._match(self.rest)
+            self.rest = ""
+        return self.fatal_line
+
+
+class ExitStatus:
+    # Structured exit status of a supervised job
+    def __init__(
+        self,
+        argv,
+        stage,
+        returncode,
+        duration,
+        reason=None,
+        watcher=None,
+        peak_mem=None,
+        start=None,
+        queue_wait=0,
+        cpu_time=None,
+    ):
+        self.argv = argv
+        self.stage = stage
+        self.returncode = returncode
+        self.start = start
+        self.duration = duration
+        # Seconds spent waiting for a slot of the stage before the tool started
+        self.queue_wait = queue_wait
+        # Peak resident memory (GB) and CPU time (s) of the tool process, sampled
+        # while it ran
+        self.peak_mem = peak_mem
+        self.cpu_time = cpu_time
+        # None if the job exited by itself, else why it was cancelled (e.g. "timeout")
+        self.reason = reason
+        # Error lines found in the log of the job
+        self.errors = watcher.errors if watcher else 0
+        self.messages = watcher.messages if watcher else []
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and self.reason is None and self.errors == 0
+
+    @property
+    def signal(self):
+        # Signal that killed the job (negative return codes of subprocess)
+        return -self.returncode if self.returncode and self.returncode < 0 else None
+
+    def as_dict(self):
+        return {
+            "stage": self.stage,
+            "returncode": self.returncode,
+            "signal": self.signal,
+            "reason": self.reason,
+            "errors": self.errors,
+            "messages": self.messages,
+            "duration": round(self.duration, 1),
+            "queue_wait": round(self.queue_wait, 1),
+            "cpu_time": self.cpu_time,
+            "peak_mem": self.peak_mem,
+        }
+
+    def __str__(self):
+        if self.ok:
+            state = "ok"
+        elif self.reason or self.returncode:
+            state = self.reason or f"exit code {self.returncode}"
+        else:
+            state = f"{self.errors} errors in log"
+        return f"{self.stage or 'job'}: {state} after {timedelta(seconds=round(self.duration))}"
+
+
+class Job:
+    # A tool (argv) running in its own process group (session) in directory (cwd),
+    # with an optional wall-time limit (timeout, in s) and virtual memory limit (mem,
+    # in GB). At most (set_slots) jobs of the same (slot) run at once
+    # If a (log) file is given, the tool output is appended to it, and it is watched
+    # for (fatal) patterns, which cancel the job immediately, and (error) patterns,
+    # which fail the job once it exits. With (pipe), the stdin and output of the tool
+    # are pipes instead (see sessions.py)
+    def __init__(
+        self,
+        argv,
+        stage="",
+        cwd=".",
+        timeout=None,
+        mem=None,
+        log=None,
+        fatal=(),
+        error=(),
+        slot=None,
+        pipe=False,
+    ):
+        self.argv = [str(a) for a in argv]
+        self.stage = stage
+        self.cwd = cwd
+        self.timeout = timeout
+        self.mem = mem
+        self.log = os.path.join(cwd, log) if log else None
+        self.watcher = LogWatcher(self.log, fatal, error) if log else None
+        self.kind = slot
+        self.slot = _slots.get(slot)
+        self.pipe = pipe
+        self.proc = None
+        self.reason = None
+        self.start_time = None
+        self.queue_wait = 0
+        self.peak_mem = None
+        self.cpu_time = None
+
+    async def start(self):
+        queued = time.time()
+        if self.slot:
+            await self.slot.acquire()
+        self.queue_wait = time.time() - queued
+        argv = self.argv
+        if self.mem:
+            # ulimit in a shell which then replaces itself with the tool
+            argv = ["sh", "-c", f'ulimit -v {int(self.mem * 1024 ** 2)}; exec "$@"', "sh"]
+            argv += self.argv
+        try:
+            with open(self.log, "ab") if self.log else open(os.devnull, "wb") as out:
+                self.proc = await asyncio.create_subprocess_exec(
+                    *argv,
+                    cwd=self.cwd,
+                    stdin=asyncio.subprocess.PIPE if self.pipe else asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE if self.pipe else out,
+                    stderr=asyncio.subprocess.STDOUT,
+                    start_new_session=True,
+                )
+        except BaseException:
+            self.release()
+            raise
+        self.start_time = time.time()
+        _jobs[self.proc.pid] = self
+        return self
+
+    def release(self):
+        # Free the slot of the job (once). wait() does this itself, callers which poll()
+        # the job and stop on an exception before wait() must release it
+        if self.slot:
+            self.slot.release()
+            self.slot = None
+
+    def _unregister(self):
+        # The process exited, cancel_all() no longer has to kill it
+        _jobs.pop(self.proc.pid, None)
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def _sample_memory(self):
+        # High water mark of the resident memory of the tool (Linux only)
+        try:
+            with open(f"/proc/{self.proc.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        mem = int(line.split()[1]) / 1024 ** 2
+                        self.peak_mem = round(max(self.peak_mem or 0, mem), 3)
+                        break
+        except OSError:
+            pass
+
+    def _sample_cpu(self):
+        # User and system time of the tool and its exited children (Linux only)
+        try:
+            with open(f"/proc/{self.proc.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            ticks = sum(int(t) for t in fields[11:15])
+            self.cpu_time = round(ticks / os.sysconf("SC_CLK_TCK"), 2)
+        except (OSError, IndexError, ValueError):
+            pass
+
+    async def poll(self):
+        # Return code, or None while running. Cancels the job once it exceeds its
+        # timeout, or once a fatal pattern shows up in its log
+        if self.proc.returncode is None:
+            self._sample_memory()
+            self._sample_cpu()
+            if self.timeout and self.elapsed() > self.timeout:
+                await self.cancel("timeout")
+            elif self.watcher and self.watcher.update():
+                await self.cancel(f"fatal log message: {self.watcher.fatal_line.strip()}")
+        return self.proc.returncode
+
+    async def cancel(self, reason="cancelled"):
+        # Terminate the whole process tree of the job, and nothing else
+        if self.proc.returncode is not None:
+            return
+        self.reason = self.reason or reason
+        logger.warning(f"  {self.stage or self.argv[0]}: {reason}, killing process group")
+        try:
+            os.killpg(self.proc.pid, signal.SIGTERM)
+            await asyncio.wait_for(self.proc.wait(), KILL_GRACE)
+        except asyncio.TimeoutError:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+            await self.proc.wait()
+        except ProcessLookupError:
+            pass
+
+    async def wait(self):
+        # Wait for the job (within its limits), and return its ExitStatus
+        try:
+            while await self.poll() is None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(self.proc.wait()), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # Cancelled or interrupted run: don't leave the tool running
+            await self.cancel("interrupted")
+            raise
+        finally:
+            self.release()
+        return self.status()
+
+    def status(self):
+        self._unregister()
+        if self.watcher and self.watcher.close() and self.reason is None:
+            # Fatal message in the last lines, written right before the tool exited
+            self.reason = f"fatal log message: {self.watcher.fatal_line.strip()}"
+        return ExitStatus(
+            self.argv,
+            self.stage,
+            self.proc.returncode,
+            self.elapsed(),
+            self.reason,
+            self.watcher,
+            self.peak_mem,
+            self.start_time,
+            self.queue_wait,
+            self.cpu_time,
+        )
+
+
+async def run(argv, stage="", **limits):
+    # Run (argv) to completion and return its ExitStatus (see Job for the limits)
+    job = await Job(argv, stage, **limits).start()
+    status = await job.wait()
+    if not status.ok:
+        logger.warning(f"  {status}")
+        for message in status.messages:
+            logger.warning(f"    {message}")
+    return status
+
+
+def running():
+    # Number of running tools per stage
+    counts = {}
+    for job in _jobs.values():
+        counts[job.kind or "other"] = counts.get(job.kind or "other", 0) + 1
+    return counts
+
+
+def slot(stage):
+    # Concurrency limit of (stage), None if it has none
+    return _slots.get(stage)
+
+
+def set_slots(slots):
+    # Concurrency limit per stage, e.g. {"syn": 4, "vsim": 16}. Has to be called from
+    # the running event loop
+    _slots.clear()
+    _slots.update({stage: asyncio.Semaphore(n) for stage, n in slots.items()})
+
+
+class DiskBudget:
+    # Admission control for jobs which write a large file (e.g. a VCD file) under
+    # (path). A job is admitted once its estimated size fits in the free disk space
+    # minus (margin), and in (budget) bytes used under (path) if given. Running jobs
+    # count with the part of their estimate which they did not write yet. Jobs
+    # waiting for space don't block smaller jobs which fit
+    def __init__(self, path, budget=None, margin=0):
+        self.path = path
+        self.budget = budget
+        self.margin = margin
+        self.reservations = {}
+        self.released = asyncio.Condition()
+        self.used_cache = (0, 0)
+
+    def pending(self):
+        # Bytes the running jobs are still expected to write
+        total = 0
+        for nbytes, file in self.reservations.values():
+            try:
+                total += max(nbytes - os.path.getsize(file), 0)
+            except OSError:
+                total += nbytes
+        return total
+
+    def used(self):
+        # Bytes used under (path), recomputed at most every DISK_POLL seconds
+        if time.time() - self.used_cache[0] > DISK_POLL:
+            total = 0
+            for root, _, files in os.walk(self.path):
+                for f in files:
+                    try:
+                        total += os.path.getsize(os.path.join(root, f))
+                    except OSError:
+                        pass
+            self.used_cache = (time.time(), total)
+        return self.used_cache[1]
+
+    def fits(self, nbytes):
+        pending = self.pending()
+        if nbytes + pending + self.margin > shutil.disk_usage(self.path).free:
+            return False
+        return self.budget is None or self.used() + pending + nbytes <= self.budget
+
+    async def reserve(self, nbytes, file, label=""):
+        # Wait until (nbytes) for (file) fit, and return a reservation token
+        waited = 0
+        while not self.fits(nbytes):
+            if not self.reservations:
+                # Nothing running will free space: waiting can only hang the phase
+                logger.warning(
+                    f"  {label}: estimated {nbytes / 1024 ** 3:.1f} GB exceed the free disk "
+                    f"space or budget, starting anyway"
+                )
+                break
+            if waited % 60 == 0:
+                logger.info(
+                    f"  {label}: waiting for {nbytes / 1024 ** 3:.1f} GB of disk space"
+                )
+            async with self.released:
+                try:
+                    await asyncio.wait_for(self.released.wait(), DISK_POLL)
+                except asyncio.TimeoutError:
+                    pass
+            waited += DISK_POLL
+        token = object()
+        self.reservations[token] = (nbytes, file)
+        return token
+
+    async def release(self, token):
+        self.reservations.pop(token, None)
+        self.used_cache = (0, 0)
+        async with self.released:
+            self.released.notify_all()
+
+
+def set_disk_budget(path, budget=None, margin=0):
+    # Has to be called from the running event loop
+    global _disk
+    _disk = DiskBudget(path, budget, margin)
+
+
+async def reserve_disk(nbytes, file, label=""):
+    # Reservation token, None without disk admission control
+    return await _disk.reserve(nbytes, file, label) if _disk else None
+
+
+async def release_disk(token):
+    if _disk and token is not None:
+        await _disk.release(token)
+
+
+def cancel_all(reason="cancelled"):
+    # Kill all process groups started by this process, outside of the event loop
+    # (e.g. when the loop itself was interrupted)
+    jobs = [job for job in _jobs.values() if job.proc.returncode is None]
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        for job in jobs:
+            if sig == signal.SIGTERM:
+                logger.warning(f"  {job.stage or job.argv[0]}: {reason}, killing process group")
+            try:
+                os.killpg(job.proc.pid, sig)
+            except ProcessLookupError:
+                pass
+        if jobs and sig == signal.SIGTERM:
+            time.sleep(1)
+    _jobs.clear()
+
+
+def cancel_on_sigterm():
+    # SIGTERM cancels the running main task, which cancels all running jobs
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Performance timeline for Auto Framework
+#           Records every tool run, cache hit/miss and report
+#           parse of a benchmark run as JSON lines, exports them
+#           to the Chrome trace format and summarises where the
+#           time went
+# -----------------------------------------------------
+
+from imports import *
+from contextlib import contextmanager
+import contextvars
+import journal
+
+logger = logging.getLogger("auto_L4")
+
+# Timeline file and id of the current run, see start()
+_file = None
+_run = None
+# Run of the jobs of the current task and the tasks it starts, see set_job_run()
+_job_run = contextvars.ContextVar("job_run", default=None)
+
+
+def start(timeline_file, run=None):
+    # Start recording the current run (or (run)) to (timeline_file). Returns the run id
+    global _file, _run
+    _file = timeline_file
+    _run = run or time.strftime("%Y-%m-%d_%H:%M:%S", time.localtime())
+    return _run
+
+
+def set_job_run(run):
+    # Record the events of the current task under (run) instead of the current run,
+    # e.g. a job a worker runs for a coordinator (see workqueue.py). Concurrent jobs of
+    # different runs each keep their own run
+    _job_run.set(run)
+
+
+def family(des):
+    # Design family: name up to its L4 mode (e.g. BG_L2, BG_BS, BITFUSION)
+    return des.split("_L4")[0]
+
+
+def event(cat, name, ts, dur=0, **args):
+    # Append one event of category (cat), started at (ts) and (dur) s long
+    if _file is None:
+        return
+    journal.append(
+        _file,
+        {
+            "run": _job_run.get() or _run,
+            "cat": cat,
+            "name": name,
+            "ts": round(ts, 3),
+            "dur": round(dur, 3),
+            **args,
+        },
+    )
+
+
+def label(des, clk, prec):
+    # Event name of a job (clock-independent stages have no clock)
+    if isinstance(clk, (list, tuple)):
+        clk = journal.clk_label(clk)
+    return f"{des if clk is None else f'{des}/{clk}'} {prec or ''}".strip()
+
+
+def job(stage, des, clk, prec, status, **extra):
+    # A supervised tool run of (stage), from its ExitStatus
+    event(
+        stage,
+        label(des, clk, prec),
+        status.start or time.time() - status.duration,
+        status.duration,
+        design=des,
+        clk=clk,
+        prec=prec,
+        ok=status.ok,
+        queue_wait=status.queue_wait,
+        cpu=status.cpu_time,
+        peak_mem=status.peak_mem,
+        **extra,
+    )
+
+
+def cache(stage, des, clk, prec, hit):
+    # Journal lookup of a stage: a hit skips the stage
+    event(
+        "cache",
+        f"{stage} {label(des, clk, prec)}",
+        time.time(),
+        stage=stage,
+        design=des,
+        clk=clk,
+        prec=prec,
+        hit=hit,
+    )
+
+
+@contextmanager
+def span(cat, name, **args):
+    # Time the Python code in the with block (e.g. report parsing)
+    ts = time.time()
+    try:
+        yield
+    finally:
+        event(cat, name, ts, time.time() - ts, **args)
+
+
+def load(timeline_file, run=None):
+    # Events of (run), by default the current run, else the last run in the file
+    entries = list(journal.read(timeline_file))
+    run = run or _run or (entries[-1]["run"] if entries else None)
+    return [e for e in entries if e["run"] == run]
+
+
+def lanes(entries):
+    # Row per event so overlapping events of a category don't share a row
+    ends, rows = {}, []
+    for e in entries:
+        free = ends.setdefault(e["cat"], [])
+        for row, end in enumerate(free):
+            if end <= e["ts"]:
+                break
+        else:
+            row = len(free)
+            free.append(0)
+        free[row] = e["ts"] + e["dur"]
+        rows.append(row)
+    return rows
+
+
+def chrome_trace(entries, trace_file):
+    # Write (entries) in the Chrome trace event format (chrome://tracing, Perfetto):
+    # one process per category, one thread per row of concurrent events
+    entries = sorted(entries, key=lambda e: e["ts"])
+    if not entries:
+        return
+    t0 = entries[0]["ts"]
+    pids = {cat: i + 1 for i, cat in enumerate(dict.fromkeys(e["cat"] for e in entries))}
+    events = [
+        {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": cat}}
+        for cat, pid in pids.items()
+    ]
+    for e, row in zip(entries, lanes(entries)):
+        trace = {
+            "name": e["name"],
+            "cat": e["cat"],
+            "pid": pids[e["cat"]],
+            "tid": row,
+            "ts": round((e["ts"] - t0) * 1e6),
+            "args": {k: v for k, v in e.items() if k not in ("run", "cat", "name", "ts")},
+        }
+        if e["dur"] > 0:
+            trace.update(ph="X", dur=round(e["dur"] * 1e6))
+        else:
+            trace.update(ph="i", s="t")
+        events.append(trace)
+    with open(trace_file, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def summary(entries, top=5):
+    # Log the time per stage and design family, and the (top) jobs per stage
+    if not entries:
+        return
+    df = pd.DataFrame([e for e in entries if e["cat"] != "cache"])
+    cache_df = pd.DataFrame([e for e in entries if e["cat"] == "cache"])
+    logger.info("Run summary (wall and CPU time in s, queue wait in s, memory in GB)")
+    if not df.empty:
+        for column in ("queue_wait", "cpu", "peak_mem", "vcd_bytes"):
+            if column not in df:
+                df[column] = np.nan
+        stages = df.groupby("cat").agg(
+            jobs=("dur", "size"),
+            wall=("dur", "sum"),
+            cpu=("cpu", "sum"),
+            queue_wait=("queue_wait", "mean"),
+            peak_mem=("peak_mem", "max"),
+            vcd_gb=("vcd_bytes", lambda b: b.sum() / 1024 ** 3),
+        )
+        logger.info(f"Per stage:\n{stages.sort_values('wall', ascending=False).round(2)}")
+        jobs = df[df["design"].notna()] if "design" in df else df.iloc[:0]
+        if not jobs.empty:
+            families = (
+                jobs.assign(family=jobs["design"].map(family))
+                .pivot_table(index="family", columns="cat", values="dur", aggfunc="sum")
+                .fillna(0)
+            )
+            families["total"] = families.sum(axis=1)
+            logger.info(
+                f"Per design family:\n{families.sort_values('total', ascending=False).round(1)}"
+            )
+            for cat, group in jobs.groupby("cat"):
+                longest = group.nlargest(top, "dur")
+                logger.info(
+                    f"Top {cat}: "
+                    + ", ".join(f"{n} ({d:.0f} s)" for n, d in zip(longest["name"], longest["dur"]))
+                )
+    if not cache_df.empty:
+        hits = cache_df.groupby("stage")["hit"].agg(["sum", "size"])
+        logger.info(
+            "Cache hits: "
+            + ", ".join(f"{stage} {h}/{n}" for stage, (h, n) in hits.iterrows())
+        )
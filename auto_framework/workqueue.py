@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 MICAS, KU LEUVEN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http:#www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -----------------------------------------------------
+# Author:   agent
+# Function: Shared-filesystem work queue for Auto Framework
+#           The coordinator publishes synthesis and power jobs,
+#           workers on any host with access to the shared
+#           directory claim them, heartbeat while they run them,
+#           and publish their result. Jobs of lost workers are
+#           put back in the queue
+#
+#   QUEUE_DIR/<run>/lease.json                 heartbeat (mtime) of the coordinator
+#   QUEUE_DIR/<run>/pending/<seq>_<job>.json   published, not claimed yet
+#   QUEUE_DIR/<run>/running/<seq>_<job>.json   claimed (atomic rename)
+#   QUEUE_DIR/<run>/running/<seq>_<job>.hb     heartbeat (mtime) and owner
+#   QUEUE_DIR/<run>/done/<seq>_<job>.json      result
+# -----------------------------------------------------
+
+from imports import *
+import threading
+
+logger = logging.getLogger("auto_L4")
+
+# Seconds between two scans of the queue, and between two heartbeats of a worker
+POLL_INTERVAL = 2.0
+HEARTBEAT = 10.0
+# A claimed job without heartbeat for this long (s) is put back in the queue, and the
+# jobs of a run without coordinator heartbeat for this long are not claimed anymore
+LOST_AFTER = 60.0
+# Number of times a job is put back in the queue before it is failed
+MAX_ATTEMPTS = 3
+
+
+def write_atomic(path, data):
+    # Readers on other hosts never see a partial file
+    tmp = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def job_name(func):
+    # Name and keyword arguments of a job function (or a functools.partial of it)
+    if isinstance(func, partial):
+        return func.func.__name__, dict(func.keywords)
+    return func.__name__, {}
+
+
+class Coordinator:
+    # Publishes jobs to (queue_dir) and waits for their results. (run) separates the
+    # jobs of this run from those of older (interrupted) runs
+    def __init__(self, queue_dir, run=None):
+        self.run = run or time.strftime("%Y%m%d_%H%M%S")
+        self.dir = f"{queue_dir}/{self.run}"
+        for sub in ("pending", "running", "done"):
+            os.makedirs(f"{self.dir}/{sub}", exist_ok=True)
+        self.seq = 0
+        self.futures = {}
+        self.monitor = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        # Has to be called from the running event loop
+        self._lease()
+        threading.Thread(target=self._beat, daemon=True).start()
+        self.monitor = asyncio.create_task(self._monitor())
+        logger.info(f"Publishing jobs to {self.dir}, start workers with: python auto_framework.py worker")
+
+    def stop(self):
+        # Also called after an interrupt, when the event loop is closed: workers don't
+        # claim the jobs left in the queue without the run directory (and its lease)
+        self.stopped.set()
+        if self.monitor and not self.monitor.done():
+            self.monitor.cancel()
+        try:
+            shutil.rmtree(self.dir)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not delete queue directory: {e}")
+
+    def _lease(self):
+        write_atomic(
+            f"{self.dir}/lease.json",
+            {"coordinator": f"{socket.gethostname()}:{os.getpid()}", "time": time.time()},
+        )
+
+    def _beat(self):
+        # Lease heartbeats from a thread: a busy event loop (e.g. parsing reports) is not
+        # a lost coordinator
+        while not self.stopped.wait(HEARTBEAT):
+            try:
+                self._lease()
+            except OSError:
+                pass
+
+    async def run_job(self, func, *args):
+        # Run (func)(*args) on a worker, and return its result
+        name, kwargs = job_name(func)
+        self.seq += 1
+        job = f"{self.seq:06d}_{name}"
+        future = asyncio.get_running_loop().create_future()
+        self.futures[job] = future
+        write_atomic(
+            f"{self.dir}/pending/{job}.json",
+            {
+                "job": job,
+                "run": self.run,
+                "func": name,
+                "args": args,
+                "kwargs": kwargs,
+                "attempts": 0,
+            },
+        )
+        return await future
+
+    def _collect(self):
+        for file in os.listdir(f"{self.dir}/done"):
+            job = file[: -len(".json")]
+            if not file.endswith(".json") or job not in self.futures:
+                continue
+            result = read_json(f"{self.dir}/done/{file}")
+            if result is None:
+                continue
+            future = self.futures.pop(job)
+            os.remove(f"{self.dir}/done/{file}")
+            if future.done():
+                continue
+            if not result["ok"]:
+                # Like a failed local job: its result is None, dependent jobs are skipped
+                logger.warning(f"  {job} failed on {result['worker']}: {result['error']}")
+            future.set_result(result["result"] if result["ok"] else None)
+
+    def _requeue_lost(self):
+        # Put the claimed jobs without a recent heartbeat back in the queue
+        now = time.time()
+        for file in os.listdir(f"{self.dir}/running"):
+            if not file.endswith(".json"):
+                continue
+            job = file[: -len(".json")]
+            path = f"{self.dir}/running/{file}"
+            if job not in self.futures:
+                # Finished and collected meanwhile
+                continue
+            try:
+                # Claimed jobs start with the time of their claim (rename)
+                beat = os.path.getmtime(f"{self.dir}/running/{job}.hb")
+            except OSError:
+                try:
+                    beat = os.stat(path).st_ctime
+                except OSError:
+                    continue
+            if now - beat < LOST_AFTER or os.path.exists(f"{self.dir}/done/{file}"):
+                continue
+            spec = read_json(path)
+            if spec is None:
+                continue
+            owner = read_json(f"{self.dir}/running/{job}.hb") or {}
+            spec["attempts"] += 1
+            if spec["attempts"] >= MAX_ATTEMPTS:
+                logger.warning(f"  {job}: lost {spec['attempts']} times, failing it")
+                write_atomic(
+                    f"{self.dir}/done/{file}",
+                    {"ok": False, "result": None, "worker": owner.get("worker"), "error": "worker lost"},
+                )
+            else:
+                logger.warning(f"  {job}: worker {owner.get('worker', '?')} lost, requeuing")
+                write_atomic(f"{self.dir}/pending/{file}", spec)
+            for stale in (path, f"{self.dir}/running/{job}.hb"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    async def _monitor(self):
+        while True:
+            try:
+                self._collect()
+                self._requeue_lost()
+            except OSError as e:
+                logger.warning(f"Work queue: {e}")
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+class Worker:
+    # Claims jobs from all runs in (queue_dir) and runs them with (funcs) (name ->
+    # async job function). At most (capacity)[kind] jobs of each kind run at once,
+    # where (kinds) maps a job function name to its kind (e.g. its first tool stage)
+    # The worker stops after (idle_timeout) s without jobs (None: never)
+    def __init__(self, queue_dir, funcs, kinds, capacity, idle_timeout=None, on_claim=None):
+        self.queue_dir = queue_dir
+        self.funcs = funcs
+        self.kinds = kinds
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        self.on_claim = on_claim
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.running = {}
+        self.orphans = set()
+
+    def _free(self, func):
+        kind = self.kinds.get(func, func)
+        busy = sum(self.kinds.get(f, f) == kind for _, f in self.running.values())
+        return busy < self.capacity.get(kind, 1)
+
+    def _alive(self, run_dir):
+        # The coordinator of the run renewed its lease recently. Runs of interrupted (or
+        # killed) coordinators are skipped, nobody would collect their results
+        try:
+            alive = time.time() - os.path.getmtime(f"{run_dir}/lease.json") < LOST_AFTER
+        except OSError:
+            alive = False
+        if alive:
+            self.orphans.discard(run_dir)
+        elif run_dir not in self.orphans:
+            logger.warning(f"Worker {self.name}: coordinator of {run_dir} is gone, skipping its jobs")
+            self.orphans.add(run_dir)
+        return alive
+
+    def _claim(self):
+        # Claim the oldest pending jobs the worker has capacity for
+        claimed = []
+        alive = {}
+        for pending in sorted(glob.glob(f"{self.queue_dir}/*/pending/*.json")):
+            run_dir = os.path.dirname(os.path.dirname(pending))
+            if run_dir not in alive:
+                alive[run_dir] = self._alive(run_dir)
+            if not alive[run_dir]:
+                continue
+            file = os.path.basename(pending)
+            func = file[:-5].split("_", 1)[1]
+            if func not in self.funcs or not self._free(func):
+                continue
+            running = f"{run_dir}/running/{file}"
+            try:
+                # Only one worker wins the rename
+                os.rename(pending, running)
+            except OSError:
+                continue
+            self._heartbeat(running)
+            spec = read_json(running)
+            self.running[running] = (spec, func)
+            claimed.append(running)
+        return claimed
+
+    def _heartbeat(self, running):
+        write_atomic(f"{running[:-5]}.hb", {"worker": self.name, "time": time.time()})
+
+    def _beat(self, stop):
+        # Heartbeats from a thread: a busy event loop (e.g. parsing reports) is not a
+        # lost worker
+        while not stop.wait(HEARTBEAT):
+            for running in list(self.running):
+                try:
+                    self._heartbeat(running)
+                except OSError:
+                    pass
+
+    async def _run(self, running):
+        spec, func = self.running[running]
+        run_dir = os.path.dirname(os.path.dirname(running))
+        logger.info(f"Worker {self.name}: running {spec['job']} of {os.path.basename(run_dir)}")
+        if self.on_claim:
+            self.on_claim(spec)
+        try:
+            result = await self.funcs[func](*spec["args"], **spec["kwargs"])
+            done = {"ok": True, "result": result, "worker": self.name, "error": None}
+        except asyncio.CancelledError:
+            # Interrupted worker: hand the job back right away
+            try:
+                os.replace(running, f"{run_dir}/pending/{os.path.basename(running)}")
+                os.remove(f"{running[:-5]}.hb")
+            except OSError:
+                pass
+            self.running.pop(running, None)
+            raise
+        except Exception as e:
+            logger.warning(f"Worker {self.name}: {spec['job']} failed: {e!r}")
+            done = {"ok": False, "result": None, "worker": self.name, "error": repr(e)}
+        try:
+            done = json.loads(json.dumps(done, default=str))
+            write_atomic(f"{run_dir}/done/{os.path.basename(running)}", done)
+            os.remove(f"{running[:-5]}.hb")
+            os.remove(running)
+        except OSError:
+            # The coordinator finished or requeued the job meanwhile
+            pass
+        finally:
+            self.running.pop(running, None)
+
+    async def work(self):
+        logger.info(f"Worker {self.name} waiting for jobs in {self.queue_dir}")
+        tasks = set()
+        idle = time.time()
+        stop = threading.Event()
+        threading.Thread(target=self._beat, args=(stop,), daemon=True).start()
+        try:
+            while True:
+                for running in self._claim():
+                    tasks.add(asyncio.create_task(self._run(running)))
+                tasks = {t for t in tasks if not t.done()}
+                if tasks:
+                    idle = time.time()
+                elif self.idle_timeout and time.time() - idle > self.idle_timeout:
+                    logger.info(f"Worker {self.name}: no jobs for {self.idle_timeout} s, exiting")
+                    return
+                await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            stop.set()
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -26,6 +26,11 @@ module pb_L4 ();
   parameter      PRCSN     = 4'b0000;
   parameter      CLK_PRD   = 25ns;
   parameter      VCD_FILE  = $sformatf("dump_%4b_clk%3.2f.vcd",PRCSN,CLK_PRD);
+  parameter      WINDOW    = 0;             // Adaptive length: poll STOP_FILE every WINDOW cycles (0: off)
+  parameter      STOP_FILE = "stop_sim";
+  parameter      MIXED     = 0;             // Mixed precision: run all N_PRCSN precisions of PRCSN_SEQ in one simulation
+  parameter      N_PRCSN   = 5;             // PRCSN_SEQ[4*N_PRCSN-1 -: 4] is simulated first
+  parameter      PRCSN_SEQ = 20'b0000_0010_0011_1010_1111;
     
   //-------------Parameters------------------------------
   parameter       HEADROOM = 4; 
@@ -114,6 +119,7 @@ module pb_L4 ();
   logic    [L4_OUT_WIDTH-1:0]   mult_exp;
   logic    [Z_WIDTH-1:0]        accum_exp, accum;
   logic                         tst_ac_en, accum_en_reg;
+  bit                           dumping = 0;    // VCD file is only opened once (mixed precision)
 
   always_ff @(negedge clk) begin
     if(rst) accum_en_reg <= 0; 
@@ -6679,6 +6685,7 @@ module pb_L4 ();
 
   // Bench for spatial unrolling
   task bench_spatial(input bit [3:0] precision);
+    int out_station;
     // initial reset
     rst   =  1;
     $assertoff;
@@ -6687,10 +6694,14 @@ module pb_L4 ();
     w_full = '{default:0};
     repeat (5) @(negedge clk);
     prec = precision;
-    if(!TEST) begin
+    out_station = helper::get_out_stationarity(REP, BG, {L4_MODE, L3_MODE, L2_MODE}, precision);
+    if(!TEST && !dumping) begin
       $dumpfile(VCD_FILE);
       $dumpvars(0, genblk1.genblk1.top_L4_mac);
+      dumping = 1;
     end
+    // Phase markers (in ns) are used to window the power extraction of mixed precision runs
+    $display("PHASE START %4b %0.3f", precision, $realtime);
     repeat (RST) @(negedge clk) begin
       // reset
       rst    =  1;
@@ -6702,11 +6713,11 @@ module pb_L4 ();
       tst_ac_en = 1;
       fork
         begin  
-          repeat(REP/OUT_STATION) begin
+          repeat(REP/out_station) begin
             accum_en = 0; 
             @(negedge clk);
             accum_en = 1; 
-            repeat (OUT_STATION-1) @(negedge clk);
+            repeat (out_station-1) @(negedge clk);
           end
         end
         begin
@@ -6718,11 +6729,13 @@ module pb_L4 ();
         end
       join
     end
+    $display("PHASE END %4b %0.3f", precision, $realtime);
   endtask
 
   `ifdef BIT_SERIAL
   // Bench for temporal unrolling
   task bench_temporal(input bit [3:0] precision);
+    int out_station;
     // initial reset
     rst    =  1;
     $assertoff;
@@ -6731,10 +6744,14 @@ module pb_L4 ();
     w_full = '{default:0};
     repeat (5) @(negedge clk);
     prec = precision;
-    if(!TEST) begin
+    out_station = helper::get_out_stationarity(REP, BG, {L4_MODE, L3_MODE, L2_MODE}, precision);
+    if(!TEST && !dumping) begin
       $dumpfile(VCD_FILE);
       $dumpvars(0, genblk1.genblk1.top_L4_mac);
+      dumping = 1;
     end
+    // Phase markers (in ns) are used to window the power extraction of mixed precision runs
+    $display("PHASE START %4b %0.3f", precision, $realtime);
     repeat (RST) @(negedge clk) begin
       // reset
       rst      =  1;
@@ -6745,11 +6762,11 @@ module pb_L4 ();
       $asserton;
       fork
         begin  
-          repeat(REP/(OUT_STATION)) begin
+          repeat(REP/(out_station)) begin
             accum_en = 0; 
             repeat (clk_to_out) @(negedge clk);
             accum_en = 1; 
-            repeat (OUT_STATION-clk_to_out) @(negedge clk);
+            repeat (out_station-clk_to_out) @(negedge clk);
           end
         end
         begin
@@ -6784,9 +6801,31 @@ module pb_L4 ();
         end
       join
     end
+    $display("PHASE END %4b %0.3f", precision, $realtime);
   endtask
   `endif
 
+  // Adaptive simulation length
+  // The framework creates STOP_FILE once the windowed toggle activity in the VCD
+  // file has converged. The bench is then stopped early (REP is an upper bound)
+  initial begin
+    int fd, cycles;
+    if(WINDOW > 0) begin
+      cycles = 0;
+      forever begin
+        repeat (WINDOW) @(negedge clk);
+        cycles += WINDOW;
+        fd = $fopen(STOP_FILE, "r");
+        if(fd) begin
+          $fclose(fd);
+          $display("ADAPTIVE STOP: %0d cycles", cycles);
+          $dumpflush;
+          $stop;
+        end
+      end
+    end
+  end
+
   // Actual Bench execution
   initial begin
     casex(BG)
@@ -6801,6 +6840,7 @@ module pb_L4 ();
           // bench_spatial(4'b1010);    // 4bx4b
           // bench_spatial(4'b1111);    // 2bx2b
         end
+        else if(MIXED) for(int i=N_PRCSN-1; i>=0; i--) bench_spatial(PRCSN_SEQ[4*i+:4]);
         else bench_spatial(PRCSN); 
       end
       2'b11: begin: BG_TEMPORAL
@@ -6813,6 +6853,7 @@ module pb_L4 ();
             // bench_temporal(4'b1010); 
             // bench_temporal(4'b1111); 
           end 
+          else if(MIXED) for(int i=N_PRCSN-1; i>=0; i--) bench_temporal(PRCSN_SEQ[4*i+:4]);
           else bench_temporal(PRCSN); 
         `endif
       end
@@ -17,7 +17,11 @@ if {[info exists AUTO]} {
 }
     
 vlog -quiet $LIB_V
-vlog $HELPER $V_FILE $PB_FILE
+if {[info exists BG] && $BG==11} {
+    vlog $HELPER $V_FILE $PB_FILE +define+BIT_SERIAL
+} else {
+    vlog $HELPER $V_FILE $PB_FILE
+}
 
 if {[info exists AUTO]} {
 
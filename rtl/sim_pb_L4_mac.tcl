@@ -2,6 +2,30 @@
 if {[info exists AUTO]} {
     # Auto-mode defines its own parameters
     puts "\033\[41;97;1mAutomatic processing\033\[0m"
+    # Adaptive simulation length is optional
+    if {![info exists WINDOW]} {
+        set WINDOW      0
+        set STOP_FILE   stop_sim
+    }
+    # Random seed of the powerbench is optional
+    if {![info exists SEED]} {
+        set SEED        10
+    }
+    # Mixed precision powerbench is optional
+    if {![info exists MIXED]} {
+        set MIXED       0
+        set N_PRCSN     1
+        set PRCSN_SEQ   0000000000000000${PRECISION}
+    }
+    # Zero-delay (functional) simulation skips SDF back-annotation
+    if {![info exists SDF]} {
+        set SDF         1
+    }
+    if {$SDF} {
+        set DELAY_OPT   [list -sdfmax genblk1.genblk1.top_L4_mac=$SDF_FILE]
+    } else {
+        set DELAY_OPT   [list +nospecify +notimingchecks]
+    }
 
 } else {
     # Set the LIB_V file here
@@ -18,6 +42,7 @@ if {[info exists AUTO]} {
     set DVAFS           0 
     set REP             128 
     set RST             1
+    set SEED            10
     set VCD_FILE        ./dump_${PRECISION}_clk${CLK_PERIOD}.vcd
     if {$BG==00} {
         set BGN         L2
@@ -58,8 +83,13 @@ if {[info exists AUTO]} {
     -G RST=$RST \
     -G REP=$REP \
     -G VCD_FILE=$VCD_FILE \
-    -sdfmax genblk1.genblk1.top_L4_mac=$SDF_FILE \
-    -sv_seed 10 +nowarn3819
+    -G WINDOW=$WINDOW \
+    -G STOP_FILE=$STOP_FILE \
+    -G MIXED=$MIXED \
+    -G N_PRCSN=$N_PRCSN \
+    -G PRCSN_SEQ=20'b$PRCSN_SEQ \
+    {*}$DELAY_OPT \
+    -sv_seed $SEED +nowarn3819
 
 } else {
     vsim pb_L4 -t ps \
@@ -76,7 +106,7 @@ if {[info exists AUTO]} {
     -G REP=$REP \
     -G VCD_FILE=$VCD_FILE \
     -sdfmax genblk1.genblk1.top_L4_mac=$SDF_FILE -voptargs=+acc \
-    -sv_seed 10 +nowarn3819
+    -sv_seed $SEED +nowarn3819
     
     add wave -position insertpoint  \
     sim:/pb_L4/genblk1.genblk1.top_L4_mac/clk \
@@ -0,0 +1,69 @@
+# Hierarchical synthesis, block stage (HIERARCHICAL in auto_framework.py)
+# Synthesizes the L2_mult block of an L2 variant ($MODE, $BG, $DVAFS) on its own, with
+# $BUDGET of the clock periods for its paths, and exports its flattened netlist as the
+# module $BLOCK_NAME to $EXPORT_PATH/block.v. syn_L4_hier.tcl links it into the L3/L4
+# levels of every design with this L2 variant.
+# Only used in auto mode: the parameters are set by syn_setup.tcl
+
+# Number of genus threads is optional (chosen by the autotuner)
+if {![info exists MAX_CPUS]} {
+    set MAX_CPUS     8
+}
+puts "\033\[41;97;1mAutomatic processing (L2 block)\033\[0m"
+
+# After setting the module parameters, the module's name becomes ugly
+# The next 2 lines are a way to parse the design name into DESIGN_PAR variable
+binary scan [binary format B4 $MODE][binary format B4 00$BG] HH MODE_H BG_H
+set D_INT L2_mult_MODE4h${MODE_H}_BG2h${BG_H}_DVAFS1h${DVAFS}
+# Remove all ' from DInt and save new result to DESIGN_PAR
+regsub -all {(.)'} $D_INT {\1} DESIGN_PAR
+
+set_attribute library $LIB_DB
+
+read_hdl -library work -sv $RTL_PATH/helper.sv
+read_hdl -library work -sv $RTL_PATH/macro_utils.sv
+read_hdl -library work -sv $RTL_PATH/mult_2b.sv
+if {$BG==11} {
+    puts "\033\[41;97;1mDEFINE BIT_SERIAL\033\[0m"
+    read_hdl -library work -sv $RTL_PATH/L1_mult.sv    -define BIT_SERIAL
+    read_hdl -library work -sv $RTL_PATH/L2_mult.sv    -define BIT_SERIAL
+} else {
+    puts "\033\[41;97;1mDON'T DEFINE BIT_SERIAL\033\[0m"
+    read_hdl -library work -sv $RTL_PATH/L1_mult.sv
+    read_hdl -library work -sv $RTL_PATH/L2_mult.sv
+}
+
+# General compilation settings (same as syn_L4_mac.tcl)
+set_attribute lp_insert_clock_gating true /
+set_attribute syn_global_effort high
+set_attribute ungroup true
+set_attribute hdl_max_loop_limit 4100
+set_attribute max_cpus_per_server $MAX_CPUS
+
+elaborate -parameters [list 4'b${MODE} 2'b${BG} 1'b${DVAFS}] L2_mult
+# The block keeps the same name in every design it is linked into
+mv /designs/$DESIGN_PAR $BLOCK_NAME
+
+set_attribute lp_clock_gating_min_flops 2 /designs/*
+
+echo "\n############### SDC - CHECK\n"                   >  ${REPORT_FILE}
+echo "SDC script: $SDC_PATH/${SDC_MODE}.sdc"             >> ${REPORT_FILE}
+redirect -variable RPT_SDC {read_sdc $SDC_PATH/${SDC_MODE}.sdc}
+echo $RPT_SDC   >> ${REPORT_FILE}
+
+syn_generic
+syn_map
+
+# A single module: mapped sub-blocks (L1_mult_*, mult_2b_*) would clash with the
+# modules elaborated from RTL at the top level
+ungroup -all -flatten
+write_hdl > ${EXPORT_PATH}/block.v
+
+################# REPORTS #################
+
+# Timing reports
+echo   "############### TIMING - SUMMARY\n"                >> ${REPORT_FILE}
+report timing -summary                                     >> ${REPORT_FILE}
+# Area reports
+echo "\n############### AREA - SUMMARY\n"                  >> ${REPORT_FILE}
+report area                                                >> ${REPORT_FILE}
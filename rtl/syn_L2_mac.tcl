@@ -30,6 +30,7 @@ if {[info exists AUTO]} {
     # Paths 
     set SDC_PATH     ../constraints
     set EXPORT_PATH  ./${DESIGN_NAME}/${MAPPING}
+    set REPORT_FILE  ${EXPORT_PATH}/report.rpt
     set RTL_PATH     ../rtl/
 
     # Reporting
@@ -49,15 +50,26 @@ read_hdl -library work -sv $RTL_PATH/helper.sv
 read_hdl -library work -sv $RTL_PATH/macro_utils.sv
 read_hdl -library work -sv $RTL_PATH/counter.sv
 read_hdl -library work -sv $RTL_PATH/mult_2b.sv
-read_hdl -library work -sv $RTL_PATH/L1_mult.sv
-read_hdl -library work -sv $RTL_PATH/L2_mult.sv
-read_hdl -library work -sv $RTL_PATH/L2_mac.sv
-read_hdl -library work -sv $RTL_PATH/top_L2_mac.sv
+if {$BG==11} {
+    puts "\033\[41;97;1mDEFINE BIT_SERIAL\033\[0m"
+    read_hdl -library work -sv $RTL_PATH/L1_mult.sv    -define BIT_SERIAL
+    read_hdl -library work -sv $RTL_PATH/L2_mult.sv    -define BIT_SERIAL
+    read_hdl -library work -sv $RTL_PATH/L2_mac.sv     -define BIT_SERIAL
+    read_hdl -library work -sv $RTL_PATH/top_L2_mac.sv -define BIT_SERIAL
+} else {
+    read_hdl -library work -sv $RTL_PATH/L1_mult.sv
+    read_hdl -library work -sv $RTL_PATH/L2_mult.sv
+    read_hdl -library work -sv $RTL_PATH/L2_mac.sv
+    read_hdl -library work -sv $RTL_PATH/top_L2_mac.sv
+}
 
 # General compilation settings
 set_attribute lp_insert_clock_gating true /
 set_attribute syn_global_effort high
 set_attribute ungroup true
+if {[info exists MAX_CPUS]} {
+    set_attribute max_cpus_per_server $MAX_CPUS
+}
 # set_attribute ungroup false
 
 elaborate -parameters [list $HEADROOM 4'b${MODE} 2'b${BG} 1'b${DVAFS}] $DESIGN
@@ -75,13 +87,13 @@ set_attribute ungroup_ok false *
 # SDC version
 # Notice that the first echo cmd has ">" instead of ">>", which means it will overwrite any existing report
 # Other echo commands append to the new report file, this ensures new synthesis produces new reports
-echo "\n############### SDC - CHECK\n"                   >  $EXPORT_PATH/report.rpt
-echo "SDC script: $SDC_PATH/${DESIGN}_${SDC_MODE}.sdc"   >> $EXPORT_PATH/report.rpt 
+echo "\n############### SDC - CHECK\n"                   >  $REPORT_FILE
+echo "SDC script: $SDC_PATH/${DESIGN}_${SDC_MODE}.sdc"   >> $REPORT_FILE 
 
 # create_clock -name "clk" -period $CLK_8B [get_ports clk]
 redirect -variable RPT_SDC {read_sdc $SDC_PATH/${DESIGN}_${SDC_MODE}.sdc}
 
-echo $RPT_SDC   >> $EXPORT_PATH/report.rpt 
+echo $RPT_SDC   >> $REPORT_FILE 
 
 # ungroup /designs/top_L2_mac/instances_hier/mac/L2_mult/* -flatten
 syn_generic 
@@ -93,16 +105,16 @@ write_sdf -version 3.0 > ${EXPORT_PATH}/post.sdf
 ################# REPORTS #################
 
 # Timing reports
-echo   "############### TIMING - SUMMARY\n"                >> $EXPORT_PATH/report.rpt
-report timing -summary                                     >> $EXPORT_PATH/report.rpt
+echo   "############### TIMING - SUMMARY\n"                >> $REPORT_FILE
+report timing -summary                                     >> $REPORT_FILE
 # Area reports
-echo "\n############### AREA - SUMMARY\n"                  >> $EXPORT_PATH/report.rpt
-report area                                                >> $EXPORT_PATH/report.rpt
+echo "\n############### AREA - SUMMARY\n"                  >> $REPORT_FILE
+report area                                                >> $REPORT_FILE
 # Clock gating reports
-echo   "\n############### CLOCK GATING - SUMMARY\n"        >> $EXPORT_PATH/report.rpt
-report clock_gating                                        >> $EXPORT_PATH/report.rpt
+echo   "\n############### CLOCK GATING - SUMMARY\n"        >> $REPORT_FILE
+report clock_gating                                        >> $REPORT_FILE
 # Power reports
-echo "\n############### POWER - SUMMARY\n"                 >> $EXPORT_PATH/report.rpt
-report power                                               >> $EXPORT_PATH/report.rpt
-echo "\n############### GATES - MAC SUMMARY\n"             >> $EXPORT_PATH/report.rpt
-report gates -instance_hier mac -power                     >> $EXPORT_PATH/report.rpt
+echo "\n############### POWER - SUMMARY\n"                 >> $REPORT_FILE
+report power                                               >> $REPORT_FILE
+echo "\n############### GATES - MAC SUMMARY\n"             >> $REPORT_FILE
+report gates -instance_hier mac -power                     >> $REPORT_FILE
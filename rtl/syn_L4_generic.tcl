@@ -0,0 +1,77 @@
+# Staged synthesis, first stage (STAGED_SYNTHESIS in auto_framework.py)
+# Reads and elaborates the design and runs syn_generic once per design, for all clock
+# periods. The generic database is saved to $GENERIC_DB, and mapped per clock period by
+# syn_L4_map.tcl. The area of the generic netlist is reported to $REPORT_FILE.
+# Only used in auto mode: the parameters are set by syn_setup.tcl
+set BIT_SERIAL 1
+
+# Number of genus threads is optional (chosen by the autotuner)
+if {![info exists MAX_CPUS]} {
+    set MAX_CPUS     8
+}
+puts "\033\[41;97;1mAutomatic processing (generic stage)\033\[0m"
+
+# After setting the module parameters, the module's name becomes ugly
+# The next 2 lines are a way to parse the design name into DESIGN_PAR variable
+binary scan [binary format B4 $L2_MODE][binary format B4 00$BG][binary format B4 00$L3_MODE][binary format B4 00$L4_MODE] HHHH L2_MODE_H BG_H L3_MODE_H L4_MODE_H
+set D_INT ${DESIGN}_HEADROOM${HEADROOM}_L4_MODE2h${L4_MODE_H}_L3_MODE2h${L3_MODE_H}_L2_MODE4h${L2_MODE_H}_BG2h${BG_H}_DVAFS1h${DVAFS}
+# Remove all ' from DInt and save new result to DESIGN_PAR
+regsub -all {(.)'} $D_INT {\1} DESIGN_PAR
+
+set_attribute library $LIB_DB
+
+read_hdl -library work -sv $RTL_PATH/helper.sv
+read_hdl -library work -sv $RTL_PATH/macro_utils.sv
+read_hdl -library work -sv $RTL_PATH/counter.sv
+read_hdl -library work -sv $RTL_PATH/mult_2b.sv
+if {$BG==11} {
+    puts "\033\[41;97;1mDEFINE BIT_SERIAL\033\[0m"
+    read_hdl -library work -sv $RTL_PATH/L1_mult.sv    -define BIT_SERIAL
+    read_hdl -library work -sv $RTL_PATH/L2_mult.sv    -define BIT_SERIAL 
+    read_hdl -library work -sv $RTL_PATH/L3_mult.sv    -define BIT_SERIAL
+    read_hdl -library work -sv $RTL_PATH/L4_mult.sv    -define BIT_SERIAL
+    read_hdl -library work -sv $RTL_PATH/L4_mac.sv     -define BIT_SERIAL
+    read_hdl -library work -sv $RTL_PATH/top_L4_mac.sv -define BIT_SERIAL
+} else {
+    puts "\033\[41;97;1mDON'T DEFINE BIT_SERIAL\033\[0m"
+    read_hdl -library work -sv $RTL_PATH/L1_mult.sv 
+    read_hdl -library work -sv $RTL_PATH/L2_mult.sv  
+    read_hdl -library work -sv $RTL_PATH/L3_mult.sv 
+    read_hdl -library work -sv $RTL_PATH/L4_mult.sv 
+    read_hdl -library work -sv $RTL_PATH/L4_mac.sv 
+    read_hdl -library work -sv $RTL_PATH/top_L4_mac.sv 
+}
+
+# General compilation settings
+set_attribute lp_insert_clock_gating true /
+set_attribute syn_global_effort high
+set_attribute ungroup true
+set_attribute hdl_max_loop_limit 4100
+set_attribute max_cpus_per_server $MAX_CPUS
+# set_attribute ungroup false
+
+elaborate -parameters [list $HEADROOM 2'b${L4_MODE} 2'b${L3_MODE} 4'b${L2_MODE} 2'b${BG} 1'b${DVAFS}] $DESIGN
+# Rename parameterized design to $DESIGN (won't be needed later)
+mv /designs/$DESIGN_PAR $DESIGN
+uniquify  $DESIGN
+
+# Clock gating from 2 flip-flops
+set_attribute lp_clock_gating_min_flops 2 /designs/*
+
+# set_attribute ungroup_ok true *
+set_attribute ungroup_ok false *
+# set_attribute ungroup_ok false mac
+
+# Clock-independent generic optimization (no constraints are read in this stage)
+syn_generic
+
+write_db -to_file $GENERIC_DB
+
+# Provisional area of the generic netlist (area screening: python auto_framework.py
+# area, see area_screen() in auto_framework.py), in the format of the synthesis reports
+if {[info exists REPORT_FILE]} {
+    echo "\n############### AREA - SUMMARY (GENERIC)\n"        >  ${REPORT_FILE}
+    report area                                                >> ${REPORT_FILE}
+    echo "\n############### GATES - MAC SUMMARY (GENERIC)\n"   >> ${REPORT_FILE}
+    report gates -instance_hier L4 -power                      >> ${REPORT_FILE}
+}
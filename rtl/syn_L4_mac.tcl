@@ -4,6 +4,10 @@ if {[info exists AUTO]} {
 
     # Auto-mode defines its own parameters
     puts "\033\[41;97;1mAutomatic processing\033\[0m"
+    # Number of genus threads is optional (chosen by the autotuner)
+    if {![info exists MAX_CPUS]} {
+        set MAX_CPUS     8
+    }
 
 } else {
     # Parameters
@@ -19,6 +23,9 @@ if {[info exists AUTO]} {
     set SDC_MODE     L4_prec_only
     set DESIGN       top_L4_mac
 
+    # Number of genus threads
+    set MAX_CPUS     8
+
     # Delays
     set CLK_8B       25.00
     set CLK_4B       25.00
@@ -76,7 +83,7 @@ set_attribute lp_insert_clock_gating true /
 set_attribute syn_global_effort high
 set_attribute ungroup true
 set_attribute hdl_max_loop_limit 4100
-set_attribute max_cpus_per_server 8
+set_attribute max_cpus_per_server $MAX_CPUS
 # set_attribute ungroup false
 
 elaborate -parameters [list $HEADROOM 2'b${L4_MODE} 2'b${L3_MODE} 4'b${L2_MODE} 2'b${BG} 1'b${DVAFS}] $DESIGN
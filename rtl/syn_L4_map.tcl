@@ -0,0 +1,54 @@
+# Staged synthesis, second stage (STAGED_SYNTHESIS in auto_framework.py)
+# Maps the generic database of syn_L4_generic.tcl ($GENERIC_DB) at the clock periods
+# CLK_8B/CLK_4B/CLK_2B, and exports the netlist and reports like syn_L4_mac.tcl.
+# Only used in auto mode: the parameters are set by syn_setup.tcl
+
+# Number of genus threads is optional (chosen by the autotuner)
+if {![info exists MAX_CPUS]} {
+    set MAX_CPUS     8
+}
+puts "\033\[41;97;1mAutomatic processing (mapping stage)\033\[0m"
+
+set_attribute library $LIB_DB
+
+read_db $GENERIC_DB
+
+# General compilation settings (root attributes of the generic stage)
+set_attribute lp_insert_clock_gating true /
+set_attribute syn_global_effort high
+set_attribute ungroup true
+set_attribute max_cpus_per_server $MAX_CPUS
+
+# SDC version
+# Notice that the first echo cmd has ">" instead of ">>", which means it will overwrite any existing report
+# Other echo commands append to the new report file, this ensures new synthesis produces new reports
+echo "\n############### SDC - CHECK\n"                   >  ${REPORT_FILE}
+echo "SDC script: $SDC_PATH/${DESIGN}_${SDC_MODE}.sdc"   >> ${REPORT_FILE} 
+
+# create_clock -name "clk" -period $CLK_8B [get_ports clk]
+redirect -variable RPT_SDC {read_sdc $SDC_PATH/${SDC_MODE}.sdc}
+
+echo $RPT_SDC   >> ${REPORT_FILE} 
+
+# ungroup /designs/top_L2_mac/instances_hier/mac/L2_mult/* -flatten
+syn_map
+
+write_hdl > ${EXPORT_PATH}/post.v
+write_sdf -version 3.0 > ${EXPORT_PATH}/post.sdf
+
+################# REPORTS #################
+
+# Timing reports
+echo   "############### TIMING - SUMMARY\n"                >> ${REPORT_FILE}
+report timing -summary                                     >> ${REPORT_FILE}
+# Area reports
+echo "\n############### AREA - SUMMARY\n"                  >> ${REPORT_FILE}
+report area                                                >> ${REPORT_FILE}
+# Clock gating reports
+echo   "\n############### CLOCK GATING - SUMMARY\n"        >> ${REPORT_FILE}
+report clock_gating                                        >> ${REPORT_FILE}
+# Power reports
+echo "\n############### POWER - SUMMARY\n"                 >> ${REPORT_FILE}
+report power                                               >> ${REPORT_FILE}
+echo "\n############### GATES - MAC SUMMARY\n"             >> ${REPORT_FILE}
+report gates -instance_hier L4 -power                      >> ${REPORT_FILE}